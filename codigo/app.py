@@ -1,20 +1,62 @@
-from flask import Flask, request, jsonify, render_template, Response
-import spacy  # Para carregar e usar o modelo de NLU pré-treinado.
-from SPARQLWrapper import SPARQLWrapper, JSON  # Para se conectar e fazer consultas ao servidor SPARQL (Fuseki).
-import re  # Para usar expressões regulares na extração de texto.
+from flask import Flask, request, jsonify, render_template, Response, make_response, g
+from extractor import Extractor  # Extração do objeto e da relação com padrões pré-compilados.
+from label_search import LabelSearch  # Busca aproximada e por prefixo nos labels.
+from intent import IntentEngine  # Classificação de intenções (regras rápidas + modelo de NLU carregado sob demanda).
+from store import create_store, read_dataset_version  # Backend do grafo de conhecimento (Fuseki remoto ou grafo local em memória).
+from graph_index import refresh_index, INDEXED_PREDICATES, PREDICATE_ORDER  # Índice em memória de labels e adjacências.
+from cache import ResponseCache  # Cache LRU com TTL para as respostas.
+from columnar import ColumnarCache  # Propriedades numéricas em colunas (filtros vetorizados).
+from summary import SummaryCache  # Resumo estatístico do modelo, calculado pelo setup.py.
+from layout import LayoutCache, LOD_GROUPINGS, apply_positions, apply_local_layout, cluster_payload  # Layout no servidor e agrupamento por nível de detalhe.
+import traversal  # Percurso de vários passos no grafo (busca em largura com limites).
+from tracing import tracer, instrument_store, logger, render_gauge  # Tempos por etapa, log das consultas e métricas.
 import os  # Para interagir com o sistema de arquivos (verificar caminhos).
 import json # Embora não usado diretamente, é bom ter para manipulação de JSON.
+import time  # Para controlar o intervalo entre as verificações de atualização do índice.
+import threading  # Para evitar que duas requisições reconstruam o índice ao mesmo tempo.
+import functools  # Para criar o decorador de cache das rotas.
+import itertools  # Para cortar as páginas do grafo completo.
+import re  # Para interpretar as condições dos filtros de propriedades.
+import logging  # Para configurar o nível e o formato do log.
 
 # Inicializa a aplicação Flask.
 app = Flask(__name__)
 
+# Log da aplicação (erros, consultas lentas e, com BIM_LOG_LEVEL=DEBUG e BIM_TRACING=1, as etapas de cada requisição).
+logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger.setLevel(os.environ.get("BIM_LOG_LEVEL", "INFO").upper())
+
 # --- Configurações Globais e Mapeamentos ---
 # Define o endpoint do servidor Fuseki. Usa uma variável de ambiente se existir, senão usa o padrão.
 FUSEKI_ENDPOINT = os.environ.get("FUSEKI_ENDPOINT", "http://localhost:3030/BIM_Knowledge_Base/query")
+# Intervalo mínimo (em segundos) entre verificações de uma nova versão dos dados para atualizar o índice.
+INDEX_REFRESH_INTERVAL = float(os.environ.get("BIM_INDEX_REFRESH_INTERVAL", "5"))
+# Limite de memória (em bytes) e tempo de vida (em segundos) do cache de respostas.
+CACHE_MAX_BYTES = int(os.environ.get("BIM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_TTL = float(os.environ.get("BIM_CACHE_TTL", "600"))
+# Limites do endpoint de chat em lote: mensagens por requisição, tamanho dos lotes do spaCy
+# e quantidade de objetos por bloco VALUES nas consultas SPARQL agrupadas.
+CHAT_BATCH_LIMIT = int(os.environ.get("BIM_CHAT_BATCH_LIMIT", "1000"))
+CHAT_BATCH_NLP_SIZE = 64
+CHAT_BATCH_VALUES_SIZE = 200
+# Máximo de edições para aceitar um nome digitado com erro no chat, e de sugestões em /search.
+CHAT_FUZZY_MAX_DISTANCE = int(os.environ.get("BIM_CHAT_FUZZY_MAX_DISTANCE", "3"))
+SEARCH_MAX_LIMIT = 50
+# Arestas por página do grafo completo (padrão e máximo aceito no parâmetro 'limit').
+FULL_GRAPH_PAGE_SIZE = int(os.environ.get("BIM_FULL_GRAPH_PAGE_SIZE", "500"))
+FULL_GRAPH_MAX_PAGE_SIZE = int(os.environ.get("BIM_FULL_GRAPH_MAX_PAGE_SIZE", "5000"))
+# Máximo de nós individuais em uma visualização; acima disso, os nós são agrupados em clusters.
+LOD_MAX_NODES = int(os.environ.get("BIM_LOD_MAX_NODES", "300"))
+# Máximo de elementos devolvidos por uma consulta de filtro de propriedades (o total é sempre informado).
+FILTER_MAX_LIMIT = int(os.environ.get("BIM_FILTER_MAX_LIMIT", "1000"))
 # Define o caminho para a pasta onde o modelo de NLU treinado está salvo.
 NLU_MODEL_PATH = "./nlu_model"
+# Carrega o modelo de NLU já na inicialização, em vez de no primeiro uso.
+NLU_PRELOAD = os.environ.get("BIM_NLU_PRELOAD", "0") == "1"
 # URI base usada no nosso grafo RDF. Deve ser a mesma usada no setup.py.
 BASE_URI = "http://exemplo.org/bim#"
+# Namespace do RDFS (os predicados dele, como o label, não aparecem no construtor de consultas).
+RDFS_NAMESPACE = "http://www.w3.org/2000/01/rdf-schema#"
 
 # Dicionário "cérebro" do chatbot. Mapeia palavras-chave da linguagem natural do usuário
 # para as relações técnicas correspondentes no grafo. É a chave para a flexibilidade do NLU.
@@ -38,127 +80,325 @@ INVERSE_PROPERTY_MAP = {
 }
 
 # --- Carregamento do Modelo NLU ---
-nlp = None # Inicializa a variável do modelo como nula.
+# O modelo spaCy só é carregado na primeira mensagem que as regras rápidas não resolvem.
+# Com BIM_NLU_PRELOAD=1, ele é carregado já na importação: use com servidores que criam os
+# processos de trabalho por fork depois de importar a aplicação (ex: 'gunicorn --preload'),
+# para que todos os processos compartilhem a mesma cópia do modelo na memória.
+intent_engine = IntentEngine(NLU_MODEL_PATH, RELATIONSHIP_KEYWORD_MAP)
+if NLU_PRELOAD:
+    intent_engine.preload()
+
+# Extrator do objeto e da relação; os labels conhecidos vêm do índice do grafo.
+extractor = Extractor(RELATIONSHIP_KEYWORD_MAP)
+
+# Índice de busca nos labels (autocompletar e correção de nomes digitados com erro).
+label_search = LabelSearch()
+
+# --- Carregamento do Backend de Armazenamento ---
+# O backend é escolhido pela variável de ambiente BIM_STORE_BACKEND ('fuseki' ou 'local').
+store = None
 try:
-    # Tenta carregar o modelo de NLU treinado pelo setup.py.
-    nlp = spacy.load(NLU_MODEL_PATH)
-    print("-> Modelo de NLU carregado com sucesso.")
-except IOError:
-    # Se o modelo não for encontrado, exibe um alerta.
-    print(f"-> ALERTA: Modelo de NLU não encontrado. Execute 'python setup.py' primeiro.")
+    # As consultas passam pelo registro de tempos (e pelo log de consultas lentas).
+    store = instrument_store(create_store(FUSEKI_ENDPOINT))
+    print(f"-> Backend de armazenamento '{store.name}' pronto.")
+except (IOError, ValueError) as e:
+    # O backend local precisa do snapshot gerado pelo setup.py.
+    print(f"-> ALERTA: Não foi possível iniciar o backend de armazenamento. Execute 'python setup.py' primeiro. Erro: {e}")
+
+# --- Cache de Respostas ---
+# Guarda as respostas das rotas de grafo/resumo e as consultas SPARQL do chatbot.
+response_cache = ResponseCache(max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL)
+
+# Layout de todos os nós do índice, recalculado em segundo plano quando a versão dos dados muda.
+layout_cache = LayoutCache()
+
+# --- Sincronização com o Conjunto de Dados ---
+# O índice em memória é montado na inicialização e mantido em dia com as novas cargas do setup.py
+# (por delta, quando a carga foi incremental). Enquanto não existir (ex: Fuseki fora do ar), as
+# consultas usam SPARQL. Uma nova versão dos dados também esvazia o cache de respostas.
+graph_index = None
+dataset_version = None  # Última versão dos dados vista pela aplicação.
+_dataset_checked_at = float("-inf")
+_dataset_lock = threading.Lock()
+
+def sync_with_dataset():
+    global graph_index, dataset_version, _dataset_checked_at
+    if time.monotonic() - _dataset_checked_at < INDEX_REFRESH_INTERVAL:
+        return
+    with _dataset_lock:
+        if time.monotonic() - _dataset_checked_at < INDEX_REFRESH_INTERVAL:
+            return
+        info = read_dataset_version()
+        if info.get('version', 0) != dataset_version:
+            if dataset_version is not None:
+                response_cache.invalidate()
+            dataset_version = info.get('version', 0)
+        if store is not None:
+            try:
+                graph_index = refresh_index(graph_index, store, info)
+                # Os índices derivados dos labels são remontados junto com o índice do grafo.
+                extractor.sync(graph_index)
+                label_search.sync(graph_index)
+                layout_cache.start(graph_index)
+            except Exception as e:
+                logger.warning("Não foi possível atualizar o índice do grafo. Erro: %s", e)
+        _dataset_checked_at = time.monotonic()
+
+def get_graph_index():
+    sync_with_dataset()
+    return graph_index
+
+if get_graph_index() is not None:
+    print(f"-> Índice do grafo montado ({len(graph_index.iris)} nós, versão {graph_index.version}).")
+
+# Colunas de propriedades numéricas gravadas pelo setup.py (reabertas quando há uma nova geração).
+columnar_cache = ColumnarCache()
+
+# Resumo estatístico gravado pelo setup.py, mantido na memória e relido quando o arquivo muda.
+summary_cache = SummaryCache()
+
+# Resumo da versão atual dos dados, ou None se ele não existir (ex: carga feita por uma versão
+# anterior do setup.py).
+def get_summary():
+    sync_with_dataset()
+    return summary_cache.get(dataset_version)
+
+# Decorador que guarda em cache a resposta JSON de uma rota GET, pela chave
+# (rota, parâmetros normalizados, versão dos dados). Só respostas 200 sem falhas são guardadas;
+# uma rota marca uma falha tratada com 'g.skip_cache = True'. Uma resposta do grafo completo com
+# 'layout=1' montada enquanto o layout ainda é calculado (sem as posições) também não é guardada.
+def cached_response(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        sync_with_dataset()
+        params = tuple(sorted((k, v) for k, v in request.args.items(multi=True) if v != ''))
+        key = (request.path, params, dataset_version)
+        body = response_cache.get(key)
+        if body is not None:
+            return Response(body, mimetype='application/json')
+        pending = layout_pending(request.path, request.args)
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not g.get('skip_cache') and not pending:
+            response_cache.put(key, response.get_data())
+        return response
+    return wrapper
 
 # --- Funções de Lógica do Chatbot ---
 
 # Identifica a intenção principal da frase do usuário (saudação, pergunta, etc.).
 def get_intent(text):
-    if not nlp: return "error" # Retorna erro se o modelo não foi carregado.
-    doc = nlp(text) # Processa o texto com o modelo spaCy.
-    # Retorna a categoria com a maior pontuação de confiança.
-    return max(doc.cats, key=doc.cats.get)
+    with tracer.span("intencao"):
+        return intent_engine.classify(text)
 
-# Extrai o nome do objeto BIM de interesse da frase do usuário.
+# Extrai o nome do objeto BIM de interesse da frase do usuário (entre aspas ou, sem aspas,
+# pelo maior label conhecido do grafo que aparece na frase).
 def extract_bim_object(text):
-    # Usa Regex para encontrar padrões como "do 'objeto'" ou "para o objeto 'objeto'".
-    # Esta é a busca prioritária por ser mais explícita.
-    explicit_match = re.search(r"(?:para o objeto|do|da|de|para)\s+('([^']*)'|\"([^\"]*)\")", text, re.IGNORECASE)
-    if explicit_match:
-        # Retorna o conteúdo encontrado dentro das aspas.
-        return explicit_match.group(2) or explicit_match.group(3)
-
-    # Se o padrão explícito falhar, usa um fallback que pega a primeira ocorrência entre aspas.
-    fallback_match = re.search(r"'([^']*)'|\"([^\"]*)\"", text)
-    if fallback_match:
-        return fallback_match.group(1) or fallback_match.group(2)
-    return None # Retorna None se nenhum objeto for encontrado.
+    sync_with_dataset()  # Mantém os labels conhecidos do extrator em dia.
+    return extractor.extract_object(text)
 
 # Extrai a relação (propriedade) que o usuário deseja consultar.
 def extract_bim_property(text):
-    # Primeiro, verifica se a pergunta foi gerada pelo "Construtor de Consultas".
-    match = re.search(r"relação '([^']*)'", text, re.IGNORECASE)
-    if match:
-        return match.group(1)
-
-    # Se não, usa a lógica de NLU flexível com palavras-chave.
-    text_lower = text.lower()
-    user_words = set(text_lower.split())
-
-    # Define a ordem de verificação para evitar ambiguidades (ex: 'tipo' vs 'classe').
-    relations_in_order = ['isOfType', 'type', 'isContainedIn', 'hasMaterial', 'aggregates']
-
-    for technical_relation in relations_in_order:
-        keywords = RELATIONSHIP_KEYWORD_MAP.get(technical_relation, [])
-        # Se QUALQUER uma das palavras-chave da relação estiver na pergunta, retorna a relação técnica.
-        if any(word in user_words for word in keywords):
-            return technical_relation
-            
-    # Se nenhuma palavra-chave for encontrada, assume que a intenção é pedir o nome do objeto.
-    return "label"
+    return extractor.extract_property(text)
+
+# Extrai o objeto e a relação de uma vez.
+def extract_bim_entities(text):
+    sync_with_dataset()  # Mantém os labels conhecidos do extrator em dia.
+    with tracer.span("extracao"):
+        return extractor.extract(text)
+
+# Resolve um nome que não existe exatamente no grafo (erro de digitação, maiúsculas, acentos)
+# pelo label mais próximo. Devolve (nome a consultar, nota para o início da resposta). Quando
+# há vários labels igualmente próximos, o nome devolvido é None e a nota traz as sugestões.
+def resolve_bim_object(object_name):
+    index = get_graph_index()
+    search_index = label_search.index
+    if not object_name or index is None or search_index is None or object_name in index.label_ids:
+        return object_name, ""
+    max_distance = min(CHAT_FUZZY_MAX_DISTANCE, max(1, len(object_name) // 4))
+    with tracer.span("busca_aproximada"):
+        matches = search_index.closest(object_name, max_distance)
+    if not matches:
+        return object_name, ""
+    if len(matches) == 1 or matches[0][1] < matches[1][1]:
+        return matches[0][0], f"(Não encontrei '{object_name}'; considerando '{matches[0][0]}'.) "
+    return None, f"❓ Não encontrei '{object_name}'. Você quis dizer: " + ", ".join(f"'{label}'" for label, _ in matches) + "?"
+
+# Monta as consultas SPARQL de saída e de entrada de um predicado para o objeto informado.
+def build_property_queries(object_name, predicate):
+    # --- ETAPA 1: Busca por TODAS as relações de SAÍDA ---
+    query_outgoing = f"""
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        PREFIX inst: <{BASE_URI}>
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        SELECT DISTINCT ?valueLabel WHERE {{
+            ?element rdfs:label "{object_name}" .
+            ?element {predicate} ?value .
+            ?value rdfs:label ?valueLabel .
+        }}
+    """
+    # --- ETAPA 2: Busca por TODAS as relações de ENTRADA ---
+    query_incoming = f"""
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        PREFIX inst: <{BASE_URI}>
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        SELECT DISTINCT ?subjectLabel WHERE {{
+            ?object rdfs:label "{object_name}" .
+            ?subject {predicate} ?object .
+            ?subject rdfs:label ?subjectLabel .
+        }}
+    """
+    return query_outgoing, query_incoming
+
+# Busca os valores de saída e, se não houver, os sujeitos de entrada de um predicado via SPARQL.
+def query_bim_property_sparql(object_name, predicate):
+    query_outgoing, query_incoming = build_property_queries(object_name, predicate)
+    with tracer.span("consulta_saida"):
+        values = [item["valueLabel"]["value"] for item in store.select(query_outgoing)]
+    if values:
+        return values, []
+    # Só consulta as relações de entrada se não houver nenhuma de saída.
+    with tracer.span("consulta_entrada"):
+        return [], [item["subjectLabel"]["value"] for item in store.select(query_incoming)]
+
+# Constrói o predicado SPARQL completo (ex: 'inst:hasMaterial') a partir do label extraído.
+def resolve_predicate(predicate_label):
+    if predicate_label == 'type':
+        return 'rdf:type'
+    if predicate_label == 'label':
+        return 'rdfs:label'
+    return f'inst:{predicate_label}'
+
+# Escreve um texto como literal SPARQL entre aspas, escapando os caracteres especiais.
+def sparql_literal(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r') + '"'
+
+# Formata a resposta do chatbot a partir dos valores de saída e dos sujeitos de entrada encontrados.
+def format_property_answer(object_name, predicate_label, values, subjects):
+    if values:
+        count = len(values)
+        # Formata uma resposta clara indicando que é uma relação de saída e lista todos os resultados.
+        return (f"✅ Relação de Saída ({count} resultado(s)): A propriedade '{predicate_label}' para '{object_name}' é: "
+                + ', '.join(f"'{v}'" for v in values) + ".")
+
+    if subjects:
+        count = len(subjects)
+        inverse_relation_phrase = INVERSE_PROPERTY_MAP.get(resolve_predicate(predicate_label), f"têm a relação '{predicate_label}' para")
+        # Formata uma resposta clara indicando que é uma relação de entrada e lista todos os objetos relacionados.
+        return (f"➡️ Relação de Entrada ({count} resultado(s)): Os seguintes objetos {inverse_relation_phrase} '{object_name}': "
+                + ', '.join(f"'{s}'" for s in subjects) + ".")
 
-# Executa a consulta SPARQL no Fuseki e formata a resposta para o usuário.
+    # --- ETAPA 3: Se ambas as buscas falharem ---
+    return f"❌ Desculpe, não encontrei a propriedade '{predicate_label}' para o objeto '{object_name}', nem relações de entrada ou saída correspondentes."
+
+# Consulta o grafo (pelo índice em memória ou via SPARQL) e formata a resposta para o usuário.
 def query_bim_property(object_name, predicate_label):
     if not object_name:
         return "Não consegui identificar sobre qual elemento você está perguntando."
 
-    # Constrói o predicado SPARQL completo (ex: 'inst:hasMaterial') a partir do label extraído.
-    if predicate_label == 'type':
-        predicate = 'rdf:type'
-    elif predicate_label == 'label':
-        predicate = 'rdfs:label'
-    else:
-        predicate = f'inst:{predicate_label}'
+    predicate = resolve_predicate(predicate_label)
+    try:
+        # Os predicados indexados respondem as duas direções em uma única consulta ao índice.
+        index = get_graph_index() if predicate_label in INDEXED_PREDICATES else None
+        if index is not None:
+            with tracer.span("indice"):
+                values, subjects = index.lookup(object_name, predicate_label)
+        else:
+            values, subjects = response_cache.get_or_compute(
+                ('chat', object_name, predicate, dataset_version), lambda: query_bim_property_sparql(object_name, predicate))
+    except Exception as e:
+        logger.error("Erro na consulta da propriedade '%s' de '%s': %s", predicate_label, object_name, e)
+        return f"Erro na consulta SPARQL: {e}"
 
-    sparql = SPARQLWrapper(FUSEKI_ENDPOINT)
-    sparql.setReturnFormat(JSON)
+    return format_property_answer(object_name, predicate_label, values, subjects)
 
-    try:
-        # --- ETAPA 1: Busca por TODAS as relações de SAÍDA ---
+# --- Funções de Lógica do Chatbot em Lote ---
+
+# Classifica a intenção de várias frases de uma vez; as que as regras rápidas não resolvem vão em lote para o spaCy.
+def get_intents(texts):
+    return intent_engine.classify_many(texts, batch_size=CHAT_BATCH_NLP_SIZE)
+
+# Busca via SPARQL, para vários objetos e um mesmo predicado, os valores de saída e (para os
+# objetos sem saída) os sujeitos de entrada, usando blocos VALUES em vez de uma consulta por objeto.
+def query_bim_properties_sparql(object_names, predicate):
+    results = {name: ([], []) for name in object_names}
+    names = list(object_names)
+    for start in range(0, len(names), CHAT_BATCH_VALUES_SIZE):
+        chunk = names[start:start + CHAT_BATCH_VALUES_SIZE]
         query_outgoing = f"""
             PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
             PREFIX inst: <{BASE_URI}>
             PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-            SELECT DISTINCT ?valueLabel WHERE {{
-                ?element rdfs:label "{object_name}" .
+            SELECT DISTINCT ?targetLabel ?valueLabel WHERE {{
+                VALUES ?targetLabel {{ {' '.join(sparql_literal(name) for name in chunk)} }}
+                ?element rdfs:label ?targetLabel .
                 ?element {predicate} ?value .
                 ?value rdfs:label ?valueLabel .
             }}
         """
-        sparql.setQuery(query_outgoing)
-        results = sparql.query().convert()["results"]["bindings"]
-
-        if results:
-            values = [item["valueLabel"]["value"] for item in results]
-            count = len(values)
-            # Formata uma resposta clara indicando que é uma relação de saída e lista todos os resultados.
-            return (f"✅ Relação de Saída ({count} resultado(s)): A propriedade '{predicate_label}' para '{object_name}' é: "
-                    f"{', '.join(f"'{v}'" for v in values)}.")
+        for item in store.select(query_outgoing):
+            results[item["targetLabel"]["value"]][0].append(item["valueLabel"]["value"])
 
-        # --- ETAPA 2: Se não houver saída, busca por TODAS as relações de ENTRADA ---
+    # Relações de entrada só para os objetos que não tiveram nenhuma relação de saída.
+    without_values = [name for name in names if not results[name][0]]
+    for start in range(0, len(without_values), CHAT_BATCH_VALUES_SIZE):
+        chunk = without_values[start:start + CHAT_BATCH_VALUES_SIZE]
         query_incoming = f"""
             PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
             PREFIX inst: <{BASE_URI}>
             PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-            SELECT DISTINCT ?subjectLabel WHERE {{
-                ?object rdfs:label "{object_name}" .
+            SELECT DISTINCT ?targetLabel ?subjectLabel WHERE {{
+                VALUES ?targetLabel {{ {' '.join(sparql_literal(name) for name in chunk)} }}
+                ?object rdfs:label ?targetLabel .
                 ?subject {predicate} ?object .
                 ?subject rdfs:label ?subjectLabel .
             }}
         """
-        sparql.setQuery(query_incoming)
-        inverse_results = sparql.query().convert()["results"]["bindings"]
-
-        if inverse_results:
-            subjects = [item["subjectLabel"]["value"] for item in inverse_results]
-            count = len(subjects)
-            inverse_relation_phrase = INVERSE_PROPERTY_MAP.get(predicate, f"têm a relação '{predicate_label}' para")
-            # Formata uma resposta clara indicando que é uma relação de entrada e lista todos os objetos relacionados.
-            return (f"➡️ Relação de Entrada ({count} resultado(s)): Os seguintes objetos {inverse_relation_phrase} '{object_name}': "
-                    f"{', '.join(f"'{s}'" for s in subjects)}.")
-
-    except Exception as e:
-        return f"Erro na consulta SPARQL: {e}"
-
-    # --- ETAPA 3: Se ambas as buscas falharem ---
-    return f"❌ Desculpe, não encontrei a propriedade '{predicate_label}' para o objeto '{object_name}', nem relações de entrada ou saída correspondentes."
+        for item in store.select(query_incoming):
+            results[item["targetLabel"]["value"]][1].append(item["subjectLabel"]["value"])
+    return results
+
+# Responde a vários pares (objeto, propriedade) de uma vez. Pares repetidos são respondidos uma
+# única vez; os predicados indexados usam o índice e os demais são agrupados por predicado em
+# poucas consultas SPARQL. Devolve um dicionário (objeto, propriedade) -> resposta.
+def query_bim_properties(pairs):
+    answers, pending = {}, {}
+    index = get_graph_index()
+    for object_name, predicate_label in set(pairs):
+        if not object_name or (index is not None and predicate_label in INDEXED_PREDICATES):
+            answers[(object_name, predicate_label)] = query_bim_property(object_name, predicate_label)
+            continue
+        predicate = resolve_predicate(predicate_label)
+        cached = response_cache.get(('chat', object_name, predicate, dataset_version))
+        if cached is not None:
+            answers[(object_name, predicate_label)] = format_property_answer(object_name, predicate_label, *cached)
+        else:
+            pending.setdefault(predicate_label, set()).add(object_name)
+
+    for predicate_label, object_names in pending.items():
+        predicate = resolve_predicate(predicate_label)
+        try:
+            results = query_bim_properties_sparql(object_names, predicate)
+        except Exception as e:
+            logger.error("Erro na consulta em lote da propriedade '%s': %s", predicate_label, e)
+            for object_name in object_names:
+                answers[(object_name, predicate_label)] = f"Erro na consulta SPARQL: {e}"
+            continue
+        for object_name, (values, subjects) in results.items():
+            response_cache.put(('chat', object_name, predicate, dataset_version), (values, subjects))
+            answers[(object_name, predicate_label)] = format_property_answer(object_name, predicate_label, values, subjects)
+    return answers
+
+# Monta o corpo da resposta do chatbot para uma mensagem já classificada.
+def build_chat_response(intent, bim_object=None, bim_property=None, property_answer=None):
+    response_text = "Desculpe, não entendi o que você quis dizer."
+    action = None
+    if intent == "saudacao": response_text = "Olá! Sou seu assistente BIM. Como posso ajudar?"
+    elif intent == "despedida": response_text = "Até mais!"
+    elif intent == "perguntar_propriedade": response_text = property_answer
+    elif intent == "grafo_completo":
+        response_text = "OK. Gerando o grafo completo da ontologia..."
+        action = "full_graph"
+    return {"response": response_text, "object": bim_object, "property": bim_property, "action": action}
 
 # --- Endpoints da Aplicação Web ---
 
@@ -175,34 +415,58 @@ def chat():
     if not user_message: return jsonify({"error": "Mensagem não fornecida."}), 400
 
     intent = get_intent(user_message)
-    response_text = "Desculpe, não entendi o que você quis dizer."
-    bim_object = None; bim_property = None; action = None
+    bim_object = None; bim_property = None; property_answer = None
 
-    if intent == "saudacao": response_text = "Olá! Sou seu assistente BIM. Como posso ajudar?"
-    elif intent == "despedida": response_text = "Até mais!"
-    elif intent == "perguntar_propriedade":
+    if intent == "perguntar_propriedade":
         # Extrai o objeto e a propriedade da mensagem e chama a função de consulta.
-        bim_object = extract_bim_object(user_message)
-        bim_property = extract_bim_property(user_message)
-        response_text = query_bim_property(bim_object, bim_property)
-    elif intent == "grafo_completo":
-        response_text = "OK. Gerando o grafo completo da ontologia..."
-        action = "full_graph"
+        bim_object, bim_property = extract_bim_entities(user_message)
+        resolved, note = resolve_bim_object(bim_object)
+        bim_object = resolved
+        if resolved is None and note:
+            property_answer = note  # Nome ambíguo: a resposta traz as sugestões.
+        else:
+            property_answer = note + query_bim_property(bim_object, bim_property)
     # Retorna a resposta em formato JSON para o frontend.
-    return jsonify({"response": response_text, "object": bim_object, "property": bim_property, "action": action})
-
-# Rota que fornece os dados para a visualização do grafo de um objeto específico.
-@app.route('/graph-data')
-def get_graph_data():
-    object_name = request.args.get('object_name')
-    if not object_name:
-        return jsonify({"nodes": [], "edges": []})
+    with tracer.span("json"):
+        return jsonify(build_chat_response(intent, bim_object, bim_property, property_answer))
 
-    sparql = SPARQLWrapper(FUSEKI_ENDPOINT)
-    sparql.setReturnFormat(JSON)
-
-    # Consulta que busca todas as relações (de entrada e saída) para o objeto de interesse.
-    query = f"""
+# Rota que recebe várias mensagens de uma vez (ex: relatórios de QA) e devolve as respostas na mesma ordem.
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    try: data = request.get_json(force=True); messages = data.get("messages")
+    except Exception: return jsonify({"error": "JSON inválido"}), 400
+    payload, status = chat_batch_payload(messages)
+    return jsonify(payload), status
+
+# Respostas de um lote de mensagens (também usada pelo asgi.py), com o código HTTP.
+def chat_batch_payload(messages):
+    if not isinstance(messages, list) or not all(isinstance(m, str) and m for m in messages):
+        return {"error": "Forneça 'messages' como uma lista de mensagens não vazias."}, 400
+    if len(messages) > CHAT_BATCH_LIMIT:
+        return {"error": f"No máximo {CHAT_BATCH_LIMIT} mensagens por lote."}, 400
+
+    # 1. Classifica todas as intenções em lote.
+    intents = get_intents(messages)
+    # 2. Extrai objeto e propriedade das perguntas.
+    extracted, notes, ambiguous = [], [], []
+    for message, intent in zip(messages, intents):
+        obj, prop = extract_bim_entities(message) if intent == "perguntar_propriedade" else (None, None)
+        resolved, note = resolve_bim_object(obj)
+        extracted.append((resolved, prop)); notes.append(note)
+        ambiguous.append(resolved is None and bool(note))  # Nome ambíguo: a resposta traz as sugestões.
+    # 3. Responde a todos os pares (objeto, propriedade) de uma vez.
+    answers = query_bim_properties([pair for pair, intent, amb in zip(extracted, intents, ambiguous)
+                                    if intent == "perguntar_propriedade" and not amb])
+    results = [build_chat_response(intent, obj, prop, note if amb else note + answers.get((obj, prop), ""))
+               for intent, (obj, prop), note, amb in zip(intents, extracted, notes, ambiguous)]
+    return {"results": results}, 200
+
+# --- Consultas e Montagem dos Dados do Grafo ---
+# Usadas tanto pelas rotas Flask abaixo quanto pelo modo assíncrono (asgi.py).
+
+# Consulta que busca todas as relações (de entrada e saída) para o objeto de interesse.
+def build_graph_data_query(object_name):
+    return f"""
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
         PREFIX inst: <{BASE_URI}>
         SELECT DISTINCT ?s ?s_label ?p_label ?o ?o_label
@@ -219,51 +483,52 @@ def get_graph_data():
         }}
     """
 
+# Converte os resultados da consulta acima nos nós e arestas do vis.js.
+def graph_data_payload(results, object_name):
     nodes, edges, node_ids = [], [], set()
 
-    try:
-        sparql.setQuery(query)
-        results = sparql.query().convert()
-
-        # --- LÓGICA DE COLORAÇÃO PARA O GRAFO ---
-        central_node_color = "#a3e635"  # Verde para o nó principal.
-        related_node_color = "#93c5fd"  # Azul para os nós relacionados.
-        
-        for res in results.get("results", {}).get("bindings", []):
-            s_uri = res['s']['value']
-            s_label = res['s_label']['value']
-            o_uri = res['o']['value']
-            o_label = res.get('o_label', {}).get('value', o_uri.split('#')[-1])
-
-            # Adiciona o nó de origem (subject) se ele ainda não estiver no grafo.
-            if s_uri not in node_ids:
-                is_central = s_label == object_name
-                color = central_node_color if is_central else related_node_color
-                size = 25 if is_central else 15
-                nodes.append({"id": s_uri, "label": s_label, "color": color, "size": size})
-                node_ids.add(s_uri)
-
-            # Adiciona o nó de destino (object) se ele ainda não estiver no grafo.
-            if o_uri not in node_ids:
-                is_central = o_label == object_name
-                color = central_node_color if is_central else related_node_color
-                size = 25 if is_central else 15
-                nodes.append({"id": o_uri, "label": o_label, "color": color, "size": size})
-                node_ids.add(o_uri)
-
-            edges.append({"from": s_uri, "to": o_uri, "label": res['p_label']['value']})
-
-    except Exception as e:
-        print(f"Erro ao gerar dados do grafo: {e}")
-
-    return jsonify({"nodes": nodes, "edges": edges})
-
-# Rota que fornece os dados para a visualização do grafo completo (com limite).
-@app.route('/full-graph-data')
-def get_full_graph_data():
-    sparql = SPARQLWrapper(FUSEKI_ENDPOINT)
-    sparql.setReturnFormat(JSON)
-    query = f"""
+    # --- LÓGICA DE COLORAÇÃO PARA O GRAFO ---
+    central_node_color = "#a3e635"  # Verde para o nó principal.
+    related_node_color = "#93c5fd"  # Azul para os nós relacionados.
+    
+    for res in results:
+        s_uri = res['s']['value']
+        s_label = res['s_label']['value']
+        o_uri = res['o']['value']
+        o_label = res.get('o_label', {}).get('value', o_uri.split('#')[-1])
+
+        # Adiciona o nó de origem (subject) se ele ainda não estiver no grafo.
+        if s_uri not in node_ids:
+            is_central = s_label == object_name
+            color = central_node_color if is_central else related_node_color
+            size = 25 if is_central else 15
+            nodes.append({"id": s_uri, "label": s_label, "color": color, "size": size})
+            node_ids.add(s_uri)
+
+        # Adiciona o nó de destino (object) se ele ainda não estiver no grafo.
+        if o_uri not in node_ids:
+            is_central = o_label == object_name
+            color = central_node_color if is_central else related_node_color
+            size = 25 if is_central else 15
+            nodes.append({"id": o_uri, "label": o_label, "color": color, "size": size})
+            node_ids.add(o_uri)
+
+        edges.append({"from": s_uri, "to": o_uri, "label": res['p_label']['value']})
+
+    return {"nodes": nodes, "edges": edges}
+
+# O mesmo resultado a partir das adjacências do índice, sem consulta SPARQL (backend local).
+# Os nós centrais aparecem com o label procurado, os demais com o seu primeiro label.
+def graph_data_from_index(index, object_name):
+    central, edges = index.neighbourhood(object_name)
+    label = lambda node: object_name if node in central else index.labels_of(node)[0]
+    rows = [{"s": {"value": index.iris[s]}, "s_label": {"value": label(s)}, "p_label": {"value": p},
+             "o": {"value": index.iris[o]}, "o_label": {"value": label(o)}} for p, s, o in edges]
+    return graph_data_payload(rows, object_name)
+
+# Consulta do grafo completo (com limite), usada apenas enquanto o índice em memória não existe.
+def build_full_graph_query(limit=FULL_GRAPH_PAGE_SIZE):
+    return f"""
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
         PREFIX inst: <{BASE_URI}>
         SELECT ?s_label ?p_label ?o_label ?s ?o
@@ -274,78 +539,475 @@ def get_full_graph_data():
             ?o rdfs:label ?o_label .
             BIND(REPLACE(STR(?p), ".*[/#]", "") AS ?p_label)
         }}
-        LIMIT 150
+        LIMIT {int(limit)}
     """
+
+def full_graph_payload(results):
     nodes, edges, node_ids = [], [], set()
+    for res in results:
+        s_uri = res['s']['value']; s_label = res['s_label']['value']
+        if s_uri not in node_ids: nodes.append({"id": s_uri, "label": s_label}); node_ids.add(s_uri)
+        o_uri = res['o']['value']; o_label = res['o_label']['value']
+        if o_uri not in node_ids: nodes.append({"id": o_uri, "label": o_label}); node_ids.add(o_uri)
+        edges.append({"from": s_uri, "to": o_uri, "label": res['p_label']['value']})
+    return {"nodes": nodes, "edges": edges, "next_cursor": None}
+
+# --- Grafo Completo Paginado (a partir do índice) ---
+# As arestas são percorridas em ordem estável e entregues em páginas. O cursor de uma página
+# ('versão.predicado.sujeito.objeto') aponta para a última aresta entregue e só vale para a
+# versão dos dados em que foi gerado. Formatos: 'json' (nós e arestas no formato do vis.js),
+# 'compact' (ids inteiros + tabela de labels) e 'ndjson' (uma linha por nó/aresta, em streaming).
+FULL_GRAPH_FORMATS = ('json', 'compact', 'ndjson')
+
+# Lê e valida os parâmetros da rota (ValueError com a mensagem para o usuário se algo for inválido).
+# Os filtros 'type' e 'predicate' podem ser repetidos; 'container' é o label de um elemento espacial.
+def parse_full_graph_params(args):
+    fmt = args.get('format', 'json')
+    if fmt not in FULL_GRAPH_FORMATS:
+        raise ValueError(f"Formato desconhecido: '{fmt}'. Use {', '.join(FULL_GRAPH_FORMATS)}.")
     try:
-        sparql.setQuery(query)
-        results = sparql.query().convert()
-        for res in results.get("results", {}).get("bindings", []):
-            s_uri = res['s']['value']; s_label = res['s_label']['value']
-            if s_uri not in node_ids: nodes.append({"id": s_uri, "label": s_label}); node_ids.add(s_uri)
-            o_uri = res['o']['value']; o_label = res['o_label']['value']
-            if o_uri not in node_ids: nodes.append({"id": o_uri, "label": o_label}); node_ids.add(o_uri)
-            edges.append({"from": s_uri, "to": o_uri, "label": res['p_label']['value']})
-    except Exception as e: print(f"Erro ao gerar grafo completo: {e}")
-    return jsonify({"nodes": nodes, "edges": edges})
+        limit = int(args['limit']) if args.get('limit') else None
+    except ValueError:
+        raise ValueError("O parâmetro 'limit' deve ser um número inteiro.")
+    # Sem 'limit', o NDJSON transmite o grafo inteiro; as páginas JSON usam o tamanho padrão.
+    if limit is None and fmt != 'ndjson':
+        limit = FULL_GRAPH_PAGE_SIZE
+    if limit is not None:
+        limit = max(1, min(limit, FULL_GRAPH_MAX_PAGE_SIZE)) if fmt != 'ndjson' else max(1, limit)
+    predicates = args.getlist('predicate')
+    unknown = [p for p in predicates if p not in PREDICATE_ORDER]
+    if unknown:
+        raise ValueError(f"Predicado(s) desconhecido(s): {', '.join(unknown)}. Use {', '.join(PREDICATE_ORDER)}.")
+    return {"format": fmt, "limit": limit, "cursor": args.get('cursor') or None,
+            "types": args.getlist('type'), "predicates": predicates, "container": args.get('container') or None}
+
+def encode_graph_cursor(index, edge):
+    return '.'.join(str(part) for part in (index.version,) + tuple(edge))
+
+def decode_graph_cursor(index, cursor):
+    try:
+        version, *edge = [int(part) for part in cursor.split('.')]
+    except ValueError:
+        version, edge = None, []
+    if len(edge) != 3:
+        raise ValueError("Cursor inválido.")
+    if version != index.version:
+        raise ValueError("O cursor pertence a uma versão anterior dos dados; recomece a paginação.")
+    return tuple(edge)
+
+# Aplica o cursor e os filtros e devolve o iterador das arestas (ids inteiros) a entregar.
+def iter_full_graph_edges(index, params):
+    after = decode_graph_cursor(index, params['cursor']) if params['cursor'] else None
+    predicates = {PREDICATE_ORDER.index(p) for p in params['predicates']} or None
+    subjects = None
+    if params['types']:
+        subjects = set().union(*(index.nodes_of_type(t) for t in params['types']))
+    if params['container']:
+        contained = index.nodes_in_container(params['container'])
+        subjects = contained if subjects is None else subjects & contained
+    return index.iter_edges(after, predicates, subjects)
+
+# Monta uma página nos formatos 'json' ou 'compact' (com as posições do layout, se informadas).
+def full_graph_page(index, params, edges, positions=None):
+    page = list(itertools.islice(edges, params['limit'] + 1))
+    next_cursor = encode_graph_cursor(index, page[params['limit'] - 1]) if len(page) > params['limit'] else None
+    page = page[:params['limit']]
+    nodes = dict.fromkeys(node for _, s, o in page for node in (s, o))
+    if params['format'] == 'compact':
+        payload = {"version": index.version, "predicates": PREDICATE_ORDER,
+                   "labels": {node: index.labels_of(node)[0] for node in nodes},
+                   "edges": [[s, p, o] for p, s, o in page], "next_cursor": next_cursor}
+        if positions is not None:
+            payload["positions"] = {node: [round(float(positions[node][0]), 1), round(float(positions[node][1]), 1)] for node in nodes}
+        return payload
+    payload = {"nodes": [{"id": index.iris[node], "label": index.labels_of(node)[0]} for node in nodes],
+               "edges": [{"from": index.iris[s], "to": index.iris[o], "label": PREDICATE_ORDER[p]} for p, s, o in page],
+               "next_cursor": next_cursor}
+    return apply_positions(payload, index, positions) if positions is not None else payload
+
+# Gera o grafo em NDJSON: um cabeçalho com a tabela de predicados, depois cada nó (na primeira
+# vez em que aparece) e cada aresta, e por fim o cursor se a transmissão parou em 'limit'.
+def iter_full_graph_ndjson(index, params, edges):
+    yield json.dumps({"version": index.version, "predicates": PREDICATE_ORDER}) + "\n"
+    seen, lines, count = set(), [], 0
+    for edge in edges:
+        if params['limit'] is not None and count == params['limit']:
+            lines.append(json.dumps({"next_cursor": encode_graph_cursor(index, last)}))
+            break
+        p, s, o = edge
+        for node in (s, o):
+            if node not in seen:
+                seen.add(node)
+                lines.append(json.dumps({"node": [node, index.labels_of(node)[0]]}, ensure_ascii=False))
+        lines.append(json.dumps({"edge": [s, p, o]}))
+        count += 1; last = edge
+        # As linhas são enviadas em blocos para não pagar o custo de uma escrita por aresta.
+        if len(lines) >= 1000:
+            yield "\n".join(lines) + "\n"; lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+# --- Layout e Nível de Detalhe ---
+# Parâmetros de visualização comuns às rotas de grafo: 'layout=1' (posições calculadas no
+# servidor, dispensando a simulação física no navegador), 'lod' ('auto', 'none' ou um critério
+# de LOD_GROUPINGS) e 'expand' (grupos a abrir; pode ser repetido).
+def parse_view_params(args, default_lod='auto'):
+    lod = args.get('lod') or default_lod
+    if lod not in ('auto', 'none') and lod not in LOD_GROUPINGS:
+        raise ValueError(f"Nível de detalhe desconhecido: '{lod}'. Use auto, none, {', '.join(LOD_GROUPINGS)}.")
+    return {"lod": lod, "expand": args.getlist('expand'), "layout": wants_layout(args)}
+
+def wants_layout(args):
+    return args.get('layout') in ('1', 'true')
+
+# Só o grafo completo usa o layout global do índice, calculado em segundo plano.
+def layout_pending(path, args):
+    return path == '/full-graph-data' and wants_layout(args) and not layout_cache.ready(graph_index)
+
+# Agrupa os nós (no modo 'auto', só quando passam de LOD_MAX_NODES) e acrescenta as posições:
+# as do layout global para o grafo completo ('global_layout') e, para uma vizinhança ou um
+# subgrafo, as de um layout calculado só com os nós da resposta.
+# Sem o índice, a resposta segue sem alterações e o navegador volta a usar a simulação física.
+def apply_view_params(payload, index, view, keep=(), global_layout=False):
+    if index is None:
+        return payload
+    positions = layout_cache.get(index) if view['layout'] and global_layout else None
+    group_by = view['lod']
+    if group_by == 'auto':
+        group_by = 'type' if len(payload['nodes']) > LOD_MAX_NODES else 'none'
+    if group_by != 'none':
+        payload = cluster_payload(payload, index, group_by, LOD_MAX_NODES, view['expand'], keep, positions)
+    if positions is not None:
+        return apply_positions(payload, index, positions)
+    return apply_local_layout(payload) if view['layout'] and not global_layout else payload
+
+# Consulta para buscar todos os tipos de objetos e exemplos de instâncias.
+ONTOLOGY_TYPES_QUERY = f"""
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    PREFIX inst: <{BASE_URI}>
+    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+    SELECT ?type_label (GROUP_CONCAT(DISTINCT ?example_label; SEPARATOR=", ") AS ?examples)
+    WHERE {{
+        ?s a ?type .
+        ?s rdfs:label ?example_label .
+        ?type rdfs:label ?type_label .
+        FILTER(STRSTARTS(STR(?type), STR(inst:)))
+    }} GROUP BY ?type_label ORDER BY ?type_label
+"""
+
+# Consulta para buscar dinamicamente todos os predicados (relações) únicos do grafo.
+ONTOLOGY_RELATIONS_QUERY = f"""
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    PREFIX inst: <{BASE_URI}>
+    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+    SELECT DISTINCT ?p_label WHERE {{
+        ?s ?p ?o .
+        FILTER(isIRI(?s) && isIRI(?p) && isIRI(?o))
+        FILTER(!STRSTARTS(STR(?p), STR(rdfs:)))
+        BIND(REPLACE(STR(?p), ".*[/#]", "") AS ?p_label)
+    }} ORDER BY ?p_label
+"""
+
+def ontology_summary_payload(types_results, relations_results):
+    types = [
+        {"type": res['type_label']['value'], "examples": res['examples']['value'].split(', ')}
+        for res in types_results
+    ]
+    
+    relations = [res['p_label']['value'] for res in relations_results]
+    
+    # Garante que a relação 'type' (rdf:type) esteja sempre na lista para o construtor.
+    if 'type' not in relations:
+        relations.insert(0, 'type')
+    
+    return {"types": types, "relations": relations}
+
+# O mesmo resumo a partir das estatísticas pré-calculadas (sem nenhuma consulta SPARQL),
+# com os exemplos de cada classe já limitados na ingestão.
+def ontology_summary_from_stats(summary):
+    types = sorted(({"type": t["type"], "examples": t["examples"]} for t in summary["types"]), key=lambda t: t["type"])
+    relations = sorted({p["predicate"] for p in summary["predicates"] if not p["iri"].startswith(RDFS_NAMESPACE)})
+    if 'type' not in relations:
+        relations.insert(0, 'type')
+    return {"types": types, "relations": relations}
 
-# Rota que fornece um resumo da ontologia para popular o "Construtor de Consultas".
-@app.route('/ontology-summary')
-def get_ontology_summary():
-    sparql = SPARQLWrapper(FUSEKI_ENDPOINT)
-    sparql.setReturnFormat(JSON)
+# Rota que fornece os dados para a visualização do grafo de um objeto específico.
+@app.route('/graph-data')
+@cached_response
+def get_graph_data():
+    object_name = request.args.get('object_name')
+    if not object_name:
+        return jsonify({"nodes": [], "edges": []})
 
-    # Consulta para buscar todos os tipos de objetos e exemplos de instâncias.
-    query_types = f"""
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        PREFIX inst: <{BASE_URI}>
-        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-        SELECT ?type_label (GROUP_CONCAT(DISTINCT ?example_label; SEPARATOR=", ") AS ?examples)
-        WHERE {{
-            ?s a ?type .
-            ?s rdfs:label ?example_label .
-            ?type rdfs:label ?type_label .
-            FILTER(STRSTARTS(STR(?type), STR(inst:)))
-        }} GROUP BY ?type_label ORDER BY ?type_label
-    """
+    try:
+        view = parse_view_params(request.args)
+        index = get_graph_index()
+        # Com o backend local, a vizinhança sai do índice; a consulta SPARQL fica para o Fuseki.
+        if index is not None and store.name != 'fuseki':
+            with tracer.span("indice"):
+                payload = graph_data_from_index(index, object_name)
+        else:
+            payload = graph_data_payload(store.select(build_graph_data_query(object_name)), object_name)
+        with tracer.span("montagem"):
+            payload = apply_view_params(payload, index, view, keep=(object_name,))
+        with tracer.span("json"):
+            return jsonify(payload)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error("Erro ao gerar dados do grafo: %s", e)
+        g.skip_cache = True
+        return jsonify({"nodes": [], "edges": []})
 
-    # Consulta para buscar dinamicamente todos os predicados (relações) únicos do grafo.
-    query_relations = f"""
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        PREFIX inst: <{BASE_URI}>
-        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-        SELECT DISTINCT ?p_label WHERE {{
-            ?s ?p ?o .
-            FILTER(isIRI(?s) && isIRI(?p) && isIRI(?o))
-            FILTER(!STRSTARTS(STR(?p), STR(rdfs:)))
-            BIND(REPLACE(STR(?p), ".*[/#]", "") AS ?p_label)
-        }} ORDER BY ?p_label
-    """
+# Rota que fornece os dados para a visualização do grafo completo, em páginas ou em streaming.
+# Com 'lod' (apenas no formato 'json'), devolve de uma vez a visão agrupada de todas as arestas filtradas.
+@app.route('/full-graph-data')
+@cached_response
+def get_full_graph_data():
+    try:
+        params = parse_full_graph_params(request.args)
+        view = parse_view_params(request.args, default_lod='none')
+        index = get_graph_index()
+        if index is None:
+            # Sem o índice, devolve só a primeira página via SPARQL, sem cursor.
+            return jsonify(full_graph_payload(store.select(build_full_graph_query(params['limit'] or FULL_GRAPH_PAGE_SIZE))))
+        edges = iter_full_graph_edges(index, params)
+        if params['format'] == 'ndjson':
+            g.skip_cache = True  # O streaming não é guardado em cache.
+            return Response(iter_full_graph_ndjson(index, params, edges), mimetype='application/x-ndjson')
+        if view['lod'] != 'none' and params['format'] == 'json':
+            payload = full_graph_page(index, dict(params, limit=max(1, len(index.sorted_edges()))), edges)
+            return jsonify(apply_view_params(payload, index, view, global_layout=True))
+        positions = layout_cache.get(index) if view['layout'] else None
+        return jsonify(full_graph_page(index, params, edges, positions))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error("Erro ao gerar grafo completo: %s", e); g.skip_cache = True
+        return jsonify({"nodes": [], "edges": []})
 
+# Rota que fornece um resumo da ontologia para popular o "Construtor de Consultas".
+@app.route('/ontology-summary')
+@cached_response
+def get_ontology_summary():
+    summary = get_summary()
+    if summary is not None:
+        return jsonify(ontology_summary_from_stats(summary))
     try:
-        sparql.setQuery(query_types)
-        types_results = sparql.query().convert()
-
-        sparql.setQuery(query_relations)
-        relations_results = sparql.query().convert()
-
-        types = [
-            {"type": res['type_label']['value'], "examples": res['examples']['value'].split(', ')}
-            for res in types_results["results"]["bindings"]
-        ]
-        
-        relations = [res['p_label']['value'] for res in relations_results["results"]["bindings"]]
-        
-        # Garante que a relação 'type' (rdf:type) esteja sempre na lista para o construtor.
-        if 'type' not in relations:
-            relations.insert(0, 'type')
-        
-        return jsonify({"types": types, "relations": relations})
+        return jsonify(ontology_summary_payload(store.select(ONTOLOGY_TYPES_QUERY), store.select(ONTOLOGY_RELATIONS_QUERY)))
+    except Exception as e:
+        logger.error("Erro ao buscar resumo da ontologia: %s", e)
+        return jsonify({"error": str(e)}), 500
 
+# --- Percurso de Vários Passos ---
+# Lê e valida os parâmetros da rota '/traverse' (ValueError com a mensagem para o usuário).
+def parse_traversal_params(args):
+    start = (args.get('start') or '').strip()
+    if not start:
+        raise ValueError("Informe o objeto inicial no parâmetro 'start'.")
+    steps = traversal.parse_path(args.get('path'))
+    limits = {}
+    for name, default, maximum in (('max_depth', traversal.DEFAULT_MAX_DEPTH, traversal.MAX_DEPTH_LIMIT),
+                                   ('max_nodes', traversal.DEFAULT_MAX_NODES, traversal.MAX_NODES_LIMIT),
+                                   ('max_fanout', traversal.DEFAULT_MAX_FANOUT, traversal.MAX_NODES_LIMIT)):
+        try:
+            limits[name] = max(1, min(int(args[name]) if args.get(name) else default, maximum))
+        except ValueError:
+            raise ValueError(f"O parâmetro '{name}' deve ser um número inteiro.")
+    return {"start": start, "steps": steps, **limits}
+
+# Percorre o caminho no índice em memória. Sem o índice, executa o caminho como uma única
+# consulta SPARQL (só os nós finais com as contagens, sem o subgrafo).
+def traversal_response(params, view):
+    index = get_graph_index()
+    if index is None:
+        started = time.perf_counter()
+        query = traversal.build_traversal_query(sparql_literal(params['start']), params['steps'], params['max_nodes'])
+        results = [{"label": res['label']['value'], "count": int(res['count']['value'])} for res in store.select(query)]
+        return {"start": params['start'], "results": results, "nodes": [], "edges": [],
+                "hops": [], "ms": round((time.perf_counter() - started) * 1000, 3), "source": "sparql"}, 200
+    start, note = resolve_bim_object(params['start'])
+    if start is None or start not in index.label_ids:
+        return {"error": note or f"Objeto não encontrado: '{params['start']}'."}, 404
+    started = time.perf_counter()
+    budget = traversal.TraversalBudget(params['max_depth'], params['max_nodes'], params['max_fanout'])
+    with index.lock:
+        start_nodes = set(index.label_ids[start])
+    frontier, edges, arrivals, hops = traversal.traverse(index, start_nodes, params['steps'], budget)
+    payload = traversal.traversal_payload(index, start_nodes, frontier, edges, arrivals, hops, budget)
+    # O agrupamento e o layout valem só para o subgrafo; as contagens e os tempos seguem como estão.
+    payload.update(apply_view_params({"nodes": payload["nodes"], "edges": payload["edges"]}, index, view, keep=(start,)))
+    return dict(payload, start=start, note=note.strip(), ms=round((time.perf_counter() - started) * 1000, 3), source="index"), 200
+
+# Rota de percurso: parte do objeto 'start' e segue o caminho 'path' (ex:
+# 'aggregates*/isContainedIn^/hasMaterial'), com os limites 'max_depth', 'max_nodes' e 'max_fanout'.
+# Devolve os nós finais com as contagens, o subgrafo percorrido (aceita 'layout' e 'lod') e o tempo de cada passo.
+@app.route('/traverse')
+@cached_response
+def traverse_graph():
+    try:
+        params = parse_traversal_params(request.args)
+        view = parse_view_params(request.args, default_lod='none')
+        payload, status = traversal_response(params, view)
+        return jsonify(payload), status
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Erro ao buscar resumo da ontologia: {e}")
+        logger.error("Erro ao percorrer o grafo: %s", e); g.skip_cache = True
         return jsonify({"error": str(e)}), 500
 
+# Rota do resumo estatístico do modelo: contagem e exemplos por classe, histograma dos
+# predicados e elementos por material e por contêiner espacial, servidos da memória.
+@app.route('/summary')
+def get_model_summary():
+    summary = get_summary()
+    if summary is None:
+        return jsonify({"error": "O resumo do modelo não está disponível. Execute 'python setup.py' novamente."}), 503
+    return jsonify(summary)
+
+# --- Filtros de Propriedades Numéricas ---
+# Nomes amigáveis das propriedades e as colunas correspondentes, na ordem de preferência
+# (o primeiro valor que o elemento tiver é o usado). Qualquer coluna também pode ser usada
+# pelo nome completo (ex: 'Qto_WallBaseQuantities.Width') ou só pelo nome da propriedade ('Width').
+PROPERTY_ALIASES = {
+    'espessura': ['Material.Espessura', 'Qto_WallBaseQuantities.Width', 'Qto_SlabBaseQuantities.Depth',
+                  'Qto_CoveringBaseQuantities.Width', 'Qto_PlateBaseQuantities.Width'],
+    'comprimento': ['Qto_WallBaseQuantities.Length', 'Qto_BeamBaseQuantities.Length', 'Qto_ColumnBaseQuantities.Length',
+                    'Qto_MemberBaseQuantities.Length', 'Qto_SlabBaseQuantities.Perimeter'],
+    'altura': ['Qto_WallBaseQuantities.Height', 'Qto_DoorBaseQuantities.Height', 'Qto_WindowBaseQuantities.Height',
+               'Qto_SpaceBaseQuantities.Height', 'Qto_ColumnBaseQuantities.Length'],
+    'largura': ['Qto_DoorBaseQuantities.Width', 'Qto_WindowBaseQuantities.Width', 'Qto_WallBaseQuantities.Width'],
+    'area': ['Qto_SpaceBaseQuantities.NetFloorArea', 'Qto_SlabBaseQuantities.NetArea', 'Qto_WallBaseQuantities.NetSideArea',
+             'Qto_CoveringBaseQuantities.NetArea', 'Qto_DoorBaseQuantities.Area', 'Qto_WindowBaseQuantities.Area'],
+    'volume': ['Qto_WallBaseQuantities.NetVolume', 'Qto_SlabBaseQuantities.NetVolume', 'Qto_BeamBaseQuantities.NetVolume',
+               'Qto_ColumnBaseQuantities.NetVolume', 'Qto_SpaceBaseQuantities.NetVolume'],
+}
+# Unidades aceitas nos valores dos filtros (as colunas estão no SI).
+FILTER_UNITS = {'mm': 0.001, 'cm': 0.01, 'm': 1.0, 'm2': 1.0, 'm²': 1.0, 'cm2': 1e-4, 'cm²': 1e-4,
+                'm3': 1.0, 'm³': 1.0, 'l': 0.001}
+FILTER_CONDITION_RE = re.compile(r"^\s*([\w.\-]+)\s*(>=|<=|!=|>|<|=)\s*(-?\d+(?:[.,]\d+)?)\s*([a-zA-Z²³0-9]*)\s*$")
+
+# Interpreta uma condição como 'espessura>200mm' em (colunas, operador, valor no SI).
+# Lança ValueError com a mensagem para o usuário se ela for inválida.
+def parse_filter_condition(text, store):
+    match = FILTER_CONDITION_RE.match(text)
+    if not match:
+        raise ValueError(f"Condição inválida: '{text}'. Use <propriedade><operador><valor>[unidade], ex: espessura>200mm.")
+    name, op, value, unit = match.groups()
+    if unit and unit.lower() not in FILTER_UNITS:
+        raise ValueError(f"Unidade desconhecida: '{unit}'. Use {', '.join(FILTER_UNITS)}.")
+    columns = store.resolve(name, PROPERTY_ALIASES.get(name.lower(), ()))
+    if not columns:
+        raise ValueError(f"Propriedade desconhecida: '{name}'. Use {', '.join(PROPERTY_ALIASES)} ou uma coluna de '/filter/columns'.")
+    return columns, op, float(value.replace(',', '.')) * FILTER_UNITS.get(unit.lower(), 1.0)
+
+# Executa o filtro nas colunas e devolve os elementos encontrados (com label, se o índice estiver
+# disponível) e os valores das colunas usadas nas condições.
+def filter_elements_payload(store, args):
+    try:
+        limit = max(1, min(int(args.get('limit', 100)), FILTER_MAX_LIMIT))
+    except ValueError:
+        raise ValueError("O parâmetro 'limit' deve ser um número inteiro.")
+    started = time.perf_counter()
+    conditions = [parse_filter_condition(text, store) for text in args.getlist('where')]
+    rows = store.filter(conditions, classes=args.getlist('class'))
+    elapsed = time.perf_counter() - started
+    columns = list(dict.fromkeys(column for condition in conditions for column in condition[0]))
+    index = get_graph_index()
+    results = []
+    for i in rows[:limit]:
+        row = store.row(i, columns)
+        node = index.ids.get(BASE_URI + row["global_id"]) if index is not None else None
+        row["label"] = index.labels_of(node)[0] if node is not None else None
+        results.append(row)
+    return {"count": int(len(rows)), "results": results, "columns": columns, "ms": round(elapsed * 1000, 3)}
+
+# Rota de filtro por propriedades numéricas, ex: '/filter?class=IfcWall&where=espessura>200mm'
+# (paredes com mais de 200 mm de espessura). 'where' e 'class' podem ser repetidos. A resposta
+# não passa pelo cache: as colunas são regravadas pelo setup.py independentemente da versão dos dados.
+@app.route('/filter')
+def filter_elements():
+    columns_store = columnar_cache.get()
+    if columns_store is None:
+        return jsonify({"error": "As propriedades numéricas não estão disponíveis. Execute 'python setup.py' novamente."}), 503
+    try:
+        return jsonify(filter_elements_payload(columns_store, request.args))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+# Colunas disponíveis para os filtros (nomes completos) e os nomes amigáveis.
+@app.route('/filter/columns')
+def filter_columns():
+    columns_store = columnar_cache.get()
+    if columns_store is None:
+        return jsonify({"error": "As propriedades numéricas não estão disponíveis. Execute 'python setup.py' novamente."}), 503
+    return jsonify({"columns": columns_store.columns(), "aliases": PROPERTY_ALIASES,
+                    "classes": columns_store.class_names, "rows": len(columns_store)})
+
+# Rota de busca nos labels (autocompletar): primeiro os labels que começam com o texto, depois
+# os mais parecidos (tolera erros de digitação, maiúsculas e acentos).
+@app.route('/search')
+def search_labels():
+    query = request.args.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.args.get('limit', 10)), SEARCH_MAX_LIMIT))
+    except ValueError:
+        return jsonify({"error": "O parâmetro 'limit' deve ser um número inteiro."}), 400
+    if not query:
+        return jsonify({"query": query, "results": []})
+    sync_with_dataset()
+    if label_search.index is None:
+        return jsonify({"error": "O índice de busca ainda não está disponível."}), 503
+    return jsonify({"query": query, "results": label_search.index.search(query, limit)})
+
+# Rota de monitoramento do classificador de intenções (caminho rápido x modelo, tempo de carga).
+@app.route('/nlu-stats')
+def get_nlu_stats():
+    return jsonify(intent_engine.snapshot())
+
+# Rota de monitoramento do cache de respostas (acertos, falhas, ocupação).
+@app.route('/cache-stats')
+def get_cache_stats():
+    return jsonify(response_cache.snapshot())
+
+# Métricas no formato de texto do Prometheus: histogramas por rota, por etapa e das consultas
+# SPARQL (com BIM_TRACING=1), consultas lentas e os contadores do cache e do classificador.
+def metrics_text():
+    cache = response_cache.snapshot()
+    nlu = intent_engine.snapshot()
+    extra = [render_gauge(f"bim_cache_{name}", f"Cache de respostas: {name}.", cache[name])
+             for name in ("hits", "misses", "evictions", "entries", "bytes")]
+    extra += [render_gauge(f"bim_nlu_{name}", f"Classificador de intenções: {name}.", value)
+              for name, value in nlu.items() if isinstance(value, (int, float))]
+    extra.append(render_gauge("bim_dataset_version", "Versão dos dados carregada.", dataset_version or 0))
+    return tracer.render_metrics(extra)
+
+@app.route('/metrics')
+def get_metrics():
+    return Response(metrics_text(), mimetype='text/plain; version=0.0.4')
+
+# Instrumentação das requisições (só com BIM_TRACING=1): as etapas medidas voltam no cabeçalho
+# 'Server-Timing' e alimentam os histogramas por rota.
+@app.before_request
+def start_request_trace():
+    if tracer.enabled:
+        g.trace = tracer.start_request()
+
+@app.after_request
+def finish_request_trace(response):
+    trace = g.pop('trace', None)
+    if trace is not None:
+        response.headers['Server-Timing'] = tracer.server_timing(trace)
+        route = request.url_rule.rule if request.url_rule is not None else 'outras'
+        tracer.finish_request(trace, route, request.method, response.status_code)
+    return response
+
+# Rota que esvazia o cache manualmente (as novas cargas do setup.py já o esvaziam automaticamente).
+@app.route('/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    response_cache.invalidate()
+    return jsonify(response_cache.snapshot())
+
 # --- BLOCO DE EXECUÇÃO PRINCIPAL ---
 # Só é executado quando o script é chamado diretamente (ex: 'python app.py').
 if __name__ == '__main__':
@@ -0,0 +1,344 @@
+# Modo de execução assíncrono (ASGI) do Assistente BIM.
+# Oferece as mesmas rotas do app.py, mas as consultas SPARQL passam por um pool compartilhado de
+# conexões HTTP mantidas abertas (keep-alive), com limite de concorrência e tempo máximo por
+# consulta, e consultas independentes são executadas ao mesmo tempo.
+# Execução: 'python asgi.py' ou 'uvicorn asgi:app --workers 4'.
+import asyncio  # Para executar consultas em paralelo e limitar a concorrência.
+import os  # Para ler as variáveis de ambiente.
+import contextlib  # Para definir o ciclo de vida (inicialização/desligamento) do servidor.
+import time  # Para medir as consultas ao Fuseki.
+import httpx  # Cliente HTTP assíncrono com pool de conexões.
+import uvicorn  # Servidor ASGI.
+from starlette.applications import Starlette  # Micro-framework ASGI.
+from starlette.responses import JSONResponse, HTMLResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.concurrency import run_in_threadpool  # Executa o trabalho síncrono (CPU, índice, rdflib) fora do laço de eventos.
+import app as bim  # Reaproveita a lógica do chatbot, o índice, o cache e as consultas do app.py.
+from tracing import tracer, logger  # Tempos por etapa, log das consultas e métricas.
+
+# --- Configurações ---
+# Máximo de consultas SPARQL simultâneas (e de conexões abertas com o Fuseki).
+ASYNC_MAX_CONCURRENCY = int(os.environ.get("BIM_ASYNC_MAX_CONCURRENCY", "16"))
+# Tempo máximo, em segundos, de cada consulta SPARQL.
+SPARQL_TIMEOUT = float(os.environ.get("BIM_SPARQL_TIMEOUT", "30"))
+
+# --- Backends Assíncronos ---
+# Envia as consultas ao Fuseki por um único cliente HTTP com pool de conexões keep-alive.
+class AsyncFusekiStore:
+    def __init__(self, endpoint, max_concurrency=ASYNC_MAX_CONCURRENCY, timeout=SPARQL_TIMEOUT):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            headers={"Accept": "application/sparql-results+json"}, timeout=timeout)
+
+    async def select(self, query, timeout=None):
+        async with self.semaphore:
+            if not tracer.instrument_queries:
+                return await self.fetch(query, timeout)
+            start = time.perf_counter()
+            try:
+                rows = await self.fetch(query, timeout)
+            except Exception as e:
+                tracer.observe_query("fuseki", query, time.perf_counter() - start, 0, error=e)
+                raise
+            tracer.observe_query("fuseki", query, time.perf_counter() - start, len(rows))
+            return rows
+
+    async def fetch(self, query, timeout):
+        response = await self.client.post(self.endpoint, data={"query": query}, timeout=timeout or self.timeout)
+        response.raise_for_status()
+        return response.json()["results"]["bindings"]
+
+    async def aclose(self):
+        await self.client.aclose()
+
+# Executa as consultas de um backend síncrono (ex: o grafo local) em threads, com os mesmos
+# limites de concorrência e de tempo.
+class AsyncThreadStore:
+    def __init__(self, store, max_concurrency=ASYNC_MAX_CONCURRENCY, timeout=SPARQL_TIMEOUT):
+        self.store = store
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def select(self, query, timeout=None):
+        async with self.semaphore:
+            return await asyncio.wait_for(run_in_threadpool(self.store.select, query), timeout or self.timeout)
+
+    async def aclose(self):
+        pass
+
+# Cria o backend assíncrono correspondente ao backend configurado no app.py.
+def create_async_store():
+    if bim.store is None or bim.store.name != "fuseki":
+        return AsyncThreadStore(bim.store)
+    return AsyncFusekiStore(bim.store.endpoint)
+
+async_store = None
+
+# --- Lógica do Chatbot ---
+# Mesma lógica de 'query_bim_property' do app.py; sem o índice, as consultas de saída e de
+# entrada são disparadas ao mesmo tempo em vez de uma após a outra.
+async def query_bim_property_async(object_name, predicate_label):
+    if not object_name:
+        return "Não consegui identificar sobre qual elemento você está perguntando."
+
+    predicate = bim.resolve_predicate(predicate_label)
+    try:
+        index = await run_in_threadpool(bim.get_graph_index) if predicate_label in bim.INDEXED_PREDICATES else None
+        if index is not None:
+            with tracer.span("indice"):
+                values, subjects = index.lookup(object_name, predicate_label)
+        else:
+            key = ('chat', object_name, predicate, bim.dataset_version)
+            cached = bim.response_cache.get(key)
+            if cached is None:
+                query_outgoing, query_incoming = bim.build_property_queries(object_name, predicate)
+                with tracer.span("consultas"):
+                    outgoing, incoming = await asyncio.gather(async_store.select(query_outgoing), async_store.select(query_incoming))
+                values = [item["valueLabel"]["value"] for item in outgoing]
+                # As relações de entrada só são usadas quando não há nenhuma de saída, como no app.py.
+                subjects = [] if values else [item["subjectLabel"]["value"] for item in incoming]
+                cached = (values, subjects)
+                bim.response_cache.put(key, cached)
+            values, subjects = cached
+    except Exception as e:
+        logger.error("Erro na consulta da propriedade '%s' de '%s': %s", predicate_label, object_name, e)
+        return f"Erro na consulta SPARQL: {e}"
+
+    return bim.format_property_answer(object_name, predicate_label, values, subjects)
+
+# --- Cache das Rotas ---
+# Equivalente assíncrono do decorador 'cached_response' do app.py.
+def cached_route(handler):
+    async def wrapper(request):
+        await run_in_threadpool(bim.sync_with_dataset)
+        params = tuple(sorted((k, v) for k, v in request.query_params.multi_items() if v != ''))
+        key = (request.url.path, params, bim.dataset_version)
+        body = bim.response_cache.get(key)
+        if body is not None:
+            return Response(body, media_type="application/json")
+        pending = bim.layout_pending(request.url.path, request.query_params)
+        response, cacheable = await handler(request)
+        if cacheable and not pending and response.status_code == 200:
+            bim.response_cache.put(key, response.body)
+        return response
+    return wrapper
+
+# --- Rotas ---
+async def index(request):
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'index.html'), encoding='utf-8') as f:
+        return HTMLResponse(f.read())
+
+async def chat(request):
+    try: data = await request.json(); user_message = data.get("message")
+    except Exception: return JSONResponse({"error": "JSON inválido"}, status_code=400)
+    if not user_message: return JSONResponse({"error": "Mensagem não fornecida."}, status_code=400)
+
+    # A inferência do spaCy usa CPU, então roda em uma thread para não bloquear o laço de eventos.
+    intent = await run_in_threadpool(bim.get_intent, user_message)
+    bim_object = None; bim_property = None; property_answer = None
+    if intent == "perguntar_propriedade":
+        # A extração pode remontar o índice de labels (após uma nova carga), então também vai para uma thread.
+        bim_object, bim_property = await run_in_threadpool(bim.extract_bim_entities, user_message)
+        resolved, note = await run_in_threadpool(bim.resolve_bim_object, bim_object)
+        bim_object = resolved
+        if resolved is None and note:
+            property_answer = note  # Nome ambíguo: a resposta traz as sugestões.
+        else:
+            property_answer = note + await query_bim_property_async(bim_object, bim_property)
+    with tracer.span("json"):
+        return JSONResponse(bim.build_chat_response(intent, bim_object, bim_property, property_answer))
+
+# Lote de mensagens: a classificação, a extração e as consultas rodam em uma thread.
+async def chat_batch(request):
+    try: data = await request.json(); messages = data.get("messages")
+    except Exception: return JSONResponse({"error": "JSON inválido"}, status_code=400)
+    payload, status = await run_in_threadpool(bim.chat_batch_payload, messages)
+    return JSONResponse(payload, status_code=status)
+
+@cached_route
+async def graph_data(request):
+    object_name = request.query_params.get('object_name')
+    if not object_name:
+        return JSONResponse({"nodes": [], "edges": []}), True
+    try:
+        view = bim.parse_view_params(request.query_params)
+        index = await run_in_threadpool(bim.get_graph_index)
+        if index is not None and bim.store.name != 'fuseki':
+            payload = await run_in_threadpool(bim.graph_data_from_index, index, object_name)
+        else:
+            results = await async_store.select(bim.build_graph_data_query(object_name))
+            payload = bim.graph_data_payload(results, object_name)
+        # O agrupamento e o layout usam CPU, então rodam em uma thread.
+        payload = await run_in_threadpool(bim.apply_view_params, payload, index, view, (object_name,))
+        return JSONResponse(payload), True
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400), False
+    except Exception as e:
+        logger.error("Erro ao gerar dados do grafo: %s", e)
+        return JSONResponse({"nodes": [], "edges": []}), False
+
+@cached_route
+async def full_graph_data(request):
+    try:
+        params = bim.parse_full_graph_params(request.query_params)
+        view = bim.parse_view_params(request.query_params, default_lod='none')
+        index = await run_in_threadpool(bim.get_graph_index)
+        if index is None:
+            query = bim.build_full_graph_query(params['limit'] or bim.FULL_GRAPH_PAGE_SIZE)
+            return JSONResponse(bim.full_graph_payload(await async_store.select(query))), True
+        edges = bim.iter_full_graph_edges(index, params)
+        if params['format'] == 'ndjson':
+            # O Starlette consome o gerador síncrono em uma thread, sem bloquear o laço de eventos.
+            return StreamingResponse(bim.iter_full_graph_ndjson(index, params, edges), media_type="application/x-ndjson"), False
+        if view['lod'] != 'none' and params['format'] == 'json':
+            all_edges = dict(params, limit=max(1, len(index.sorted_edges())))
+            payload = await run_in_threadpool(lambda: bim.apply_view_params(bim.full_graph_page(index, all_edges, edges), index, view, global_layout=True))
+            return JSONResponse(payload), True
+        positions = await run_in_threadpool(bim.layout_cache.get, index) if view['layout'] else None
+        return JSONResponse(await run_in_threadpool(bim.full_graph_page, index, params, edges, positions)), True
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400), False
+    except Exception as e:
+        logger.error("Erro ao gerar grafo completo: %s", e)
+        return JSONResponse({"nodes": [], "edges": []}), False
+
+@cached_route
+async def ontology_summary(request):
+    summary = await run_in_threadpool(bim.get_summary)
+    if summary is not None:
+        return JSONResponse(bim.ontology_summary_from_stats(summary)), True
+    try:
+        # As duas consultas do resumo são independentes e rodam ao mesmo tempo.
+        types_results, relations_results = await asyncio.gather(
+            async_store.select(bim.ONTOLOGY_TYPES_QUERY), async_store.select(bim.ONTOLOGY_RELATIONS_QUERY))
+        return JSONResponse(bim.ontology_summary_payload(types_results, relations_results)), True
+    except Exception as e:
+        logger.error("Erro ao buscar resumo da ontologia: %s", e)
+        return JSONResponse({"error": str(e)}, status_code=500), False
+
+@cached_route
+async def traverse_graph(request):
+    try:
+        params = bim.parse_traversal_params(request.query_params)
+        view = bim.parse_view_params(request.query_params, default_lod='none')
+        # O percurso (ou a consulta SPARQL equivalente, sem o índice) roda em uma thread.
+        payload, status = await run_in_threadpool(bim.traversal_response, params, view)
+        return JSONResponse(payload, status_code=status), status == 200
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400), False
+    except Exception as e:
+        logger.error("Erro ao percorrer o grafo: %s", e)
+        return JSONResponse({"error": str(e)}, status_code=500), False
+
+async def search_labels(request):
+    query = request.query_params.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 10)), bim.SEARCH_MAX_LIMIT))
+    except ValueError:
+        return JSONResponse({"error": "O parâmetro 'limit' deve ser um número inteiro."}, status_code=400)
+    if not query:
+        return JSONResponse({"query": query, "results": []})
+    await run_in_threadpool(bim.sync_with_dataset)
+    if bim.label_search.index is None:
+        return JSONResponse({"error": "O índice de busca ainda não está disponível."}, status_code=503)
+    return JSONResponse({"query": query, "results": bim.label_search.index.search(query, limit)})
+
+async def model_summary(request):
+    summary = await run_in_threadpool(bim.get_summary)
+    if summary is None:
+        return JSONResponse({"error": "O resumo do modelo não está disponível. Execute 'python setup.py' novamente."}, status_code=503)
+    return JSONResponse(summary)
+
+async def filter_elements(request):
+    columns_store = await run_in_threadpool(bim.columnar_cache.get)
+    if columns_store is None:
+        return JSONResponse({"error": "As propriedades numéricas não estão disponíveis. Execute 'python setup.py' novamente."}, status_code=503)
+    try:
+        # A varredura das colunas usa CPU, então roda em uma thread.
+        return JSONResponse(await run_in_threadpool(bim.filter_elements_payload, columns_store, request.query_params))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+async def filter_columns(request):
+    columns_store = await run_in_threadpool(bim.columnar_cache.get)
+    if columns_store is None:
+        return JSONResponse({"error": "As propriedades numéricas não estão disponíveis. Execute 'python setup.py' novamente."}, status_code=503)
+    return JSONResponse({"columns": columns_store.columns(), "aliases": bim.PROPERTY_ALIASES,
+                         "classes": columns_store.class_names, "rows": len(columns_store)})
+
+async def cache_stats(request):
+    return JSONResponse(bim.response_cache.snapshot())
+
+async def invalidate_cache(request):
+    bim.response_cache.invalidate()
+    return JSONResponse(bim.response_cache.snapshot())
+
+async def nlu_stats(request):
+    return JSONResponse(bim.intent_engine.snapshot())
+
+async def metrics(request):
+    return Response(bim.metrics_text(), media_type="text/plain; version=0.0.4")
+
+# --- Instrumentação das Requisições ---
+# Middleware ASGI equivalente aos ganchos 'before_request'/'after_request' do app.py (só com
+# BIM_TRACING=1). As etapas executadas em threads ('run_in_threadpool') herdam a requisição atual.
+class TracingMiddleware:
+    def __init__(self, application):
+        self.app = application
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trace = tracer.start_request()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", tracer.server_timing(trace).encode())]
+            await send(message)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            path = scope["path"]
+            tracer.finish_request(trace, path if path in ROUTE_PATHS else 'outras', scope["method"], status["code"])
+
+# Abre o pool de conexões na inicialização e o fecha no desligamento do servidor.
+@contextlib.asynccontextmanager
+async def lifespan(application):
+    global async_store
+    async_store = create_async_store()
+    yield
+    await async_store.aclose()
+
+app = Starlette(routes=[
+    Route('/', index),
+    Route('/chat', chat, methods=['POST']),
+    Route('/chat/batch', chat_batch, methods=['POST']),
+    Route('/graph-data', graph_data),
+    Route('/full-graph-data', full_graph_data),
+    Route('/ontology-summary', ontology_summary),
+    Route('/traverse', traverse_graph),
+    Route('/summary', model_summary),
+    Route('/filter', filter_elements),
+    Route('/filter/columns', filter_columns),
+    Route('/search', search_labels),
+    Route('/cache-stats', cache_stats),
+    Route('/cache/invalidate', invalidate_cache, methods=['POST']),
+    Route('/nlu-stats', nlu_stats),
+    Route('/metrics', metrics),
+], lifespan=lifespan)
+ROUTE_PATHS = {route.path for route in app.routes}
+if tracer.enabled:
+    app.add_middleware(TracingMiddleware)
+
+# --- BLOCO DE EXECUÇÃO PRINCIPAL ---
+if __name__ == '__main__':
+    if not os.path.exists(bim.NLU_MODEL_PATH):
+        print("!!! ATENÇÃO: Modelo de NLU não encontrado.")
+        print("!!! Execute 'python setup.py' para criar os modelos e dados necessários.")
+    else:
+        uvicorn.run(app, host='0.0.0.0', port=5000)
@@ -0,0 +1,102 @@
+# Micro-benchmark da extração de objeto e relação.
+# Mede o custo por mensagem do extrator (extractor.py) e o compara com a extração anterior
+# (padrões compilados a cada chamada e laço sobre as palavras-chave), além do tempo de montagem
+# do autômato de labels para quantidades crescentes de labels.
+# Execução (dentro da pasta 'codigo'): 'python benchmarks/extraction.py --labels 1000 10000 100000'.
+import argparse  # Para ler os parâmetros da linha de comando.
+import os  # Para localizar a pasta do código.
+import random  # Para gerar os labels sintéticos.
+import re  # Usado pela extração anterior, reproduzida abaixo para comparação.
+import sys  # Para importar os módulos da aplicação.
+import time  # Para medir os tempos.
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extractor import Extractor, LabelAutomaton  # noqa: E402
+
+# Mesmo mapa de palavras-chave do app.py (copiado para não carregar a aplicação inteira).
+RELATIONSHIP_KEYWORD_MAP = {
+    'isContainedIn': ['onde', 'localização'],
+    'hasMaterial': ['material', 'composição'],
+    'aggregates': ['contém', 'agrega', 'partes'],
+    'isOfType': ['tipo'],
+    'type': ['classe'],
+}
+
+# Mensagens com o objeto entre aspas (as únicas que a extração anterior resolvia) e sem aspas.
+QUOTED_MESSAGES = [
+    "qual o material do 'floor'?",
+    "onde está o \"Basic Wall:Interior\"?",
+    "Qual a relação 'hasMaterial' para o objeto 'Slab'?",
+]
+UNQUOTED_MESSAGES = [
+    "qual o tipo de Basic Wall:Interior 138mm",
+    "o que o Default Building contém e onde ele fica?",
+    "qual a classe do elemento Window-01 no pavimento térreo?",
+]
+
+# --- Extração anterior (para comparação) ---
+def legacy_extract(text):
+    obj = None
+    explicit_match = re.search(r"(?:para o objeto|do|da|de|para)\s+('([^']*)'|\"([^\"]*)\")", text, re.IGNORECASE)
+    if explicit_match:
+        obj = explicit_match.group(2) or explicit_match.group(3)
+    else:
+        fallback_match = re.search(r"'([^']*)'|\"([^\"]*)\"", text)
+        if fallback_match:
+            obj = fallback_match.group(1) or fallback_match.group(2)
+    match = re.search(r"relação '([^']*)'", text, re.IGNORECASE)
+    if match:
+        return obj, match.group(1)
+    user_words = set(text.lower().split())
+    for relation in ['isOfType', 'type', 'isContainedIn', 'hasMaterial', 'aggregates']:
+        if any(word in user_words for word in RELATIONSHIP_KEYWORD_MAP.get(relation, [])):
+            return obj, relation
+    return obj, "label"
+
+# Labels sintéticos no estilo dos nomes do Revit/IFC, mais os usados nas mensagens.
+def synthetic_labels(count, seed=0):
+    rng = random.Random(seed)
+    families = ["Basic Wall", "Floor", "Window", "Door", "Column", "Beam", "Slab", "Roof", "Stair", "Railing"]
+    labels = {f"{rng.choice(families)}:{rng.choice(['Interior', 'Exterior', 'Generic'])} {rng.randint(1, 10 ** 6)}mm"
+              for _ in range(count)}
+    return list(labels) + ["Basic Wall:Interior 138mm", "Default Building", "Window-01", "floor"]
+
+class FakeIndex:
+    """O extrator só precisa de 'label_ids', 'version' e 'lock' do índice."""
+    def __init__(self, labels):
+        import threading
+        self.label_ids = dict.fromkeys(labels)
+        self.version = 1
+        self.lock = threading.RLock()
+
+def per_message_us(function, messages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            function(message)
+    return (time.perf_counter() - start) / (repeat * len(messages)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark da extração de objeto e relação.")
+    parser.add_argument('--labels', type=int, nargs='+', default=[1000, 10000, 100000], help="Quantidades de labels conhecidos.")
+    parser.add_argument('--repeat', type=int, default=2000, help="Repetições do conjunto de mensagens.")
+    args = parser.parse_args()
+
+    print(f"{'':<40}{'com aspas':>14}{'sem aspas':>14}")
+    print(f"{'extração anterior':<40}{per_message_us(legacy_extract, QUOTED_MESSAGES, args.repeat):>11.2f} µs{'-':>14}")
+    for count in args.labels:
+        labels = synthetic_labels(count)
+        start = time.perf_counter()
+        automaton = LabelAutomaton(labels)
+        build_s = time.perf_counter() - start
+        extractor = Extractor(RELATIONSHIP_KEYWORD_MAP)
+        extractor.sync(FakeIndex(labels))
+        quoted = per_message_us(extractor.extract, QUOTED_MESSAGES, args.repeat)
+        unquoted = per_message_us(extractor.extract, UNQUOTED_MESSAGES, args.repeat)
+        print(f"{f'extrator com {len(automaton)} labels':<40}{quoted:>11.2f} µs{unquoted:>11.2f} µs   (montagem do autômato: {build_s:.2f}s)")
+    print("\nExemplos:")
+    for message in QUOTED_MESSAGES + UNQUOTED_MESSAGES:
+        print(f"  {message!r} -> {extractor.extract(message)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# Benchmark da busca nos labels (label_search.py).
+# Monta o índice sobre labels sintéticos no estilo dos nomes do Revit/IFC e mede a latência do
+# autocompletar (/search) e da correção de nomes usada no chat, com consultas exatas, por
+# prefixo e com erros de digitação.
+# Execução (dentro da pasta 'codigo'): 'python benchmarks/search.py --labels 1000000'.
+import argparse  # Para ler os parâmetros da linha de comando.
+import os  # Para localizar a pasta do código.
+import random  # Para gerar os labels e as consultas.
+import sys  # Para importar os módulos da aplicação.
+import time  # Para medir os tempos.
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from label_search import LabelSearchIndex  # noqa: E402
+
+FAMILIES = ["Basic Wall", "Floor", "Window", "Door", "Column", "Beam", "Slab", "Roof", "Stair", "Railing", "Curtain Wall"]
+VARIANTS = ["Interior", "Exterior", "Generic", "Parede", "Laje"]
+
+def synthetic_labels(count, rng):
+    return [f"{rng.choice(FAMILIES)}:{rng.choice(VARIANTS)} {rng.randint(1, 10 ** 7)}mm" for _ in range(count)]
+
+# Troca, apaga ou duplica um caractere do label.
+def typo(label, rng):
+    i = rng.randrange(len(label))
+    kind = rng.choice(["troca", "apaga", "duplica"])
+    if kind == "troca":
+        return label[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + label[i + 1:]
+    if kind == "apaga":
+        return label[:i] + label[i + 1:]
+    return label[:i] + label[i] + label[i:]
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {p: samples[min(len(samples) - 1, int(len(samples) * p / 100))] * 1000 for p in (50, 90, 99)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da busca nos labels.")
+    parser.add_argument('--labels', type=int, default=1000000, help="Quantidade de labels sintéticos.")
+    parser.add_argument('--queries', type=int, default=300, help="Consultas por cenário.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    labels = synthetic_labels(args.labels, rng)
+    start = time.perf_counter()
+    index = LabelSearchIndex(labels)
+    print(f"Índice com {len(index)} labels montado em {time.perf_counter() - start:.1f}s.")
+
+    sample = [rng.choice(labels) for _ in range(args.queries)]
+    scenarios = {
+        "autocompletar (prefixo)": (index.search, [label[:rng.randint(3, 8)] for label in sample]),
+        "autocompletar (com erro)": (index.search, [typo(label, rng) for label in sample]),
+        "chat (nome com erro)": (lambda q: index.closest(q, max(1, min(3, len(q) // 4))), [typo(label, rng) for label in sample]),
+    }
+    print(f"{'cenário':<28}{'p50':>10}{'p90':>10}{'p99':>10}{'acertos':>10}")
+    for name, (function, queries) in scenarios.items():
+        times, hits = [], 0
+        for query, expected in zip(queries, sample):
+            start = time.perf_counter()
+            result = function(query)
+            times.append(time.perf_counter() - start)
+            found = [r["label"] if isinstance(r, dict) else r[0] for r in result]
+            hits += expected in found or any(label.startswith(query) for label in found[:1])
+        p = percentiles(times)
+        print(f"{name:<28}{p[50]:>8.2f}ms{p[90]:>8.2f}ms{p[99]:>8.2f}ms{hits / len(queries):>9.0%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+# Servidor SPARQL local que faz as vezes do Apache Jena Fuseki nos benchmarks.
+# Roda em uma thread do próprio processo, sobre um grafo rdflib, e atende aos mesmos endpoints
+# usados pelo setup.py e pelo app.py: '/data' (Graph Store Protocol: DELETE e POST de Turtle ou
+# N-Triples, com gzip opcional), '/query' (SELECT, resposta no formato JSON do SPARQL) e
+# '/update' (SPARQL Update, incluindo o MOVE da carga com grafo de preparo).
+# Assim o código de carga e de consulta é exercitado sem alterações, sem um Fuseki rodando.
+import gzip  # Para os blocos comprimidos da carga em massa.
+import json  # Para as respostas das consultas.
+import os  # Para localizar a pasta do código.
+import re  # Para reconhecer o MOVE do grafo de preparo.
+import sys  # Para importar os módulos da aplicação.
+import threading  # O servidor roda em uma thread do processo do benchmark.
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler  # Servidor HTTP da biblioteca padrão.
+from urllib.parse import urlsplit, parse_qs  # Para ler os parâmetros das requisições.
+from rdflib import Graph  # Grafos padrão e nomeados do servidor.
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from store import LocalStore  # noqa: E402  (mesma conversão de resultados do backend local)
+
+MOVE_RE = re.compile(r"^\s*MOVE\s+<([^>]+)>\s+TO\s+DEFAULT\s*$", re.IGNORECASE)
+DATASET = '/BIM_Knowledge_Base'
+
+class SparqlStandIn:
+    """Servidor SPARQL em memória. 'url' é a base (ex: 'http://127.0.0.1:54321/BIM_Knowledge_Base')."""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.default = Graph()
+        self.named = {}  # IRI do grafo nomeado -> Graph
+        self.store = LocalStore(graph=self.default)
+        self.lock = threading.Lock()  # Cargas e atualizações não correm em paralelo com as consultas.
+        self.stats = {"queries": 0, "uploads": 0, "updates": 0}
+        self.server = ThreadingHTTPServer((host, port), self.handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{DATASET}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def target(self, params, create=False):
+        graph_uri = params.get('graph', [None])[0]
+        if graph_uri is None:
+            return self.default
+        if create:
+            return self.named.setdefault(graph_uri, Graph())
+        return self.named.get(graph_uri)
+
+    def handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass  # Sem uma linha de log por requisição.
+
+            def body(self):
+                data = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                return gzip.decompress(data) if self.headers.get('Content-Encoding') == 'gzip' else data
+
+            def reply(self, status, payload=None, content_type='application/json'):
+                data = b'' if payload is None else (payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8'))
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def route(self):
+                parts = urlsplit(self.path)
+                return parts.path[len(DATASET):] if parts.path.startswith(DATASET) else parts.path, parse_qs(parts.query, keep_blank_values=True)
+
+            def do_DELETE(self):
+                path, params = self.route()
+                if path != '/data':
+                    return self.reply(404)
+                with standin.lock:
+                    graph = standin.target(params)
+                    if graph is None:
+                        return self.reply(404)
+                    graph.remove((None, None, None))
+                self.reply(204)
+
+            def do_GET(self):
+                path, params = self.route()
+                if path != '/query' or 'query' not in params:
+                    return self.reply(404)
+                self.answer(params['query'][0])
+
+            def do_POST(self):
+                path, params = self.route()
+                content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip()
+                data = self.body()
+                if path == '/data':
+                    fmt = 'nt' if content_type in ('application/n-triples', 'text/plain') else 'turtle'
+                    with standin.lock:
+                        standin.target(params, create=True).parse(data=data.decode('utf-8'), format=fmt)
+                        standin.stats["uploads"] += 1
+                    return self.reply(200)
+                if path == '/query':
+                    if content_type == 'application/x-www-form-urlencoded':
+                        params.update(parse_qs(data.decode('utf-8')))
+                        return self.answer(params.get('query', [''])[0])
+                    return self.answer(data.decode('utf-8'))
+                if path == '/update':
+                    text = parse_qs(data.decode('utf-8')).get('update', [''])[0] if content_type == 'application/x-www-form-urlencoded' else data.decode('utf-8')
+                    return self.update(text)
+                self.reply(404)
+
+            def answer(self, query):
+                try:
+                    with standin.lock:
+                        bindings = standin.store.select(query)
+                        standin.stats["queries"] += 1
+                except Exception as e:
+                    return self.reply(400, str(e).encode('utf-8'), 'text/plain')
+                self.reply(200, {"head": {"vars": []}, "results": {"bindings": bindings}}, 'application/sparql-results+json')
+
+            def update(self, text):
+                try:
+                    with standin.lock:
+                        move = MOVE_RE.match(text)
+                        if move:
+                            source = standin.named.pop(move.group(1), Graph())
+                            standin.default.remove((None, None, None))
+                            standin.default += source
+                        else:
+                            standin.default.update(text)
+                        standin.stats["updates"] += 1
+                except Exception as e:
+                    return self.reply(400, str(e).encode('utf-8'), 'text/plain')
+                self.reply(204)
+
+        return Handler
@@ -0,0 +1,68 @@
+# Benchmark de inicialização: mede o tempo até a primeira resposta do /chat em um processo novo.
+# Cada medição roda em um subprocesso (inicialização a frio) e separa o tempo de importação da
+# aplicação do tempo da primeira resposta. Compara o carregamento sob demanda do modelo de NLU
+# com o pré-carregamento (BIM_NLU_PRELOAD=1), para uma mensagem resolvida pelas regras rápidas
+# e para outra que precisa do modelo.
+# Execução (dentro da pasta 'codigo'): 'python benchmarks/startup.py --runs 5'.
+import argparse  # Para ler os parâmetros da linha de comando.
+import json  # Para trocar os resultados entre os processos.
+import os  # Para montar o ambiente dos subprocessos.
+import statistics  # Para a mediana das medições.
+import subprocess  # Para medir cada inicialização em um processo novo.
+import sys  # Para chamar o mesmo interpretador Python.
+import time  # Para medir os tempos.
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Mensagens medidas: uma que as regras rápidas resolvem e outra que vai para o modelo.
+MESSAGES = {"rapida": "oi", "modelo": "me explique este projeto"}
+
+SCENARIOS = [
+    ("sob demanda", {"BIM_NLU_PRELOAD": "0"}),
+    ("pré-carregado", {"BIM_NLU_PRELOAD": "1"}),
+]
+
+# Executado no subprocesso: importa a aplicação e envia a primeira mensagem.
+def child(message, started_at):
+    sys.path.insert(0, CODE_DIR)
+    os.chdir(CODE_DIR)
+    start = time.perf_counter()
+    import app  # A importação inclui o backend, o índice e (se pré-carregado) o modelo.
+    imported = time.perf_counter()
+    response = app.app.test_client().post('/chat', json={"message": message})
+    answered = time.perf_counter()
+    print(json.dumps({
+        "import_s": imported - start,
+        "first_response_s": answered - imported,
+        "time_to_first_response_s": time.time() - started_at,
+        "status": response.status_code,
+        "response": response.get_json().get("response"),
+    }))
+
+def measure(env_overrides, message):
+    env = dict(os.environ, **env_overrides)
+    started_at = time.time()
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", message, str(started_at)],
+                            env=env, capture_output=True, text=True, check=True).stdout
+    # A última linha é o resultado; as anteriores são as mensagens de inicialização da aplicação.
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo até a primeira resposta do Assistente BIM.")
+    parser.add_argument('--runs', type=int, default=3, help="Medições por cenário (é usada a mediana).")
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child[0], float(args.child[1]))
+
+    print(f"{'cenário':<15}{'mensagem':<10}{'importação':>12}{'1ª resposta':>13}{'total':>10}  resposta")
+    for scenario, env_overrides in SCENARIOS:
+        for kind, message in MESSAGES.items():
+            runs = [measure(env_overrides, message) for _ in range(args.runs)]
+            median = {key: statistics.median(run[key] for run in runs)
+                      for key in ("import_s", "first_response_s", "time_to_first_response_s")}
+            print(f"{scenario:<15}{kind:<10}{median['import_s']:>11.3f}s{median['first_response_s']:>12.3f}s"
+                  f"{median['time_to_first_response_s']:>9.3f}s  {runs[-1]['response']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+# Suíte de benchmarks de ponta a ponta, sem depender de um Fuseki rodando.
+# Para cada tamanho de modelo: gera um IFC sintético (benchmarks/synthetic.py), mede a conversão,
+# o registro da carga (snapshot, versão e resumo), a carga em massa em um servidor SPARQL local
+# (benchmarks/sparql_standin.py) e a extração das propriedades numéricas; depois sobe a aplicação
+# sobre esses dados e mede as rotas principais (/chat, /graph-data, /full-graph-data,
+# /ontology-summary, /search, /traverse e /filter) com o cliente de testes do Flask.
+# Relata os percentis de latência, a vazão e o pico de memória (RSS) de cada fase; a ingestão e
+# as consultas rodam em processos separados, para que o pico de memória de uma não esconda o da outra.
+# Execução (dentro da pasta 'codigo'): 'python benchmarks/suite.py --sizes 1000 10000 100000 --json resultados.json'.
+import argparse  # Para ler os parâmetros da linha de comando.
+import json  # Para trocar os resultados entre os processos e gravar o relatório.
+import os  # Para montar o ambiente dos subprocessos.
+import random  # Para sortear os objetos consultados.
+import shutil  # Para apagar as pastas de trabalho.
+import subprocess  # Para rodar cada fase em um processo novo.
+import sys  # Para chamar o mesmo interpretador Python.
+import tempfile  # Pasta de trabalho de cada tamanho.
+import time  # Para medir os tempos.
+from concurrent.futures import ThreadPoolExecutor  # Para a medição de vazão com requisições simultâneas.
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CODE_DIR = os.path.dirname(BENCH_DIR)
+
+# Pico de memória do processo, em MB (None onde o módulo 'resource' não existe, ex: Windows).
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {f"p{p}": round(samples[min(len(samples) - 1, int(len(samples) * p / 100))] * 1000, 3) for p in (50, 95, 99)}
+
+# Resultado de uma etapa da ingestão: duração, itens processados e vazão.
+def stage(name, seconds, items=None, unit="triplos"):
+    record = {"fase": "ingestão", "nome": name, "segundos": round(seconds, 3), "rss_mb": peak_rss_mb()}
+    if items is not None:
+        record.update(itens=items, vazao=round(items / max(seconds, 1e-9), 1), unidade=f"{unit}/s")
+    return record
+
+# --- Ingestão (executada no subprocesso) ---
+def run_ingest(elements, workdir, upload, chunk_size, seed):
+    sys.path.insert(0, CODE_DIR); sys.path.insert(0, BENCH_DIR)
+    import synthetic
+    import setup  # Lê BIM_DATA_DIR e os endpoints do servidor local do ambiente.
+    from store import save_snapshot, SNAPSHOT_PATH
+    results = []
+    ifc_path = os.path.join(workdir, 'modelo.ifc')
+    start = time.perf_counter()
+    synthetic.write_model(elements, ifc_path, seed)
+    results.append(stage("síntese do IFC", time.perf_counter() - start, elements, "elementos"))
+
+    start = time.perf_counter()
+    graph = setup.run_ifc_conversion(ifc_path)
+    results.append(stage("conversão IFC -> RDF", time.perf_counter() - start, len(graph)))
+
+    start = time.perf_counter()
+    save_snapshot(graph, SNAPSHOT_PATH)
+    setup.record_full_ingest(graph)
+    results.append(stage("snapshot, versão e resumo", time.perf_counter() - start, len(graph)))
+
+    if upload:
+        start = time.perf_counter()
+        if not setup.bulk_upload_to_fuseki(graph, chunk_size):
+            raise RuntimeError("A carga no servidor SPARQL local falhou.")
+        results.append(stage("carga em massa (SPARQL local)", time.perf_counter() - start, len(graph)))
+
+    start = time.perf_counter()
+    setup.run_property_extraction([ifc_path])
+    results.append(stage("propriedades numéricas", time.perf_counter() - start, elements, "elementos"))
+    return results
+
+# --- Consultas (executadas no subprocesso) ---
+# Mede uma rota com a sequência de parâmetros; para ao esgotar 'budget' segundos (rotas lentas
+# em modelos grandes), e o relatório mostra quantas requisições foram de fato medidas.
+def measure(name, client_call, requests, budget):
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for request in requests:
+        started = time.perf_counter()
+        response = client_call(request)
+        latencies.append(time.perf_counter() - started)
+        errors += response.status_code != 200
+        if started - start > budget:
+            break
+    total = time.perf_counter() - start
+    return {"fase": "consultas", "nome": name, "itens": len(latencies), "erros": errors, "segundos": round(total, 3),
+            "vazao": round(len(latencies) / max(total, 1e-9), 1), "unidade": "req/s", **percentiles(latencies)}
+
+def run_queries(requests, concurrency, seed, budget):
+    sys.path.insert(0, CODE_DIR)
+    start = time.perf_counter()
+    import app  # Monta o backend, o índice do grafo e os índices derivados.
+    index = app.get_graph_index()
+    results = [{"fase": "consultas", "nome": "inicialização do app", "segundos": round(time.perf_counter() - start, 3),
+                "itens": len(index.iris) if index else 0, "unidade": "nós"}]
+    client = app.app.test_client()
+    rng = random.Random(seed)
+    labels = sorted(index.label_ids)
+    objects = [rng.choice(labels) for _ in range(requests)]
+    storeys = sorted(index.labels_of(node)[0] for node in index.nodes_of_type('IfcBuildingStorey')) or labels
+
+    chat = lambda label: client.post('/chat', json={"message": f"qual o material do '{label}'?"})
+    results.append(measure("/chat", chat, objects, budget))
+    results.append(measure("/graph-data", lambda label: client.get('/graph-data', query_string={"object_name": label}), objects, budget))
+    results.append(measure("/search", lambda label: client.get('/search', query_string={"q": label[:5]}), objects, budget))
+    results.append(measure("/traverse", lambda storey: client.get('/traverse', query_string={"start": storey, "path": "isContainedIn^/hasMaterial"}),
+                           [rng.choice(storeys) for _ in range(requests)], budget))
+    results.append(measure("/filter", lambda value: client.get('/filter', query_string={"class": "IfcWall", "where": f"espessura>{value}mm"}),
+                           [rng.choice([100, 150, 200]) for _ in range(requests)], budget))
+    results.append(measure("/ontology-summary", lambda _: client.get('/ontology-summary'), range(min(requests, 20)), budget))
+
+    # Grafo completo: todas as páginas, seguindo o cursor (a latência é a de cada página).
+    latencies, errors, cursor = [], 0, None
+    start = time.perf_counter()
+    while True:
+        started = time.perf_counter()
+        response = client.get('/full-graph-data', query_string={"limit": 500, **({"cursor": cursor} if cursor else {})})
+        latencies.append(time.perf_counter() - started)
+        errors += response.status_code != 200
+        cursor = response.get_json().get("next_cursor") if response.status_code == 200 else None
+        if not cursor:
+            break
+    total = time.perf_counter() - start
+    results.append({"fase": "consultas", "nome": "/full-graph-data (todas as páginas)", "itens": len(latencies), "erros": errors,
+                    "segundos": round(total, 3), "vazao": round(len(latencies) / total, 1), "unidade": "páginas/s", **percentiles(latencies)})
+
+    # Vazão com requisições simultâneas ao /chat (um cliente de testes por thread).
+    if concurrency > 1:
+        def worker(chunk):
+            local = app.app.test_client()
+            return [local.post('/chat', json={"message": f"qual o material do '{label}'?"}).status_code for label in chunk]
+        chunks = [objects[i::concurrency] for i in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            statuses = [status for chunk in pool.map(worker, chunks) for status in chunk]
+        total = time.perf_counter() - start
+        results.append({"fase": "consultas", "nome": f"/chat ({concurrency} simultâneas)", "itens": len(statuses),
+                        "erros": sum(status != 200 for status in statuses), "vazao": round(len(statuses) / total, 1), "unidade": "req/s"})
+    for record in results:
+        record["rss_mb"] = peak_rss_mb()
+    return results
+
+# --- Processo principal ---
+# Roda uma fase em um processo novo; a última linha da saída é o resultado (as anteriores são
+# as mensagens do setup.py e do app.py, mostradas só com '--verbose').
+def run_child(phase, payload, env, verbose):
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", phase, json.dumps(payload)],
+                               env=env, capture_output=True, text=True, cwd=CODE_DIR)
+    if verbose or completed.returncode != 0:
+        print(completed.stdout[-4000:], completed.stderr[-4000:], sep='\n')
+    if completed.returncode != 0:
+        raise RuntimeError(f"A fase '{phase}' falhou (código {completed.returncode}).")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def print_results(elements, results):
+    print(f"\n=== {elements} elementos ===")
+    print(f"{'fase':<42}{'itens':>9}{'tempo':>10}{'p50':>12}{'p95':>12}{'p99':>12}{'vazão':>22}{'RSS':>10}")
+    for r in results:
+        duration = f"{r['segundos']:.2f}s" if 'segundos' in r else ''
+        lat = [(f"{r[p]:.2f}ms" if r[p] < 1000 else f"{r[p] / 1000:.1f}s") if p in r else '' for p in ('p50', 'p95', 'p99')]
+        rate = f"{r['vazao']:.1f} {r['unidade']}" if 'vazao' in r else ''
+        rss = f"{r['rss_mb']:.0f}MB" if r.get('rss_mb') is not None else ''
+        errors = f" ({r['erros']} erros)" if r.get('erros') else ''
+        print(f"{r['nome'] + errors:<42}{r.get('itens', ''):>9}{duration:>10}{lat[0]:>12}{lat[1]:>12}{lat[2]:>12}{rate:>22}{rss:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de ingestão e consultas do Assistente BIM com um servidor SPARQL local.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help="Quantidades de elementos dos modelos sintéticos.")
+    parser.add_argument('--requests', type=int, default=200, help="Requisições por rota.")
+    parser.add_argument('--concurrency', type=int, default=4, help="Threads da medição de vazão do /chat (1 desliga).")
+    parser.add_argument('--backend', choices=['local', 'fuseki'], default='local',
+                        help="Backend do app: 'local' (snapshot em memória) ou 'fuseki' (HTTP até o servidor SPARQL local).")
+    parser.add_argument('--skip-upload', action='store_true', help="Não mede a carga no servidor SPARQL local (economiza memória em modelos grandes).")
+    parser.add_argument('--chunk-size', type=int, default=50000, help="Triplos por bloco na carga em massa.")
+    parser.add_argument('--budget', type=float, default=60.0, help="Segundos máximos de medição por rota.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help="Grava os resultados neste arquivo (para comparar execuções).")
+    parser.add_argument('--keep', action='store_true', help="Não apaga as pastas de trabalho.")
+    parser.add_argument('--verbose', action='store_true', help="Mostra a saída do setup.py e do app.py.")
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        phase, payload = args.child[0], json.loads(args.child[1])
+        results = run_ingest(**payload) if phase == "ingest" else run_queries(**payload)
+        print(json.dumps(results))
+        return
+
+    sys.path.insert(0, BENCH_DIR)
+    from sparql_standin import SparqlStandIn
+    standin = SparqlStandIn().start() if (not args.skip_upload or args.backend == 'fuseki') else None
+    report = {"backend": args.backend, "requests": args.requests, "concurrency": args.concurrency, "sizes": {}}
+    try:
+        for elements in args.sizes:
+            workdir = tempfile.mkdtemp(prefix=f"bim-bench-{elements}-")
+            env = dict(os.environ, BIM_DATA_DIR=workdir, BIM_STORE_BACKEND=args.backend,
+                       BIM_CACHE_MAX_BYTES="0",  # Sem o cache de respostas: mede o custo real de cada rota.
+                       BIM_INDEX_REFRESH_INTERVAL="3600", PYTHONIOENCODING="utf-8")
+            if standin is not None:
+                env.update(FUSEKI_ENDPOINT=standin.url + '/query', FUSEKI_GSP_ENDPOINT=standin.url + '/data',
+                           FUSEKI_UPDATE_ENDPOINT=standin.url + '/update')
+            try:
+                results = run_child("ingest", {"elements": elements, "workdir": workdir, "upload": standin is not None and not args.skip_upload,
+                                               "chunk_size": args.chunk_size, "seed": args.seed}, env, args.verbose)
+                results += run_child("queries", {"requests": args.requests, "concurrency": args.concurrency, "seed": args.seed, "budget": args.budget},
+                                     env, args.verbose)
+            finally:
+                if not args.keep:
+                    shutil.rmtree(workdir, ignore_errors=True)
+            print_results(elements, results)
+            report["sizes"][str(elements)] = results
+    finally:
+        if standin is not None:
+            standin.stop()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados gravados em '{args.json}'.")
+
+if __name__ == '__main__':
+    main()
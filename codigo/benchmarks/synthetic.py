@@ -0,0 +1,105 @@
+# Gerador de modelos IFC sintéticos para os benchmarks.
+# Monta um projeto (sítio, edifício e pavimentos) com a quantidade pedida de elementos (paredes,
+# lajes, portas, janelas, pilares e vigas), cada um com tipo, material (as paredes com conjuntos
+# de camadas), contenção no pavimento e quantidades (IfcElementQuantity). As relações são
+# agrupadas como nos modelos exportados pelo Revit: uma relação por pavimento, tipo e material.
+# Execução (dentro da pasta 'codigo'): 'python benchmarks/synthetic.py --elements 100000 --output modelo.ifc'.
+import argparse  # Para ler os parâmetros da linha de comando.
+import random  # Para variar nomes, materiais e dimensões.
+import time  # Para medir o tempo de geração.
+import ifcopenshell  # Para criar e gravar o arquivo IFC.
+import ifcopenshell.guid  # Para os GlobalIds.
+
+# Classe IFC, família (início do nome no estilo do Revit), classe do tipo e conjunto de quantidades.
+KINDS = [
+    ('IfcWall', 'Basic Wall', 'IfcWallType', 'Qto_WallBaseQuantities'),
+    ('IfcSlab', 'Floor', 'IfcSlabType', 'Qto_SlabBaseQuantities'),
+    ('IfcDoor', 'Door', 'IfcDoorType', 'Qto_DoorBaseQuantities'),
+    ('IfcWindow', 'Window', 'IfcWindowType', 'Qto_WindowBaseQuantities'),
+    ('IfcColumn', 'Column', 'IfcColumnType', 'Qto_ColumnBaseQuantities'),
+    ('IfcBeam', 'Beam', 'IfcBeamType', 'Qto_BeamBaseQuantities'),
+]
+VARIANTS = ['Interior', 'Exterior', 'Generic', 'Structural', 'Fire Rated']
+MATERIALS = ['Concrete', 'Brick', 'Gypsum Board', 'Steel', 'Timber', 'Glass', 'Insulation', 'Plaster', 'Stone', 'Aluminium']
+ELEMENTS_PER_STOREY = 500
+TYPES_PER_KIND = 5
+
+def build_model(elements, seed=0, quantities=True):
+    """Devolve um ifcopenshell.file (IFC4, comprimentos em mm) com 'elements' elementos construtivos."""
+    rng = random.Random(seed)
+    f = ifcopenshell.file(schema='IFC4')
+    guid = ifcopenshell.guid.new
+
+    units = f.create_entity('IfcUnitAssignment', Units=[
+        f.create_entity('IfcSIUnit', UnitType='LENGTHUNIT', Prefix='MILLI', Name='METRE'),
+        f.create_entity('IfcSIUnit', UnitType='AREAUNIT', Name='SQUARE_METRE'),
+        f.create_entity('IfcSIUnit', UnitType='VOLUMEUNIT', Name='CUBIC_METRE'),
+    ])
+    project = f.create_entity('IfcProject', GlobalId=guid(), Name='Projeto Sintético', UnitsInContext=units)
+    site = f.create_entity('IfcSite', GlobalId=guid(), Name='Terreno')
+    building = f.create_entity('IfcBuilding', GlobalId=guid(), Name='Edifício')
+    storeys = [f.create_entity('IfcBuildingStorey', GlobalId=guid(), Name=f"Pavimento {i:03d}", Elevation=3000.0 * i)
+               for i in range(max(1, -(-elements // ELEMENTS_PER_STOREY)))]
+    for parent, parts in ((project, [site]), (site, [building]), (building, storeys)):
+        f.create_entity('IfcRelAggregates', GlobalId=guid(), RelatingObject=parent, RelatedObjects=parts)
+
+    materials = [f.create_entity('IfcMaterial', Name=name) for name in MATERIALS]
+    # Conjuntos de camadas para as paredes (acabamento + núcleo + acabamento).
+    layer_sets = []
+    for core in (90.0, 140.0, 190.0):
+        layers = [f.create_entity('IfcMaterialLayer', Material=materials[7], LayerThickness=5.0),
+                  f.create_entity('IfcMaterialLayer', Material=materials[rng.randrange(2)], LayerThickness=core),
+                  f.create_entity('IfcMaterialLayer', Material=materials[7], LayerThickness=5.0)]
+        layer_set = f.create_entity('IfcMaterialLayerSet', MaterialLayers=layers, LayerSetName=f"Parede {core + 10:.0f}mm")
+        layer_sets.append(f.create_entity('IfcMaterialLayerSetUsage', ForLayerSet=layer_set, LayerSetDirection='AXIS2',
+                                          DirectionSense='POSITIVE', OffsetFromReferenceLine=0.0))
+
+    types = {kind: [f.create_entity(kind[2], GlobalId=guid(), Name=f"{kind[1]}:{variant}", PredefinedType='NOTDEFINED')
+                    for variant in VARIANTS[:TYPES_PER_KIND]] for kind in KINDS}
+    contained = {storey: [] for storey in storeys}
+    typed = {t: [] for kind_types in types.values() for t in kind_types}
+    by_material = {m: [] for m in materials + layer_sets}
+
+    for i in range(elements):
+        kind = KINDS[i % len(KINDS)]
+        element_type = rng.choice(types[kind])
+        element = f.create_entity(kind[0], GlobalId=guid(), Name=f"{element_type.Name} {i}")
+        contained[storeys[i // ELEMENTS_PER_STOREY]].append(element)
+        typed[element_type].append(element)
+        by_material[rng.choice(layer_sets) if kind[0] == 'IfcWall' else rng.choice(materials)].append(element)
+        if quantities:
+            length = rng.uniform(500.0, 8000.0)
+            values = [f.create_entity('IfcQuantityLength', Name='Length', LengthValue=length),
+                      f.create_entity('IfcQuantityLength', Name='Width', LengthValue=rng.choice([100.0, 150.0, 200.0, 250.0])),
+                      f.create_entity('IfcQuantityVolume', Name='NetVolume', VolumeValue=rng.uniform(0.1, 5.0))]
+            quantity = f.create_entity('IfcElementQuantity', GlobalId=guid(), Name=kind[3], Quantities=values)
+            f.create_entity('IfcRelDefinesByProperties', GlobalId=guid(), RelatedObjects=[element], RelatingPropertyDefinition=quantity)
+
+    for storey, members in contained.items():
+        if members:
+            f.create_entity('IfcRelContainedInSpatialStructure', GlobalId=guid(), RelatingStructure=storey, RelatedElements=members)
+    for element_type, members in typed.items():
+        if members:
+            f.create_entity('IfcRelDefinesByType', GlobalId=guid(), RelatingType=element_type, RelatedObjects=members)
+    for material, members in by_material.items():
+        if members:
+            f.create_entity('IfcRelAssociatesMaterial', GlobalId=guid(), RelatingMaterial=material, RelatedObjects=members)
+    return f
+
+def write_model(elements, path, seed=0, quantities=True):
+    build_model(elements, seed, quantities).write(path)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um modelo IFC sintético para os benchmarks.")
+    parser.add_argument('--elements', type=int, default=10000, help="Quantidade de elementos construtivos.")
+    parser.add_argument('--output', default='modelo_sintetico.ifc', help="Arquivo IFC gerado.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-quantities', action='store_true', help="Não gera as quantidades (IfcElementQuantity).")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    write_model(args.elements, args.output, args.seed, not args.no_quantities)
+    print(f"Modelo com {args.elements} elementos gravado em '{args.output}' ({time.perf_counter() - start:.1f}s).")
+
+if __name__ == '__main__':
+    main()
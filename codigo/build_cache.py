@@ -0,0 +1,121 @@
+# Cache de construção do setup.py: cada etapa (conversão, carga, propriedades, treinamento do NLU)
+# tem uma chave calculada a partir das suas entradas (hash dos arquivos IFC, versão do conversor,
+# dados de treino...). Se a chave é a mesma da última execução bem-sucedida e os artefatos ainda
+# existem, a etapa é pulada. Os grafos convertidos ficam guardados como snapshots binários
+# nomeados pelo hash, e carregá-los é bem mais rápido do que reler o IFC.
+import os  # Para ler as variáveis de ambiente e montar os caminhos.
+import json  # Para gravar/ler o manifesto do cache.
+import time  # Para medir cada etapa.
+import hashlib  # Para calcular as chaves das etapas.
+import contextlib  # Para medir as etapas com 'with'.
+from store import save_snapshot, load_snapshot  # Mesmo formato binário do snapshot da aplicação.
+
+# --- Configurações ---
+DATA_DIR = os.environ.get("BIM_DATA_DIR", "./data")
+# Pasta do cache (manifesto e grafos convertidos).
+BUILD_CACHE_DIR = os.environ.get("BIM_BUILD_CACHE_DIR", os.path.join(DATA_DIR, "cache"))
+# Quantos grafos convertidos são mantidos (os menos usados recentemente são apagados).
+BUILD_CACHE_KEEP = int(os.environ.get("BIM_BUILD_CACHE_KEEP", "3"))
+MANIFEST_FILE = 'manifesto.json'
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Chave (SHA-256) de um conjunto de valores serializáveis em JSON.
+def digest(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            h.update(block)
+    return h.hexdigest()
+
+class BuildCache:
+    """Manifesto das etapas já executadas e grafos convertidos, com os tempos da execução atual."""
+
+    def __init__(self, path=BUILD_CACHE_DIR, force=False):
+        self.path = path
+        self.force = force  # Com '--force', todas as etapas são executadas (e o cache é regravado).
+        self.manifest_path = os.path.join(path, MANIFEST_FILE)
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (IOError, ValueError):
+            self.manifest = {}
+        self.manifest.setdefault("files", {}); self.manifest.setdefault("stages", {})
+        self.timings = []  # (etapa, segundos, reaproveitada)
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
+
+    # Hash do conteúdo de um arquivo. Arquivos com o mesmo tamanho e data de modificação da
+    # última execução não são relidos (um IFC de vários GB levaria segundos só para o hash).
+    def file_hash(self, path):
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        known = self.manifest["files"].get(key)
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["sha256"]
+        sha = file_sha256(path)
+        self.manifest["files"][key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha}
+        return sha
+
+    # --- Etapas ---
+    # A etapa pode ser pulada: mesma chave da última execução bem-sucedida e artefatos presentes.
+    def is_fresh(self, stage, key, *artifacts):
+        if self.force:
+            return False
+        entry = self.manifest["stages"].get(stage)
+        return entry is not None and entry.get("key") == key and all(os.path.exists(a) for a in artifacts)
+
+    def info(self, stage):
+        return self.manifest["stages"].get(stage, {})
+
+    # Registra a execução bem-sucedida de uma etapa com a sua chave (e informações extras).
+    def mark(self, stage, key, **info):
+        self.manifest["stages"][stage] = dict(info, key=key, timestamp=time.time())
+        self.save()
+
+    @contextlib.contextmanager
+    def timed(self, name):
+        record = {"reused": False}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.timings.append((name, time.perf_counter() - start, record["reused"]))
+
+    def report(self):
+        if not self.timings:
+            return
+        print("\nTempo por etapa:")
+        for name, seconds, reused in self.timings:
+            print(f"   {name:<28}{seconds:>9.2f}s  {'(reaproveitada do cache)' if reused else ''}")
+        print(f"   {'total':<28}{sum(t[1] for t in self.timings):>9.2f}s")
+
+    # --- Grafos Convertidos ---
+    def graph_path(self, key):
+        return os.path.join(self.path, f"grafo-{key[:32]}.pickle")
+
+    def load_graph(self, key):
+        path = self.graph_path(key)
+        if self.force or not os.path.exists(path):
+            return None
+        try:
+            graph = load_snapshot(path)
+        except Exception as e:
+            print(f"-> ALERTA: Não foi possível ler o grafo do cache '{path}'. Erro: {e}")
+            return None
+        os.utime(path)  # Marca como usado recentemente.
+        return graph
+
+    def store_graph(self, key, graph):
+        save_snapshot(graph, self.graph_path(key))
+        # Mantém só os grafos usados mais recentemente.
+        graphs = sorted((os.path.join(self.path, name) for name in os.listdir(self.path)
+                         if name.startswith('grafo-') and name.endswith('.pickle')), key=os.path.getmtime, reverse=True)
+        for old in graphs[BUILD_CACHE_KEEP:]:
+            os.remove(old)
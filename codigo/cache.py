@@ -0,0 +1,85 @@
+# Cache de respostas da aplicação (LRU com tempo de vida e limite de memória).
+# As chaves incluem a versão do conjunto de dados, então uma nova carga do setup.py nunca
+# devolve respostas antigas; além disso, o cache é esvaziado assim que a nova versão é detectada.
+import sys  # Para estimar o tamanho dos valores que não são bytes/str.
+import time  # Para controlar o tempo de vida (TTL) das entradas.
+import threading  # O Flask atende requisições em várias threads.
+from collections import OrderedDict  # Mantém a ordem de uso das entradas (LRU).
+
+class ResponseCache:
+    """
+    Cache LRU limitado pelo total de bytes armazenados, com tempo de vida por entrada e
+    contadores de acertos/falhas para monitoramento.
+    """
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes  # Limite de memória ocupada pelos valores.
+        self.ttl = ttl  # Tempo de vida de cada entrada, em segundos.
+        self.entries = OrderedDict()  # chave -> (expira_em, tamanho, valor), da menos para a mais usada.
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        self.lock = threading.Lock()
+
+    # Estimativa do tamanho de um valor em bytes.
+    @staticmethod
+    def size_of(value):
+        if isinstance(value, (bytes, str)):
+            return len(value)
+        if isinstance(value, (list, tuple)):
+            return sum(ResponseCache.size_of(item) for item in value) + sys.getsizeof(value)
+        return sys.getsizeof(value)
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return default
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                self.stats["expirations"] += 1; self.stats["misses"] += 1
+                return default
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[2]
+
+    def put(self, key, value, size=None):
+        size = self.size_of(value) if size is None else size
+        if size > self.max_bytes:
+            return  # Valores maiores que o próprio cache não são guardados.
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.monotonic() + self.ttl, size, value)
+            self.bytes += size
+            # Descarta as entradas menos usadas até voltar ao limite de memória.
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.stats["evictions"] += 1
+
+    # Devolve o valor em cache ou o calcula (e guarda). Exceções não são guardadas.
+    def get_or_compute(self, key, compute):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    # Esvazia o cache (ex: quando uma nova versão dos dados é carregada).
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+            self.stats["invalidations"] += 1
+
+    def _remove(self, key):
+        _, size, _ = self.entries.pop(key)
+        self.bytes -= size
+
+    # Contadores e ocupação atual, expostos pelo endpoint de monitoramento.
+    def snapshot(self):
+        with self.lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, entries=len(self.entries), bytes=self.bytes, max_bytes=self.max_bytes,
+                        ttl=self.ttl, hit_ratio=self.stats["hits"] / lookups if lookups else 0.0)
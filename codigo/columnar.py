@@ -0,0 +1,173 @@
+# Armazenamento colunar das propriedades numéricas dos elementos (psets, quantidades, espessura
+# das camadas de material e caixas envolventes), fora do grafo RDF.
+# Cada propriedade é uma coluna float64 gravada em um arquivo .npy, com NaN onde o elemento não a
+# tem; as linhas são os elementos (GlobalId e classe IFC). A aplicação abre as colunas com
+# 'mmap', e os filtros (ex: "paredes com espessura > 200 mm") são comparações vetorizadas do NumPy.
+# Todos os valores ficam em unidades do SI (m, m², m³), qualquer que seja a unidade do arquivo IFC.
+import os  # Para ler as variáveis de ambiente e montar os caminhos.
+import json  # Para gravar/ler o manifesto das colunas.
+import shutil  # Para apagar as gerações antigas das colunas.
+import threading  # Para que duas requisições não reabram as colunas ao mesmo tempo.
+import time  # Para nomear cada geração das colunas.
+import operator  # Operadores de comparação dos filtros.
+import numpy as np  # Colunas e comparações vetorizadas.
+
+# --- Configurações ---
+DATA_DIR = os.environ.get("BIM_DATA_DIR", "./data")
+# Pasta das colunas gravadas pelo setup.py e lidas pela aplicação.
+COLUMNS_DIR = os.environ.get("BIM_COLUMNS_DIR", os.path.join(DATA_DIR, "colunas"))
+MANIFEST_FILE = 'manifesto.json'
+# Casas decimais guardadas: elimina o ruído de ponto flutuante dos arquivos IFC (ex: uma parede
+# de 0.2000000000007 m não deve atender a "espessura > 200 mm").
+VALUE_DECIMALS = 9
+
+# Operadores aceitos nos filtros.
+COMPARISONS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le, '=': operator.eq, '!=': operator.ne}
+
+# Geração apontada pelo manifesto atual (ou None se ainda não houver colunas).
+def current_generation(path=COLUMNS_DIR):
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), encoding='utf-8') as f:
+            return json.load(f).get("generation")
+    except (IOError, ValueError):
+        return None
+
+# Apaga as gerações fora de 'keep'. Uma geração que não pôde ser apagada (ex: ainda aberta com
+# 'mmap' por uma aplicação no Windows) é avisada e tentada de novo na próxima gravação.
+def remove_generations(path, keep):
+    for name in os.listdir(path):
+        folder = os.path.join(path, name)
+        if name in keep or not name.startswith('g') or not os.path.isdir(folder):
+            continue
+        try:
+            shutil.rmtree(folder)
+        except OSError as e:
+            print(f"-> ALERTA: Não foi possível apagar a geração antiga das colunas '{folder}'. Erro: {e}")
+
+def write_columns(rows, path=COLUMNS_DIR, supertypes=None):
+    """
+    Grava as colunas a partir das linhas (GlobalId, classe, {coluna: valor}). Cada gravação vai
+    para uma subpasta nova e só então o manifesto passa a apontar para ela, para que a
+    aplicação nunca leia uma mistura de colunas antigas e novas. 'supertypes' (classe -> classes
+    ancestrais no esquema IFC) permite filtrar por uma classe incluindo as subclasses.
+    Devolve o manifesto.
+    """
+    ids, classes, values = [], [], {}
+    for i, (global_id, class_name, properties) in enumerate(rows):
+        ids.append(global_id); classes.append(class_name)
+        for name, value in properties.items():
+            values.setdefault(name, ([], []))
+            values[name][0].append(i); values[name][1].append(value)
+    generation = f"g{time.time_ns()}"
+    folder = os.path.join(path, generation)
+    os.makedirs(folder, exist_ok=True)
+    class_names = sorted(set(classes))
+    codes = {name: code for code, name in enumerate(class_names)}
+    np.save(os.path.join(folder, 'ids.npy'), np.array(ids, dtype=str))
+    np.save(os.path.join(folder, 'classes.npy'), np.array([codes[c] for c in classes], dtype=np.int32))
+    files = {}
+    for k, name in enumerate(sorted(values)):
+        column = np.full(len(ids), np.nan)
+        column[values[name][0]] = np.round(values[name][1], VALUE_DECIMALS)
+        files[name] = f"c{k}.npy"
+        np.save(os.path.join(folder, files[name]), column)
+    manifest = {"generation": generation, "rows": len(ids), "classes": class_names, "columns": files,
+                "supertypes": {name: list((supertypes or {}).get(name, ())) for name in class_names}}
+    previous = current_generation(path)
+    with open(os.path.join(path, MANIFEST_FILE + '.tmp'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(os.path.join(path, MANIFEST_FILE + '.tmp'), os.path.join(path, MANIFEST_FILE))
+    # A geração anterior fica até a próxima gravação: a aplicação pode continuar com ela aberta
+    # até perceber o manifesto novo. As mais antigas já foram trocadas e são apagadas.
+    remove_generations(path, {generation, previous})
+    return manifest
+
+class ColumnarStore:
+    """Colunas de uma geração, abertas com 'mmap' (só as páginas usadas pelos filtros são lidas)."""
+
+    def __init__(self, path=COLUMNS_DIR):
+        with open(os.path.join(path, MANIFEST_FILE), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.folder = os.path.join(path, self.manifest["generation"])
+        self.ids = np.load(os.path.join(self.folder, 'ids.npy'), mmap_mode='r')
+        self.classes = np.load(os.path.join(self.folder, 'classes.npy'), mmap_mode='r')
+        self.class_names = self.manifest["classes"]
+        self.supertypes = self.manifest.get("supertypes", {})  # Ausente em colunas antigas: só a classe exata.
+        self.loaded = {}
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    def columns(self):
+        return sorted(self.manifest["columns"])
+
+    def column(self, name):
+        if name not in self.loaded:
+            self.loaded[name] = np.load(os.path.join(self.folder, self.manifest["columns"][name]), mmap_mode='r')
+        return self.loaded[name]
+
+    # Colunas correspondentes a um nome: o nome exato da coluna, a lista de 'aliases' informada
+    # ou todas as colunas com esse nome de propriedade (ex: 'Width' -> 'Qto_WallBaseQuantities.Width').
+    def resolve(self, name, aliases=()):
+        if name in self.manifest["columns"]:
+            return [name]
+        found = [column for column in aliases if column in self.manifest["columns"]]
+        if not found:
+            found = [column for column in self.columns() if column.rsplit('.', 1)[-1].lower() == name.lower()]
+        return found
+
+    # Primeiro valor definido (não NaN) entre as colunas, linha a linha.
+    def coalesce(self, names):
+        values = np.array(self.column(names[0]))
+        for name in names[1:]:
+            values = np.where(np.isnan(values), self.column(name), values)
+        return values
+
+    def filter(self, conditions, classes=()):
+        """
+        Linhas que atendem a todas as condições [(colunas, operador, valor)] e pertencem a uma das
+        classes (se informadas), ou a uma subclasse delas (ex: 'IfcWall' inclui 'IfcWallStandardCase').
+        Elementos sem o valor (NaN) nunca atendem a uma condição.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if classes:
+            codes = [code for code, name in enumerate(self.class_names)
+                     if name in classes or not set(classes).isdisjoint(self.supertypes.get(name, ()))]
+            mask &= np.isin(self.classes, codes)
+        for columns, op, value in conditions:
+            values = self.coalesce(columns)
+            mask &= COMPARISONS[op](values, value) & ~np.isnan(values)
+        return np.flatnonzero(mask)
+
+    def row(self, i, columns):
+        values = {}
+        for name in columns:
+            value = float(self.column(name)[i])
+            if not np.isnan(value):
+                values[name] = value
+        return {"global_id": str(self.ids[i]), "class": self.class_names[self.classes[i]], "values": values}
+
+class ColumnarCache:
+    """Mantém as colunas abertas, reabrindo-as quando o setup.py grava uma nova geração."""
+
+    def __init__(self, path=COLUMNS_DIR):
+        self.path = path
+        self.store = None
+        self.mtime = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        try:
+            mtime = os.path.getmtime(os.path.join(self.path, MANIFEST_FILE))
+        except OSError:
+            return None
+        if mtime != self.mtime:
+            with self.lock:
+                if mtime != self.mtime:
+                    try:
+                        self.store = ColumnarStore(self.path)
+                    except (IOError, ValueError, KeyError) as e:
+                        print(f"-> ALERTA: Não foi possível abrir as colunas de propriedades. Erro: {e}")
+                        self.store = None
+                    self.mtime = mtime
+        return self.store
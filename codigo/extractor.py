@@ -0,0 +1,141 @@
+# Extração do objeto BIM e da relação (propriedade) de uma mensagem do usuário.
+# Todas as expressões regulares são compiladas uma única vez. Os nomes de objetos sem aspas
+# (ex: Basic Wall:Interior) são encontrados com um autômato de Aho-Corasick montado sobre
+# os labels conhecidos do grafo, que percorre a mensagem uma única vez, qualquer que seja a
+# quantidade de labels. A relação também é resolvida em uma única busca.
+import re  # Para os padrões de extração.
+import threading  # Para que duas requisições não remontem o autômato ao mesmo tempo.
+from collections import deque  # Fila da montagem dos links de falha do autômato.
+
+# Padrões de extração (compilados uma vez, na importação).
+# "do 'objeto'" ou "para o objeto 'objeto'": a busca prioritária, por ser mais explícita.
+EXPLICIT_OBJECT_RE = re.compile(r"(?:para o objeto|do|da|de|para)\s+('([^']*)'|\"([^\"]*)\")", re.IGNORECASE)
+# Primeira ocorrência entre aspas.
+QUOTED_OBJECT_RE = re.compile(r"'([^']*)'|\"([^\"]*)\"")
+# Pergunta gerada pelo "Construtor de Consultas".
+BUILDER_RELATION_RE = re.compile(r"relação '([^']*)'", re.IGNORECASE)
+
+# Ordem de prioridade das relações, para evitar ambiguidades (ex: 'tipo' vs 'classe').
+RELATIONS_IN_ORDER = ['isOfType', 'type', 'isContainedIn', 'hasMaterial', 'aggregates']
+# Labels mais curtos que isso não são procurados sem aspas (evita falsos positivos como 'a' ou '1').
+LABEL_MIN_LENGTH = 3
+
+class LabelAutomaton:
+    """
+    Autômato de Aho-Corasick sobre os labels (sem diferenciar maiúsculas de minúsculas).
+    'longest_match' devolve o maior label que aparece na mensagem como palavra inteira.
+    """
+
+    def __init__(self, labels):
+        self.goto = [{}]  # estado -> {caractere: próximo estado}
+        self.fail = [0]  # estado -> estado do maior sufixo próprio que também é prefixo de algum label
+        self.output = [None]  # estado -> label que termina exatamente neste estado
+        self.dict_link = [0]  # estado -> próximo estado (pelos links de falha) que termina um label
+        for label in labels:
+            if len(label) >= LABEL_MIN_LENGTH:
+                self._add(label)
+        self._build_links()
+
+    def _add(self, label):
+        state = 0
+        for char in label.lower():
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][char] = nxt
+                self.goto.append({}); self.fail.append(0); self.output.append(None); self.dict_link.append(0)
+            state = nxt
+        # Labels que só diferem em maiúsculas/minúsculas: mantém o primeiro em ordem alfabética.
+        if self.output[state] is None or label < self.output[state]:
+            self.output[state] = label
+
+    def _build_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and char not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(char, 0)
+                link = self.fail[nxt]
+                self.dict_link[nxt] = link if self.output[link] is not None else self.dict_link[link]
+
+    def __len__(self):
+        return sum(1 for label in self.output if label is not None)
+
+    def longest_match(self, text):
+        lowered = text.lower()
+        best, best_start = None, None
+        state = 0
+        for end, char in enumerate(lowered, 1):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            # Percorre todos os labels que terminam nesta posição (o próprio estado e os links de saída).
+            match = state if self.output[state] is not None else self.dict_link[state]
+            while match:
+                label = self.output[match]
+                start = end - len(label)
+                # Só aceita palavras inteiras (não encontra 'wall' dentro de 'walls').
+                if (start == 0 or not lowered[start - 1].isalnum()) and (end == len(lowered) or not lowered[end].isalnum()):
+                    if best is None or len(label) > len(best) or (len(label) == len(best) and start < best_start):
+                        best, best_start = label, start
+                match = self.dict_link[match]
+        return best
+
+class Extractor:
+    """
+    Extrator de objeto e relação. 'keyword_map' é o RELATIONSHIP_KEYWORD_MAP do app.py; os
+    labels conhecidos vêm do índice do grafo e o autômato é remontado quando a versão muda.
+    """
+
+    def __init__(self, keyword_map, relations_in_order=RELATIONS_IN_ORDER):
+        # palavra-chave -> (prioridade, relação); a busca encontra todas as palavras de uma vez.
+        self.keyword_relations = {}
+        for priority, relation in enumerate(relations_in_order):
+            for keyword in keyword_map.get(relation, []):
+                self.keyword_relations.setdefault(keyword.lower(), (priority, relation))
+        alternatives = sorted(self.keyword_relations, key=len, reverse=True)
+        self.keyword_re = re.compile(r"(?<!\w)(" + "|".join(re.escape(k) for k in alternatives) + r")(?!\w)", re.IGNORECASE)
+        self.automaton = None
+        self.automaton_key = None  # (id do índice, versão) usado na última montagem.
+        self.lock = threading.Lock()
+
+    # Remonta o autômato se o índice (ou a versão dele) mudou.
+    def sync(self, index):
+        if index is None:
+            return
+        key = (id(index), index.version)
+        if key != self.automaton_key:
+            with self.lock:
+                if key != self.automaton_key:
+                    with index.lock:
+                        labels = list(index.label_ids)
+                    self.automaton = LabelAutomaton(labels)
+                    self.automaton_key = key
+
+    # Objeto entre aspas (prioritário) ou, sem aspas, o maior label conhecido presente na mensagem.
+    def extract_object(self, text):
+        explicit_match = EXPLICIT_OBJECT_RE.search(text)
+        if explicit_match:
+            return explicit_match.group(2) or explicit_match.group(3)
+        quoted_match = QUOTED_OBJECT_RE.search(text)
+        if quoted_match:
+            return quoted_match.group(1) or quoted_match.group(2)
+        if self.automaton is not None:
+            return self.automaton.longest_match(text)
+        return None  # Retorna None se nenhum objeto for encontrado.
+
+    def extract_property(self, text):
+        match = BUILDER_RELATION_RE.search(text)
+        if match:
+            return match.group(1)
+        # A relação de maior prioridade entre todas as palavras-chave encontradas.
+        found = [self.keyword_relations[m.lower()] for m in self.keyword_re.findall(text)]
+        # Se nenhuma palavra-chave for encontrada, assume que a intenção é pedir o nome do objeto.
+        return min(found)[1] if found else "label"
+
+    def extract(self, text):
+        return self.extract_object(text), self.extract_property(text)
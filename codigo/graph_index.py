@@ -0,0 +1,200 @@
+# Índice em memória do grafo de conhecimento.
+# Mantém um mapa de label -> IRIs e listas de adjacência (de saída e de entrada) para cada
+# predicado consultado pelo chatbot, de modo que uma pergunta sobre um objeto é respondida
+# com consultas a dicionários, sem nenhuma consulta SPARQL.
+import threading  # Para proteger o índice enquanto ele é atualizado.
+import bisect  # Para localizar a posição do cursor na lista ordenada de arestas.
+from rdflib import Graph, URIRef, Literal  # Para interpretar os triplos recebidos em N-Triples.
+from rdflib.namespace import RDF, RDFS  # Vocabulários RDF e RDFS padrão (para 'type', 'label', etc.)
+from store import read_dataset_version  # Para saber quando o conjunto de dados mudou.
+
+# URI base usada no nosso grafo RDF. Deve ser a mesma usada no setup.py.
+BASE_URI = "http://exemplo.org/bim#"
+
+# Predicados indexados, pelo mesmo nome usado em RELATIONSHIP_KEYWORD_MAP no app.py.
+INDEXED_PREDICATES = {
+    'isContainedIn': URIRef(BASE_URI + 'isContainedIn'),
+    'hasMaterial': URIRef(BASE_URI + 'hasMaterial'),
+    'aggregates': URIRef(BASE_URI + 'aggregates'),
+    'isOfType': URIRef(BASE_URI + 'isOfType'),
+    'type': RDF.type,
+}
+PREDICATE_NAMES = {uri: name for name, uri in INDEXED_PREDICATES.items()}
+# Ordem fixa dos predicados, usada nos identificadores inteiros do formato compacto e nos cursores.
+PREDICATE_ORDER = list(INDEXED_PREDICATES)
+
+# Consulta usada para montar o índice a partir de um backend qualquer.
+INDEX_QUERY = f"""
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    PREFIX inst: <{BASE_URI}>
+    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+    SELECT ?s ?p ?o WHERE {{
+        VALUES ?p {{ rdfs:label rdf:type inst:isContainedIn inst:hasMaterial inst:aggregates inst:isOfType }}
+        ?s ?p ?o .
+    }}
+"""
+
+class GraphIndex:
+    """
+    Índice de labels e adjacências. Cada IRI recebe um identificador inteiro, e as adjacências
+    guardam apenas esses inteiros: forward[predicado][sujeito] -> objetos e
+    reverse[predicado][objeto] -> sujeitos.
+    """
+
+    def __init__(self, version=0):
+        self.version = version  # Versão do conjunto de dados refletida pelo índice.
+        self.iris = []  # id -> IRI
+        self.ids = {}  # IRI -> id
+        self.labels = {}  # id -> lista de labels
+        self.label_ids = {}  # label -> conjunto de ids
+        self.forward = {name: {} for name in INDEXED_PREDICATES}
+        self.reverse = {name: {} for name in INDEXED_PREDICATES}
+        self.edge_list = None  # Lista ordenada de arestas (predicado, sujeito, objeto), montada sob demanda.
+        self.lock = threading.RLock()
+
+    # Devolve o identificador inteiro de uma IRI, criando-o se necessário.
+    def node_id(self, iri):
+        node = self.ids.get(iri)
+        if node is None:
+            node = self.ids[iri] = len(self.iris)
+            self.iris.append(iri)
+        return node
+
+    def add_triple(self, s, p, o):
+        self.edge_list = None
+        if p == RDFS.label and isinstance(o, Literal):
+            node, label = self.node_id(str(s)), str(o)
+            if label not in self.labels.setdefault(node, []):
+                self.labels[node].append(label)
+                self.label_ids.setdefault(label, set()).add(node)
+        elif p in PREDICATE_NAMES and isinstance(o, URIRef):
+            name, s_id, o_id = PREDICATE_NAMES[p], self.node_id(str(s)), self.node_id(str(o))
+            self.forward[name].setdefault(s_id, set()).add(o_id)
+            self.reverse[name].setdefault(o_id, set()).add(s_id)
+
+    def remove_triple(self, s, p, o):
+        self.edge_list = None
+        s_id = self.ids.get(str(s))
+        if s_id is None:
+            return
+        if p == RDFS.label and isinstance(o, Literal):
+            label = str(o)
+            if label in self.labels.get(s_id, []):
+                self.labels[s_id].remove(label)
+                self.label_ids[label].discard(s_id)
+                if not self.label_ids[label]: del self.label_ids[label]
+        elif p in PREDICATE_NAMES and isinstance(o, URIRef):
+            name, o_id = PREDICATE_NAMES[p], self.ids.get(str(o))
+            self.forward[name].get(s_id, set()).discard(o_id)
+            self.reverse[name].get(o_id, set()).discard(s_id)
+
+    @classmethod
+    def build(cls, store, version=0):
+        """Monta o índice completo a partir do backend (grafo local ou consulta SPARQL)."""
+        index = cls(version)
+        graph = getattr(store, 'graph', None)
+        if graph is not None:
+            for p in [RDFS.label] + list(INDEXED_PREDICATES.values()):
+                for s, o in graph.subject_objects(p):
+                    index.add_triple(s, p, o)
+        else:
+            for res in store.select(INDEX_QUERY):
+                o = res['o']
+                o_term = URIRef(o['value']) if o['type'] == 'uri' else Literal(o['value'])
+                index.add_triple(URIRef(res['s']['value']), URIRef(res['p']['value']), o_term)
+        return index
+
+    def apply_delta(self, added, removed, version):
+        """Atualiza o índice com os triplos (linhas N-Triples) adicionados e removidos por uma carga incremental."""
+        with self.lock:
+            for lines, action in ((removed, self.remove_triple), (added, self.add_triple)):
+                if lines:
+                    for s, p, o in Graph().parse(data="\n".join(lines), format='nt'):
+                        action(s, p, o)
+            self.version = version
+
+    # Todos os labels de um nó (ou o nome local da IRI, se ele não tiver label).
+    def labels_of(self, node):
+        return self.labels.get(node) or [self.iris[node].split('#')[-1]]
+
+    def lookup(self, object_name, predicate_label):
+        """
+        Responde às duas direções de uma vez: devolve (labels dos valores de saída,
+        labels dos sujeitos de entrada) do predicado para os nós com o label informado.
+        """
+        with self.lock:
+            # Dicionários são usados como conjuntos ordenados (sem repetir labels, como o DISTINCT do SPARQL).
+            outgoing, incoming = {}, {}
+            for node in self.label_ids.get(object_name, ()):
+                for value in self.forward[predicate_label].get(node, ()):
+                    outgoing.update(dict.fromkeys(self.labels.get(value, [])))
+                for subject in self.reverse[predicate_label].get(node, ()):
+                    incoming.update(dict.fromkeys(self.labels.get(subject, [])))
+            return list(outgoing), list(incoming)
+
+    # Arestas (predicado, sujeito, objeto) de saída e de entrada dos nós com o label informado,
+    # apenas entre nós com label (as mesmas da consulta do '/graph-data'), e o conjunto desses nós.
+    def neighbourhood(self, object_name):
+        with self.lock:
+            central = set(self.label_ids.get(object_name, ()))
+            edges = {}
+            for node in sorted(central):
+                for name in PREDICATE_ORDER:
+                    edges.update(dict.fromkeys((name, node, o) for o in sorted(self.forward[name].get(node, ()))))
+                    edges.update(dict.fromkeys((name, s, node) for s in sorted(self.reverse[name].get(node, ()))))
+            return central, [edge for edge in edges if self.labels.get(edge[1]) and self.labels.get(edge[2])]
+
+    # --- Percurso Paginado das Arestas ---
+    # Todas as arestas entre nós com label, ordenadas por (predicado, sujeito, objeto). A ordem é
+    # estável enquanto o índice não muda, o que permite paginar por cursor.
+    def sorted_edges(self):
+        with self.lock:
+            if self.edge_list is None:
+                self.edge_list = sorted(
+                    (p_idx, s_id, o_id)
+                    for p_idx, name in enumerate(PREDICATE_ORDER)
+                    for s_id, objects in self.forward[name].items() if self.labels.get(s_id)
+                    for o_id in objects if self.labels.get(o_id))
+            return self.edge_list
+
+    # Nós cujo rdf:type tem o label informado (ex: 'IfcWall').
+    # Os conjuntos são percorridos sob o lock, já que 'apply_delta' os altera em outra thread.
+    def nodes_of_type(self, type_label):
+        with self.lock:
+            return {s for t in self.label_ids.get(type_label, ()) for s in self.reverse['type'].get(t, ())}
+
+    # Nós contidos diretamente (isContainedIn) no elemento espacial com o label informado.
+    def nodes_in_container(self, container_label):
+        with self.lock:
+            return {s for c in self.label_ids.get(container_label, ()) for s in self.reverse['isContainedIn'].get(c, ())}
+
+    def iter_edges(self, after=None, predicates=None, subjects=None):
+        """
+        Percorre as arestas ordenadas a partir da posição seguinte ao cursor 'after'
+        (uma tupla (predicado, sujeito, objeto)), aplicando os filtros opcionais de
+        predicados (índices de PREDICATE_ORDER) e de sujeitos (conjunto de ids).
+        """
+        edges = self.sorted_edges()
+        start = bisect.bisect_right(edges, after) if after is not None else 0
+        for edge in edges[start:] if start else edges:
+            if predicates is not None and edge[0] not in predicates:
+                continue
+            if subjects is not None and edge[1] not in subjects:
+                continue
+            yield edge
+
+# --- Atualização do Índice ---
+# Deixa o índice em dia com a versão atual do conjunto de dados. Se a última carga foi
+# incremental e o índice está exatamente uma versão atrás, aplica só o delta; caso contrário,
+# recarrega o backend (quando ele é local) e reconstrói o índice.
+def refresh_index(index, store, info=None):
+    info = info if info is not None else read_dataset_version()
+    version = info.get('version', 0)
+    if index is not None and index.version == version:
+        return index
+    if hasattr(store, 'reload') and index is not None:
+        store.reload()
+    if index is not None and info.get('incremental') and version == index.version + 1:
+        index.apply_delta(info.get('added', []), info.get('removed', []), version)
+        return index
+    return GraphIndex.build(store, version)
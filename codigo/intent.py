@@ -0,0 +1,126 @@
+# Classificação de intenções em dois níveis.
+# 1) Caminho rápido: tabelas de frases e palavras-chave respondem às intenções óbvias
+#    ("oi", "tchau", "qual o material do 'floor'?") sem executar o spaCy.
+# 2) Modelo de NLU (spaCy): usado só para o restante, e carregado apenas no primeiro uso
+#    (ou antes de o servidor criar os processos de trabalho, para que todos compartilhem a memória do modelo).
+import gc  # Para congelar os objetos do modelo antes do fork (mantém as páginas compartilhadas).
+import re  # Para normalizar as mensagens.
+import threading  # Para que duas requisições não carreguem o modelo (nem alterem os contadores) ao mesmo tempo.
+import time  # Para medir o tempo de carregamento do modelo.
+
+# Frases que, sozinhas, definem a intenção (comparadas depois da normalização).
+INTENT_PHRASE_MAP = {
+    'saudacao': ['oi', 'olá', 'ola', 'opa', 'e aí', 'e ai', 'bom dia', 'boa tarde', 'boa noite', 'oi tudo bem', 'olá tudo bem'],
+    'despedida': ['tchau', 'até mais', 'ate mais', 'até logo', 'ate logo', 'adeus', 'obrigado tchau', 'valeu tchau'],
+    'grafo_completo': ['mostre o grafo inteiro', 'mostre o grafo completo', 'mostrar grafo completo', 'grafo completo',
+                       'grafo inteiro', 'gere a ontologia completa', 'ontologia completa'],
+}
+# Trechos que indicam o pedido do grafo completo em qualquer posição da frase.
+FULL_GRAPH_KEYWORDS = ['grafo inteiro', 'grafo completo', 'ontologia completa', 'todo o grafo']
+
+PHRASE_INTENTS = {phrase: intent for intent, phrases in INTENT_PHRASE_MAP.items() for phrase in phrases}
+
+# Expressões compiladas uma única vez: cada intenção por palavras-chave vira uma só alternância
+# (uma busca por mensagem, em vez de uma por palavra-chave).
+PUNCTUATION_RE = re.compile(r"[!?.,;:]+")
+QUOTED_RE = re.compile(r"'[^']+'|\"[^\"]+\"")
+FULL_GRAPH_RE = re.compile("|".join(re.escape(kw) for kw in FULL_GRAPH_KEYWORDS))
+
+# Alternância com as palavras inteiras informadas (as mais longas primeiro).
+def keyword_pattern(keywords):
+    return re.compile(r"\b(?:" + "|".join(re.escape(kw) for kw in sorted(set(keywords), key=len, reverse=True)) + r")\b")
+
+# Normaliza a mensagem para a comparação com as tabelas: minúsculas, sem pontuação nas
+# pontas e com espaços simples.
+def normalize(text):
+    text = PUNCTUATION_RE.sub(" ", text.lower())
+    return " ".join(text.split())
+
+class IntentEngine:
+    """
+    Classificador de intenções com caminho rápido por regras e modelo spaCy carregado sob demanda.
+    'keyword_map' é o RELATIONSHIP_KEYWORD_MAP do app.py: uma pergunta com um objeto entre aspas e
+    uma palavra-chave de relação é classificada como 'perguntar_propriedade' sem o modelo.
+    """
+
+    def __init__(self, model_path, keyword_map):
+        self.model_path = model_path
+        self.relation_keywords = [kw for keywords in keyword_map.values() for kw in keywords]
+        self.relation_re = keyword_pattern(self.relation_keywords)
+        self.nlp = None
+        self.load_failed = False  # Evita tentar carregar de novo um modelo que não existe.
+        self.lock = threading.Lock()
+        self.stats = {"fast_path": 0, "model": 0, "model_load_seconds": None}
+        self.stats_lock = threading.Lock()
+
+    def count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+    # Carrega o modelo (uma única vez). Devolve None se ele não existir.
+    def model(self):
+        if self.nlp is None and not self.load_failed:
+            with self.lock:
+                if self.nlp is None and not self.load_failed:
+                    import spacy  # Importado aqui: a importação do spaCy também pesa na inicialização.
+                    start = time.perf_counter()
+                    try:
+                        self.nlp = spacy.load(self.model_path)
+                        with self.stats_lock:
+                            self.stats["model_load_seconds"] = round(time.perf_counter() - start, 3)
+                        print("-> Modelo de NLU carregado com sucesso.")
+                    except IOError:
+                        self.load_failed = True
+                        print(f"-> ALERTA: Modelo de NLU não encontrado. Execute 'python setup.py' primeiro.")
+        return self.nlp
+
+    # Carrega o modelo antes do fork dos processos de trabalho (ex: 'gunicorn --preload') e congela
+    # os objetos criados até aqui, para que a coleta de lixo não toque (e copie) as páginas compartilhadas.
+    def preload(self):
+        self.model()
+        gc.freeze()
+
+    # Caminho rápido: devolve a intenção ou None quando a frase precisa do modelo.
+    def fast_intent(self, text):
+        normalized = normalize(text)
+        intent = PHRASE_INTENTS.get(normalized)
+        if intent:
+            return intent
+        if FULL_GRAPH_RE.search(normalized):
+            return 'grafo_completo'
+        if QUOTED_RE.search(text) and self.relation_re.search(normalized):
+            return 'perguntar_propriedade'
+        return None
+
+    def classify(self, text):
+        intent = self.fast_intent(text)
+        if intent:
+            self.count("fast_path")
+            return intent
+        nlp = self.model()
+        if not nlp: return "error"  # Retorna erro se o modelo não foi carregado.
+        self.count("model")
+        doc = nlp(text)
+        # Retorna a categoria com a maior pontuação de confiança.
+        return max(doc.cats, key=doc.cats.get)
+
+    # Versão em lote: só as frases que não passam pelo caminho rápido vão para o 'nlp.pipe'.
+    def classify_many(self, texts, batch_size=64):
+        intents = [self.fast_intent(text) for text in texts]
+        pending = [i for i, intent in enumerate(intents) if intent is None]
+        self.count("fast_path", len(texts) - len(pending))
+        if pending:
+            nlp = self.model()
+            if not nlp:
+                for i in pending: intents[i] = "error"
+                return intents
+            self.count("model", len(pending))
+            docs = nlp.pipe((texts[i] for i in pending), batch_size=batch_size)
+            for i, doc in zip(pending, docs):
+                intents[i] = max(doc.cats, key=doc.cats.get)
+        return intents
+
+    # Contadores expostos pelo endpoint de monitoramento.
+    def snapshot(self):
+        with self.stats_lock:
+            return dict(self.stats, model_loaded=self.nlp is not None)
@@ -0,0 +1,193 @@
+# Busca aproximada e por prefixo nos labels dos elementos.
+# Os labels são normalizados (minúsculas, sem acentos) e indexados de duas formas:
+# - uma lista ordenada, para a busca por prefixo (autocompletar) com busca binária;
+# - um índice invertido de trigramas (listas de ids em arrays numpy), para encontrar labels
+#   parecidos mesmo com erros de digitação, sem percorrer todos os labels a cada consulta.
+import bisect  # Busca binária na lista ordenada de labels.
+import threading  # Para que duas requisições não remontem o índice ao mesmo tempo.
+import unicodedata  # Para remover os acentos na normalização.
+from array import array  # Acumula os pares (trigrama, label) sem criar um objeto por par.
+import numpy as np  # Contagem vetorizada dos trigramas em comum.
+
+# Candidatos devolvidos pela busca aproximada (os de mais trigramas em comum com o texto buscado).
+SEARCH_CANDIDATES = 50
+# Máximo de ids lidos das listas de trigramas para gerar os candidatos e de candidatos
+# conferidos contra todos os trigramas do texto; mantêm a consulta rápida com milhões de labels.
+SEARCH_POSTINGS_BUDGET = 50000
+SEARCH_VERIFY_LIMIT = 1000
+
+# Minúsculas, sem acentos e com espaços simples.
+def normalize_label(text):
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return " ".join(''.join(c for c in text if not unicodedata.combining(c)).split())
+
+# Trigramas do texto, com espaços nas pontas para que o início e o fim da palavra contem mais.
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# Distância de edição (Levenshtein). Para assim que passar de 'max_distance' (se informado).
+def edit_distance(a, b, max_distance=None):
+    if max_distance is not None and abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+class LabelSearchIndex:
+    """Índice de busca por prefixo e aproximada sobre um conjunto de labels."""
+
+    def __init__(self, labels):
+        # O id de cada label é a posição na ordem (tamanho, label normalizado): os labels de um
+        # mesmo intervalo de tamanhos ocupam um intervalo contínuo de ids.
+        pairs = sorted(((normalize_label(label), label) for label in set(labels)), key=lambda p: (len(p[0]), p))
+        self.keys = [key for key, _ in pairs]  # Labels normalizados, por id.
+        self.labels = [label for _, label in pairs]
+        lengths = np.fromiter((len(key) for key in self.keys), dtype=np.int64, count=len(self.keys))
+        # length_starts[n] = primeiro id com tamanho >= n.
+        self.length_starts = np.searchsorted(lengths, np.arange((lengths[-1] if len(lengths) else 0) + 2))
+        # Ordem alfabética (para a busca por prefixo).
+        self.sorted_ids = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.sorted_keys = [self.keys[i] for i in self.sorted_ids]
+        # Índice invertido em formato compacto: os ids dos labels de cada trigrama ficam, em
+        # ordem crescente, em postings[offsets[t]:offsets[t + 1]].
+        self.trigram_ids = {}
+        rows, cols = array('i'), array('i')
+        counts = array('i')
+        for label_id, key in enumerate(self.keys):
+            grams = trigrams(key)
+            counts.append(len(grams))
+            for gram in grams:
+                rows.append(self.trigram_ids.setdefault(gram, len(self.trigram_ids)))
+                cols.append(label_id)
+        rows = np.frombuffer(rows, dtype=np.int32)
+        order = np.argsort(rows, kind='stable')
+        self.postings = np.frombuffer(cols, dtype=np.int32)[order]
+        self.offsets = np.searchsorted(rows[order], np.arange(len(self.trigram_ids) + 1))
+        self.trigram_counts = np.frombuffer(counts, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.keys)
+
+    # Intervalo de ids dos labels com tamanho entre 'min_length' e 'max_length' (inclusive).
+    def id_range(self, min_length, max_length=None):
+        last = len(self.length_starts) - 1
+        start = self.length_starts[min(max(min_length, 0), last)]
+        end = len(self.keys) if max_length is None else self.length_starts[min(max_length + 1, last)]
+        return int(start), int(end)
+
+    # Ids dos labels que começam com o texto, do mais curto para o mais longo.
+    def prefix(self, query, limit=10):
+        key = normalize_label(query)
+        start = bisect.bisect_left(self.sorted_keys, key)
+        found = []
+        for i in range(start, len(self.sorted_keys)):
+            if not self.sorted_keys[i].startswith(key) or len(found) >= limit * 5:
+                break
+            found.append(self.sorted_ids[i])
+        return sorted(found)[:limit]
+
+    # Ids dos labels (com tamanho no intervalo informado) com mais trigramas em comum, do mais
+    # para o menos parecido (índice de Jaccard), e as respectivas notas.
+    def similar(self, query, limit=SEARCH_CANDIDATES, min_shared=1, min_length=0, max_length=None):
+        query_grams = trigrams(normalize_label(query))
+        lo, hi = self.id_range(min_length, max_length)
+        slices = []
+        for gram in query_grams:
+            t = self.trigram_ids.get(gram)
+            if t is not None:
+                posting = self.postings[self.offsets[t]:self.offsets[t + 1]]
+                a, b = np.searchsorted(posting, (lo, hi))
+                if b > a:
+                    slices.append(posting[a:b])
+        if not slices:
+            return [], []
+        slices.sort(key=len)
+        # Os candidatos saem dos trigramas mais raros do texto, até o limite de ids lidos: os
+        # trigramas muito comuns (ex: 'wal') não ajudam a separar os labels e custariam caro.
+        selected, total = [], 0
+        for posting in slices:
+            if selected and total + len(posting) > SEARCH_POSTINGS_BUDGET:
+                break
+            selected.append(posting); total += len(posting)
+        candidates, shared = np.unique(np.concatenate(selected), return_counts=True)
+        if len(candidates) > SEARCH_VERIFY_LIMIT:
+            # Mais trigramas em comum primeiro; no empate, os labels mais curtos (ids menores).
+            rank = shared.astype(np.int64) * (len(self.keys) + 1) - candidates
+            candidates = np.sort(candidates[np.argpartition(-rank, SEARCH_VERIFY_LIMIT)[:SEARCH_VERIFY_LIMIT]])
+        # Contagem exata dos trigramas em comum dos candidatos, por busca binária em cada lista.
+        shared = np.zeros(len(candidates), dtype=np.int32)
+        for posting in slices:
+            positions = np.minimum(np.searchsorted(posting, candidates), len(posting) - 1)
+            shared += posting[positions] == candidates
+        keep = shared >= min_shared
+        candidates, shared = candidates[keep], shared[keep]
+        if len(candidates) == 0:
+            return [], []
+        scores = shared / (len(query_grams) + self.trigram_counts[candidates] - shared)
+        if len(candidates) > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+            candidates, scores = candidates[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+        return candidates[order].tolist(), scores[order].tolist()
+
+    def search(self, query, limit=10):
+        """
+        Autocompletar: primeiro os labels que começam com o texto, depois os mais parecidos.
+        Devolve [{"label", "score", "match"}], com 'score' entre 0 e 1.
+        """
+        results, seen = [], set()
+        for i in self.prefix(query, limit):
+            results.append({"label": self.labels[i], "score": 1.0, "match": "prefix"}); seen.add(i)
+        if len(results) < limit:
+            # Labels bem mais curtos que o texto buscado não são sugestões úteis.
+            length = len(normalize_label(query))
+            ids, scores = self.similar(query, min_length=length - length // 2)
+            for i, score in zip(ids, scores):
+                if i not in seen and len(results) < limit:
+                    results.append({"label": self.labels[i], "score": round(score, 3), "match": "fuzzy"}); seen.add(i)
+        return results
+
+    def closest(self, query, max_distance, limit=5):
+        """
+        Labels a no máximo 'max_distance' edições do texto (sem diferenciar maiúsculas ou acentos),
+        do mais próximo para o mais distante: [(label, distância)].
+        """
+        key = normalize_label(query)
+        # Cada edição altera no máximo 3 trigramas, o que dá o mínimo de trigramas em comum.
+        min_shared = max(1, len(trigrams(key)) - 3 * max_distance)
+        ids, _ = self.similar(query, limit=limit * 4, min_shared=min_shared,
+                              min_length=len(key) - max_distance, max_length=len(key) + max_distance)
+        found = []
+        for i in ids:
+            distance = edit_distance(key, self.keys[i], max_distance)
+            if distance <= max_distance:
+                found.append((distance, len(self.keys[i]), self.labels[i]))
+        return [(label, distance) for distance, _, label in sorted(found)[:limit]]
+
+class LabelSearch:
+    """Mantém o índice de busca em dia com o índice do grafo (remontado quando a versão muda)."""
+
+    def __init__(self):
+        self.index = None
+        self.key = None  # (id do índice do grafo, versão) usado na última montagem.
+        self.lock = threading.Lock()
+
+    def sync(self, graph_index):
+        if graph_index is None:
+            return None
+        key = (id(graph_index), graph_index.version)
+        if key != self.key:
+            with self.lock:
+                if key != self.key:
+                    with graph_index.lock:
+                        labels = list(graph_index.label_ids)
+                    self.index = LabelSearchIndex(labels)
+                    self.key = key
+        return self.index
@@ -0,0 +1,216 @@
+# Layout do grafo calculado no servidor e agrupamento por nível de detalhe.
+# O navegador deixa de rodar a simulação física do vis.js: as posições de todos os nós são
+# calculadas uma vez por versão dos dados (algoritmo de forças de Fruchterman-Reingold, em numpy),
+# em uma thread de fundo iniciada quando o índice é montado ou atualizado, e grupos grandes de nós
+# são recolhidos em nós-resumo ("clusters") com a contagem de membros.
+import math  # Para a distância ideal entre os nós.
+import os  # Para ler as variáveis de ambiente.
+import threading  # O layout é calculado em uma thread de fundo.
+import numpy as np  # Cálculo vetorizado das forças.
+from tracing import logger  # Para registrar uma falha no cálculo do layout.
+
+# --- Configurações ---
+# Iterações do algoritmo de forças e quantidade de nós sorteados, por iteração, para a força de
+# repulsão (com o sorteio, cada iteração custa O(nós x amostra) em vez de O(nós²)).
+LAYOUT_ITERATIONS = int(os.environ.get("BIM_LAYOUT_ITERATIONS", "60"))
+LAYOUT_REPULSION_SAMPLE = int(os.environ.get("BIM_LAYOUT_REPULSION_SAMPLE", "256"))
+# Distância média, em pixels, entre nós vizinhos no layout final.
+LAYOUT_SPACING = 120
+# Distância mínima, em pixels, entre dois nós de um layout local (em grafos pequenos, o algoritmo
+# de forças deixa os nós mais próximos do que a distância média acima).
+LAYOUT_MIN_DISTANCE = 80
+# Linhas processadas por vez no cálculo da repulsão (limita a memória usada).
+LAYOUT_CHUNK_SIZE = 4096
+
+# Critérios de agrupamento: nome do parâmetro 'lod' -> predicado cujo objeto define o grupo.
+LOD_GROUPINGS = {
+    'type': 'type',  # Classe IFC (rdf:type), ex: 'IfcWall'.
+    'isOfType': 'isOfType',  # Tipo específico do elemento.
+    'container': 'isContainedIn',  # Elemento espacial que contém o nó (ex: um pavimento).
+}
+
+# Grupo dos nós que não têm o critério escolhido e não couberam no limite de nós individuais.
+LOD_OTHERS_LABEL = "Outros"
+
+# --- Layout por Forças ---
+def force_layout(node_count, edges, iterations=LAYOUT_ITERATIONS, sample=LAYOUT_REPULSION_SAMPLE, seed=0):
+    """
+    Calcula posições 2D para 'node_count' nós ligados pelas arestas (pares de ids).
+    Determinístico para a mesma entrada (semente fixa). Devolve um array (node_count, 2) em pixels.
+    """
+    rng = np.random.default_rng(seed)
+    pos = (rng.random((node_count, 2)) - 0.5).astype(np.float32)
+    if node_count < 2:
+        return np.zeros((node_count, 2))
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    src, dst = edges[:, 0], edges[:, 1]
+    k = 1.0 / math.sqrt(node_count)  # Distância ideal entre os nós, em um quadrado de lado 1.
+    step = 0.1
+    for i in range(iterations):
+        disp = np.zeros_like(pos)
+        # Repulsão entre todos os pares (ou contra uma amostra, compensada pela escala).
+        if node_count <= sample:
+            others, scale = pos, 1.0
+        else:
+            others, scale = pos[rng.choice(node_count, sample, replace=False)], node_count / sample
+        for start in range(0, node_count, LAYOUT_CHUNK_SIZE):
+            chunk = pos[start:start + LAYOUT_CHUNK_SIZE]
+            dx = chunk[:, 0:1] - others[:, 0]; dy = chunk[:, 1:2] - others[:, 1]
+            weight = (k * k * scale) / (dx * dx + dy * dy + 1e-9)
+            # soma_j (p_i - p_j) * w_ij = p_i * soma_j w_ij - soma_j w_ij * p_j (o segundo termo vira um produto de matrizes).
+            disp[start:start + LAYOUT_CHUNK_SIZE] += chunk * weight.sum(1)[:, None] - weight @ others
+        # Atração ao longo das arestas.
+        if len(edges):
+            delta = pos[src] - pos[dst]
+            force = delta * (np.sqrt((delta ** 2).sum(-1)) / k)[:, None]
+            for axis in (0, 1):
+                disp[:, axis] += np.bincount(dst, force[:, axis], node_count) - np.bincount(src, force[:, axis], node_count)
+        # Cada nó anda na direção da força, limitado por um passo que diminui a cada iteração.
+        length = np.sqrt((disp ** 2).sum(-1)) + 1e-9
+        pos += disp / length[:, None] * np.minimum(length, step)[:, None]
+        step = 0.1 * (1 - (i + 1) / iterations) + 1e-3
+    pos -= pos.mean(0)
+    return pos.astype(np.float64) * LAYOUT_SPACING / k
+
+# Layout de todos os nós do índice (as posições ficam na linha do id inteiro de cada nó).
+def compute_index_layout(index):
+    # Arestas e quantidade de nós lidas juntas, para não misturar duas versões do índice.
+    with index.lock:
+        edges = [(s, o) for _, s, o in index.sorted_edges()]
+        node_count = len(index.iris)
+    return force_layout(node_count, edges)
+
+class LayoutCache:
+    """
+    Guarda o layout do índice. Quando a versão dos dados muda, o novo layout é calculado em uma
+    thread de fundo; até ele ficar pronto, 'get' devolve None e o navegador usa a simulação física.
+    Nenhuma requisição espera pelo cálculo.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.positions = None
+        self.pending = None  # Versão cujo layout está sendo calculado.
+        self.lock = threading.Lock()
+
+    def current(self, index):
+        return self.positions is not None and self.version == index.version and len(self.positions) >= len(index.iris)
+
+    # O layout da versão atual do índice já existe (ou não há índice, e não haverá layout).
+    def ready(self, index):
+        with self.lock:
+            return index is None or self.current(index)
+
+    # Começa o cálculo em segundo plano, se o layout desta versão não existe nem está em andamento.
+    def start(self, index):
+        with self.lock:
+            if index is None or self.current(index) or self.pending == index.version:
+                return
+            self.pending = index.version
+        threading.Thread(target=self.compute, args=(index, index.version), name="layout", daemon=True).start()
+
+    def compute(self, index, version):
+        try:
+            positions = compute_index_layout(index)
+        except Exception as e:
+            logger.warning("Não foi possível calcular o layout do grafo. Erro: %s", e)
+            positions = None
+        with self.lock:
+            if self.pending == version:
+                self.pending = None
+            if positions is not None:
+                self.positions, self.version = positions, version
+
+    # Posições da versão atual, ou None enquanto elas são calculadas.
+    def get(self, index):
+        with self.lock:
+            if self.current(index):
+                return self.positions
+        self.start(index)
+        return None
+
+# Acrescenta 'x' e 'y' aos nós (formato do vis.js) que existem no índice.
+def apply_positions(payload, index, positions):
+    for node in payload["nodes"]:
+        node_id = index.ids.get(node["id"]) if isinstance(node["id"], str) else node["id"]
+        if node_id is not None and node_id < len(positions):
+            node["x"], node["y"] = round(float(positions[node_id][0]), 1), round(float(positions[node_id][1]), 1)
+    return payload
+
+# Menor distância entre dois nós (em blocos de linhas, para limitar a memória).
+def min_distance(pos):
+    closest = np.inf
+    for start in range(0, len(pos), LAYOUT_CHUNK_SIZE):
+        chunk = pos[start:start + LAYOUT_CHUNK_SIZE]
+        dist = ((chunk[:, None, :] - pos[None, :, :]) ** 2).sum(-1)
+        dist[np.arange(len(chunk)), np.arange(start, start + len(chunk))] = np.inf
+        closest = min(closest, float(dist.min()))
+    return math.sqrt(closest)
+
+# Layout próprio de um subgrafo pequeno (ex: a vizinhança de um objeto), calculado na hora com
+# os nós e as arestas da resposta. No layout global, esses nós manteriam as coordenadas do modelo
+# inteiro e ficariam espalhados pela tela.
+def apply_local_layout(payload):
+    ids = {node["id"]: i for i, node in enumerate(payload["nodes"])}
+    edges = [(ids[e["from"]], ids[e["to"]]) for e in payload["edges"] if e["from"] in ids and e["to"] in ids]
+    positions = force_layout(len(ids), edges)
+    if len(ids) > 1:
+        positions *= max(1.0, LAYOUT_MIN_DISTANCE / max(min_distance(positions), 1e-9))
+    for node, (x, y) in zip(payload["nodes"], positions):
+        node["x"], node["y"] = round(float(x), 1), round(float(y), 1)
+    return payload
+
+# --- Nível de Detalhe ---
+# Label do grupo de um nó pelo critério informado (ou None se o nó não tiver esse grupo).
+def group_of(index, node_id, group_by):
+    targets = index.forward[LOD_GROUPINGS[group_by]].get(node_id)
+    return min(index.labels_of(t)[0] for t in targets) if targets else None
+
+def cluster_payload(payload, index, group_by, max_nodes, expand=(), keep=(), positions=None):
+    """
+    Recolhe os nós (formato do vis.js) em um nó por grupo, com a contagem de membros, e soma
+    as arestas entre os grupos. Nós em 'keep' (ex: o nó central) e os membros dos grupos em
+    'expand' continuam individuais, até o limite de 'max_nodes' nós; o excedente continua recolhido.
+    """
+    expand = set(expand); keep = set(keep)
+    view_of, clusters, nodes, budget = {}, {}, [], max_nodes
+    for node in payload["nodes"]:
+        node_id = index.ids.get(node["id"]) if isinstance(node["id"], str) else node["id"]
+        group = group_of(index, node_id, group_by) if node_id is not None else None
+        if node["id"] in keep or node["label"] in keep:
+            individual = True
+        elif group is None:
+            # Nós sem grupo ficam individuais enquanto houver espaço; os demais vão para um grupo comum.
+            individual, group = budget > 0, LOD_OTHERS_LABEL
+        else:
+            individual = group in expand and budget > 0
+        if individual:
+            nodes.append(node); view_of[node["id"]] = node["id"]; budget -= 1
+            continue
+        cluster_id = f"cluster:{group_by}:{group}"
+        cluster = clusters.get(cluster_id)
+        if cluster is None:
+            cluster = clusters[cluster_id] = {"id": cluster_id, "cluster": group, "group_by": group_by, "count": 0,
+                                              "shape": "box", "color": "#fde68a", "members": []}
+        cluster["count"] += 1
+        if node_id is not None:
+            cluster["members"].append(node_id)
+        view_of[node["id"]] = cluster_id
+
+    for cluster in clusters.values():
+        cluster["label"] = f"{cluster['cluster']} ({cluster['count']})"
+        members = cluster.pop("members")
+        if positions is not None and members:
+            x, y = positions[members].mean(0)
+            cluster["x"], cluster["y"] = round(float(x), 1), round(float(y), 1)
+    nodes.extend(clusters.values())
+
+    # Arestas repetidas entre os mesmos nós visíveis viram uma só, com a contagem.
+    counts = {}
+    for edge in payload["edges"]:
+        key = (view_of.get(edge["from"], edge["from"]), view_of.get(edge["to"], edge["to"]), edge["label"])
+        if key[0] != key[1]:
+            counts[key] = counts.get(key, 0) + 1
+    edges = [{"from": s, "to": o, "label": label if n == 1 else f"{label} ({n})", "count": n}
+             for (s, o, label), n in counts.items()]
+    return {"nodes": nodes, "edges": edges}
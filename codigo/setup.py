@@ -7,73 +7,157 @@ from spacy.training.example import Example  # Classe auxiliar para o treinamento
 import random  # Usado para embaralhar os dados de treino
 import os  # Para interagir com o sistema de arquivos (verificar/criar pastas)
 import requests  # Para fazer requisições HTTP para o servidor Fuseki
+import time  # Para medir a taxa de conversão (triplos por segundo)
+import argparse  # Para ler as opções de linha de comando
+import hashlib  # Para calcular as impressões digitais (fingerprints) das entidades
+import json  # Para persistir o estado da última ingestão
+import gzip  # Para comprimir os blocos enviados na carga em massa
+import requests.adapters  # Para configurar o pool de conexões da sessão HTTP
+import numpy as np  # Para calcular as caixas envolventes a partir dos vértices da geometria
+import rdflib  # Versão da biblioteca (parte da versão do conversor no cache de construção)
+from store import save_snapshot, load_snapshot, SNAPSHOT_PATH, DATASET_VERSION_FILE  # Artefatos compartilhados com a aplicação
+from columnar import write_columns, COLUMNS_DIR, MANIFEST_FILE as COLUMNS_MANIFEST  # Colunas de propriedades numéricas lidas pela aplicação
+from summary import SummaryBuilder, compute_summary, apply_summary_delta, load_summary, save_summary  # Resumo estatístico servido pela aplicação
+from build_cache import BuildCache, digest, file_sha256  # Etapas puladas quando as entradas não mudaram
+from concurrent.futures import ProcessPoolExecutor  # Para converter vários arquivos/relações em paralelo
+import functools  # Para passar opções às fatias convertidas nos processos do pool
+import shutil  # Para copiar o N-Triples do streaming como snapshot
 
-# --- FUNÇÃO DE CONVERSÃO IFC PARA RDF ---
-# Responsável por ler o arquivo .ifc e traduzir sua estrutura para um grafo RDF (em formato Turtle).
-def run_ifc_conversion():
-    """
-    Abre um arquivo IFC, extrai seus elementos e relações,
-    e os converte em um grafo RDF usando a biblioteca rdflib.
-    """
-    # --- Configurações Iniciais ---
-    IFC_FILE_PATH = 'Building-Architecture.ifc'  # Caminho para o arquivo BIM a ser processado.
-    BASE_URI = "http://exemplo.org/bim#"  # URI base para criar os identificadores únicos no nosso grafo.
-    inst = Namespace(BASE_URI)  # Cria um namespace customizado para nossas entidades (ex: inst:IfcWall).
-    g = Graph()  # Inicializa um grafo RDF vazio.
-    # Associa os prefixos 'inst', 'rdfs', e 'rdf' à URI correspondente para deixar o arquivo .ttl mais legível.
-    g.bind("inst", inst); g.bind("rdfs", RDFS); g.bind("rdf", RDF)
-    
-    # Tenta abrir o arquivo IFC e lida com possíveis erros.
-    try:
-        ifc_file = ifcopenshell.open(IFC_FILE_PATH)
-    except Exception as e:
-        print(f"ERRO: Não foi possível abrir o arquivo IFC '{IFC_FILE_PATH}'. {e}")
-        return None
-    
-    print(f"Processando {ifc_file.schema} de {IFC_FILE_PATH}...")
-    # Seleciona todas as definições de objetos (paredes, lajes, espaços, etc.) do arquivo.
-    all_elements = ifc_file.by_type('IfcObjectDefinition')
-    
-    # Primeiro loop: Itera sobre todos os elementos para extrair informações básicas.
-    for element in all_elements:
+# --- Configurações Globais ---
+IFC_FILE_PATH = 'Building-Architecture.ifc'  # Caminho padrão para o arquivo BIM a ser processado.
+BASE_URI = "http://exemplo.org/bim#"  # URI base para criar os identificadores únicos no nosso grafo.
+# Pasta onde os artefatos gerados (N-Triples, estados de ingestão, etc.) são gravados.
+DATA_DIR = os.environ.get("BIM_DATA_DIR", "./data")
+# Quantidade de triplos acumulados em memória antes de cada gravação no modo streaming.
+DEFAULT_BATCH_SIZE = 50000
+
+# --- FUNÇÕES DE LEITURA E GERAÇÃO DE TRIPLOS ---
+# Abre o arquivo IFC. No modo 'lazy' os atributos de cada entidade só são lidos quando acessados,
+# o que mantém a memória proporcional ao que é consultado e não ao tamanho do modelo.
+def open_ifc(ifc_path, lazy=False):
+    if lazy:
+        try:
+            return ifcopenshell.open(ifc_path, lazy=True)
+        except TypeError:
+            # Versões antigas do IfcOpenShell não aceitam o parâmetro 'lazy'.
+            pass
+    return ifcopenshell.open(ifc_path)
+
+# Verdadeiro apenas na primeira vez em que o label de um nó compartilhado (classe, tipo ou
+# material) é gerado. 'labelled' guarda os pares (IRI, label) já emitidos e pode ser compartilhado
+# entre arquivos e blocos, para que nenhum triplo se repita na saída em streaming.
+def first_label(labelled, uri, name):
+    if (uri, name) in labelled:
+        return False
+    labelled.add((uri, name))
+    return True
+
+# Gera os triplos básicos (label e classe) de cada definição de objeto do arquivo.
+def iter_element_triples(ifc_file, inst, labelled=None):
+    labelled = labelled if labelled is not None else set()  # Evita repetir o label da classe para cada instância.
+    for element in ifc_file.by_type('IfcObjectDefinition'):
         element_uri = inst[element.GlobalId]  # Cria uma URI única para o elemento usando seu GlobalId.
         # Adiciona o nome do elemento como um 'label' (rótulo legível).
-        if getattr(element, 'Name', None): g.add((element_uri, RDFS.label, Literal(element.Name)))
+        if getattr(element, 'Name', None): yield (element_uri, RDFS.label, Literal(element.Name))
         # Adiciona a classe do elemento (ex: 'IfcWall') e também um label para a própria classe.
-        element_class_uri = inst[element.is_a()]; g.add((element_uri, RDF.type, element_class_uri)); g.add((element_class_uri, RDFS.label, Literal(element.is_a())))
-        
-    # Segundo loop: Itera sobre todas as RELAÇÕES para conectar os elementos.
-    for rel in ifc_file.by_type('IfcRelationship'):
+        class_name = element.is_a(); element_class_uri = inst[class_name]
+        yield (element_uri, RDF.type, element_class_uri)
+        if first_label(labelled, element_class_uri, class_name):
+            yield (element_class_uri, RDFS.label, Literal(class_name))
+
+# Materiais (IfcMaterial com nome) de uma associação de material: o próprio material ou os
+# materiais das camadas (IfcMaterialLayerSetUsage/IfcMaterialLayerSet), dos perfis, dos
+# constituintes ou de uma lista de materiais.
+def materials_of(mat_select):
+    if mat_select is None:
+        return []
+    if mat_select.is_a('IfcMaterial'):
+        return [mat_select] if mat_select.Name else []
+    if mat_select.is_a('IfcMaterialLayerSetUsage'):
+        mat_select = mat_select.ForLayerSet
+    elif mat_select.is_a('IfcMaterialProfileSetUsage'):
+        mat_select = mat_select.ForProfileSet
+    if mat_select.is_a('IfcMaterialLayerSet'):
+        parts = [layer.Material for layer in mat_select.MaterialLayers]
+    elif mat_select.is_a('IfcMaterialProfileSet'):
+        parts = [profile.Material for profile in mat_select.MaterialProfiles]
+    elif mat_select.is_a('IfcMaterialConstituentSet'):
+        parts = [constituent.Material for constituent in mat_select.MaterialConstituents or []]
+    elif mat_select.is_a('IfcMaterialList'):
+        parts = list(mat_select.Materials)
+    else:
+        parts = []
+    return [material for material in parts if material is not None and material.Name]
+
+# Gera os triplos de uma classe de relação específica (ex: 'IfcRelAggregates').
+def iter_relationship_triples(ifc_file, inst, rel_class, labelled=None):
+    labelled = labelled if labelled is not None else set()  # Evita repetir o label de um material usado por vários objetos.
+    for rel in ifc_file.by_type(rel_class):
         # Se for uma relação de material...
-        if rel.is_a('IfcRelAssociatesMaterial') and hasattr(rel, 'RelatedObjects'):
+        if rel_class == 'IfcRelAssociatesMaterial' and hasattr(rel, 'RelatedObjects'):
+            # Uma aresta por material distinto (várias camadas podem usar o mesmo material).
+            materials = {inst[f"Mat_{material.Name.replace(' ', '_')}"]: material.Name for material in materials_of(rel.RelatingMaterial)}
             for obj in rel.RelatedObjects:
                 if getattr(obj, 'Name', None):
-                    mat_select = rel.RelatingMaterial
-                    if mat_select and mat_select.is_a('IfcMaterial'):
-                        mat_uri = inst[f"Mat_{mat_select.Name.replace(' ', '_')}"]
-                        g.add((mat_uri, RDFS.label, Literal(mat_select.Name)))
+                    for mat_uri, mat_name in materials.items():
+                        if first_label(labelled, mat_uri, mat_name):
+                            yield (mat_uri, RDFS.label, Literal(mat_name))
                         # Adiciona a tripla: (objeto, temMaterial, material)
-                        g.add((inst[obj.GlobalId], inst.hasMaterial, mat_uri))
+                        yield (inst[obj.GlobalId], inst.hasMaterial, mat_uri)
         # Se for uma relação de contenção espacial (um objeto dentro de outro)...
-        elif rel.is_a('IfcRelContainedInSpatialStructure') and hasattr(rel, 'RelatedElements'):
+        elif rel_class == 'IfcRelContainedInSpatialStructure' and hasattr(rel, 'RelatedElements'):
             if getattr(rel.RelatingStructure, 'Name', None):
                 for element in rel.RelatedElements:
                     # Adiciona a tripla: (elemento, estaContidoEm, estrutura)
-                    if getattr(element, 'Name', None): g.add((inst[element.GlobalId], inst.isContainedIn, inst[rel.RelatingStructure.GlobalId]))
+                    if getattr(element, 'Name', None): yield (inst[element.GlobalId], inst.isContainedIn, inst[rel.RelatingStructure.GlobalId])
         # Se for uma relação de tipo (uma instância de um tipo específico)...
-        elif rel.is_a('IfcRelDefinesByType') and hasattr(rel, 'RelatedObjects'):
+        elif rel_class == 'IfcRelDefinesByType' and hasattr(rel, 'RelatedObjects'):
             if getattr(rel.RelatingType, 'Name', None):
+                # O label do tipo já sai com os elementos (IfcTypeObject é uma IfcObjectDefinition).
                 type_uri = inst[rel.RelatingType.GlobalId]
-                g.add((type_uri, RDFS.label, Literal(rel.RelatingType.Name)))
                 for element in rel.RelatedObjects:
                     # Adiciona a tripla: (elemento, ehDoTipo, tipo)
-                    if getattr(element, 'Name', None): g.add((inst[element.GlobalId], inst.isOfType, type_uri))
+                    if getattr(element, 'Name', None): yield (inst[element.GlobalId], inst.isOfType, type_uri)
         # Se for uma relação de agregação (um objeto composto por partes)...
-        elif rel.is_a('IfcRelAggregates') and hasattr(rel, 'RelatedObjects'):
+        elif rel_class == 'IfcRelAggregates' and hasattr(rel, 'RelatedObjects'):
             if getattr(rel.RelatingObject, 'Name', None):
                 for part in rel.RelatedObjects:
                     # Adiciona a tripla: (objetoPai, agrega, objetoParte)
-                    if getattr(part, 'Name', None): g.add((inst[rel.RelatingObject.GlobalId], inst.aggregates, inst[part.GlobalId]))
+                    if getattr(part, 'Name', None): yield (inst[rel.RelatingObject.GlobalId], inst.aggregates, inst[part.GlobalId])
+
+# Classes de relação IFC traduzidas para o grafo, na ordem em que são processadas.
+RELATIONSHIP_CLASSES = ['IfcRelAssociatesMaterial', 'IfcRelContainedInSpatialStructure', 'IfcRelDefinesByType', 'IfcRelAggregates']
+
+# Gera, um a um, todos os triplos do arquivo IFC (elementos primeiro, depois as relações).
+def iter_ifc_triples(ifc_file, inst, labelled=None):
+    labelled = labelled if labelled is not None else set()
+    yield from iter_element_triples(ifc_file, inst, labelled)
+    for rel_class in RELATIONSHIP_CLASSES:
+        yield from iter_relationship_triples(ifc_file, inst, rel_class, labelled)
+
+# --- FUNÇÃO DE CONVERSÃO IFC PARA RDF ---
+# Responsável por ler o arquivo .ifc e traduzir sua estrutura para um grafo RDF (em formato Turtle).
+def run_ifc_conversion(ifc_path=IFC_FILE_PATH, g=None):
+    """
+    Abre um arquivo IFC, extrai seus elementos e relações,
+    e os converte em um grafo RDF usando a biblioteca rdflib.
+    Se 'g' for informado, os triplos são acrescentados a ele (vários arquivos em um só grafo).
+    """
+    inst = Namespace(BASE_URI)  # Cria um namespace customizado para nossas entidades (ex: inst:IfcWall).
+    g = g if g is not None else Graph()  # Inicializa um grafo RDF vazio.
+    # Associa os prefixos 'inst', 'rdfs', e 'rdf' à URI correspondente para deixar o arquivo .ttl mais legível.
+    g.bind("inst", inst); g.bind("rdfs", RDFS); g.bind("rdf", RDF)
+    
+    # Tenta abrir o arquivo IFC e lida com possíveis erros.
+    try:
+        ifc_file = open_ifc(ifc_path)
+    except Exception as e:
+        print(f"ERRO: Não foi possível abrir o arquivo IFC '{ifc_path}'. {e}")
+        return None
+    
+    print(f"Processando {ifc_file.schema} de {ifc_path}...")
+    for triple in iter_ifc_triples(ifc_file, inst):
+        g.add(triple)
     
     print(f"-> Conversão concluída. {len(g)} triplos gerados.")
 
@@ -82,36 +166,353 @@ def run_ifc_conversion():
 
     return g
 
+# --- FUNÇÃO DE CONVERSÃO EM STREAMING ---
+# Alternativa à conversão acima para modelos grandes: os triplos são gerados um a um e gravados
+# em blocos de N-Triples, de modo que o pico de memória depende do 'batch_size' e não do modelo.
+def run_streaming_conversion(ifc_path=IFC_FILE_PATH, output_path=None, batch_size=DEFAULT_BATCH_SIZE, sink=None, append=False, summary=None, labelled=None):
+    """
+    Converte o arquivo IFC em blocos de N-Triples. Cada bloco é gravado em 'output_path'
+    (se informado, acrescentando ao final quando 'append' for verdadeiro) e/ou entregue
+    à função 'sink' (ex: um carregador do Fuseki). Se 'summary' (um SummaryBuilder) for
+    informado, os triplos de cada bloco também entram no resumo estatístico.
+    Os labels das classes, tipos e materiais saem uma única vez, mesmo entre blocos; para
+    converter vários arquivos sem repeti-los, passe o mesmo conjunto 'labelled' a cada chamada.
+    Retorna o número de triplos (distintos) gerados, ou None em caso de erro.
+    """
+    inst = Namespace(BASE_URI)
+    try:
+        ifc_file = open_ifc(ifc_path, lazy=True)
+    except Exception as e:
+        print(f"ERRO: Não foi possível abrir o arquivo IFC '{ifc_path}'. {e}")
+        return None
+
+    print(f"Processando {ifc_file.schema} de {ifc_path} em modo streaming (blocos de {batch_size} triplos)...")
+    out = None
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        out = open(output_path, 'ab' if append else 'wb')
+
+    total = 0; chunks = 0; start = time.perf_counter()
+    batch = Graph()  # Grafo temporário que guarda apenas o bloco atual.
+
+    # Serializa o bloco atual, envia para o destino e libera a memória.
+    def flush():
+        nonlocal batch, total, chunks
+        if not len(batch): return True
+        data = batch.serialize(format='nt', encoding='utf-8')
+        if out: out.write(data)
+        if sink and sink(data) is False: return False
+        if summary is not None: summary.update(batch)
+        total += len(batch); chunks += 1
+        elapsed = time.perf_counter() - start
+        print(f"   Bloco {chunks}: {total} triplos ({total / elapsed:.0f} triplos/s)")
+        batch = Graph()
+        return True
+
+    try:
+        for triple in iter_ifc_triples(ifc_file, inst, labelled):
+            batch.add(triple)
+            if len(batch) >= batch_size and not flush():
+                print("ERRO: O destino recusou um bloco de triplos. Conversão interrompida.")
+                return None
+        if not flush():
+            print("ERRO: O destino recusou um bloco de triplos. Conversão interrompida.")
+            return None
+    finally:
+        if out: out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"-> Conversão concluída. {total} triplos gerados em {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} triplos/s).")
+    return total
+
+# Converte em streaming todos os arquivos para a mesma saída, sem repetir entre eles os labels
+# compartilhados (ex: o label de uma classe presente em vários arquivos).
+# Com mais de um processo, as fatias são convertidas em paralelo (ver abaixo).
+def stream_ifc_files(ifc_paths, output_path, batch_size, sink=None, summary=None, workers=1):
+    if workers > 1:
+        return run_parallel_conversion(ifc_paths, workers, output_path, batch_size, sink, summary) is not None
+    labelled = set()
+    return all(run_streaming_conversion(path, output_path, batch_size, sink=sink, append=i > 0, summary=summary, labelled=labelled) is not None
+               for i, path in enumerate(ifc_paths))
+
+# --- FUNÇÃO DE CONVERSÃO PARALELA ---
+# Divide o trabalho em "fatias" (shards): para cada arquivo, uma fatia com os elementos e uma
+# fatia por classe de relação. Cada fatia é convertida em um processo separado.
+ELEMENTS_SHARD = 'IfcObjectDefinition'
+
+# Expande a lista de caminhos recebida (arquivos .ifc ou pastas contendo arquivos .ifc).
+def expand_ifc_paths(paths):
+    expanded = []
+    for path in paths:
+        if os.path.isdir(path):
+            expanded.extend(sorted(os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith('.ifc')))
+        else:
+            expanded.append(path)
+    return expanded
+
+# Monta a lista ordenada de fatias (arquivo, classe) a serem convertidas.
+def build_shards(ifc_paths):
+    return [(path, shard) for path in ifc_paths for shard in [ELEMENTS_SHARD] + RELATIONSHIP_CLASSES]
+
+# Modelo aberto em cada processo do pool. As fatias de um arquivo chegam em sequência, então
+# cada processo abre o modelo uma vez (e não uma vez por fatia); só o último fica em memória.
+_open_models = {}
+
+def open_shard_model(ifc_path):
+    model = _open_models.get(ifc_path)
+    if model is None:
+        _open_models.clear()
+        model = _open_models[ifc_path] = open_ifc(ifc_path, lazy=True)
+    return model
+
+# Linha N-Triples de um triplo. Os triplos do conversor só têm IRIs e literais simples (sem
+# idioma nem tipo), escritos aqui diretamente, sem passar por um grafo rdflib.
+def ntriples_line(s, p, o):
+    if isinstance(o, Literal):
+        text = str(o).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+        return f'<{s}> <{p}> "{text}" .\n'
+    return f'<{s}> <{p}> <{o}> .\n'
+
+# Converte uma única fatia. Executada dentro dos processos do pool, por isso recebe apenas
+# dados simples e devolve o resultado já serializado em N-Triples. Os labels compartilhados
+# (classes e materiais) voltam à parte, como pares (IRI, label), para que o processo principal
+# os emita uma única vez entre fatias e arquivos. Com 'with_summary', devolve também as
+# estatísticas parciais da fatia (um SummaryBuilder), combinadas no processo principal.
+def convert_shard(shard, with_summary=False):
+    ifc_path, shard_class = shard
+    inst = Namespace(BASE_URI)
+    ifc_file = open_shard_model(ifc_path)
+    labelled = set()
+    if shard_class == ELEMENTS_SHARD:
+        triples = iter_element_triples(ifc_file, inst, labelled)
+    else:
+        triples = iter_relationship_triples(ifc_file, inst, shard_class, labelled)
+    partial = SummaryBuilder() if with_summary else None
+    seen, lines = set(), []
+    for triple in triples:
+        s, p, o = triple
+        if triple in seen or (p == RDFS.label and (s, str(o)) in labelled):
+            continue
+        seen.add(triple)
+        lines.append(ntriples_line(s, p, o))
+        if partial is not None: partial.add(s, p, o)
+    return shard, ''.join(lines).encode('utf-8'), len(lines), sorted(labelled), partial
+
+# Gera o resultado de cada fatia, sempre na ordem de 'build_shards' (independente de qual
+# processo termina primeiro), o que torna a saída determinística.
+def iter_converted_shards(ifc_paths, workers, with_summary=False):
+    shards = build_shards(ifc_paths)
+    convert = functools.partial(convert_shard, with_summary=with_summary)
+    if workers <= 1:
+        try:
+            yield from map(convert, shards)
+        finally:
+            _open_models.clear()
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(convert, shards)
+
+# Divide o N-Triples de uma fatia em blocos de até 'batch_size' linhas.
+def iter_ntriples_batches(data, batch_size):
+    lines = [line for line in data.splitlines(keepends=True) if line.strip()]
+    for start in range(0, len(lines), batch_size):
+        yield b''.join(lines[start:start + batch_size])
+
+def run_parallel_conversion(ifc_paths, workers=1, output_path=None, batch_size=DEFAULT_BATCH_SIZE, sink=None, summary=None):
+    """
+    Converte vários arquivos IFC em paralelo, dividindo o trabalho por arquivo e por
+    classe de relação. O N-Triples de cada fatia vai direto, na ordem de 'build_shards',
+    para 'output_path' e/ou para a função 'sink', em blocos de 'batch_size' triplos, sem
+    remontar um grafo rdflib no processo principal. Se 'summary' (um SummaryBuilder) for
+    informado, as estatísticas de cada fatia entram no resumo.
+    Retorna o número de triplos gerados, ou None em caso de erro.
+    """
+    print(f"Processando {len(ifc_paths)} arquivo(s) IFC com {workers} processo(s)...")
+    out = None
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        out = open(output_path, 'wb')
+    labelled = set()  # Labels compartilhados já emitidos.
+    total = 0; start = time.perf_counter()
+    try:
+        for (ifc_path, shard_class), data, count, shared, partial in iter_converted_shards(ifc_paths, workers, summary is not None):
+            new_labels = [(uri, RDFS.label, Literal(name)) for uri, name in shared if first_label(labelled, uri, name)]
+            if new_labels:
+                data += ''.join(ntriples_line(*triple) for triple in new_labels).encode('utf-8')
+            for chunk in iter_ntriples_batches(data, batch_size):
+                if out: out.write(chunk)
+                if sink and sink(chunk) is False:
+                    print("ERRO: O destino recusou um bloco de triplos. Conversão interrompida.")
+                    return None
+            if summary is not None:
+                summary.merge(partial).update(new_labels)
+            total += count + len(new_labels)
+            print(f"   {os.path.basename(ifc_path)} [{shard_class}]: {count + len(new_labels)} triplos")
+    except Exception as e:
+        print(f"ERRO: Falha na conversão paralela. {e}")
+        return None
+    finally:
+        if out: out.close()
+    elapsed = time.perf_counter() - start
+    print(f"-> Conversão concluída. {total} triplos gerados em {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} triplos/s).")
+    return total
+
+# --- EXTRAÇÃO DAS PROPRIEDADES NUMÉRICAS ---
+# Os valores numéricos dos psets (IfcPropertySet), das quantidades (IfcElementQuantity), a
+# espessura total das camadas de material e, opcionalmente, as caixas envolventes da geometria
+# vão para o armazenamento colunar ('columnar.py') em vez do grafo: milhões de literais
+# numéricos incham o triplestore e não servem para filtros por faixa de valores.
+LAYER_THICKNESS_COLUMN = 'Material.Espessura'
+BBOX_COLUMNS = ['bbox.min_x', 'bbox.min_y', 'bbox.min_z', 'bbox.max_x', 'bbox.max_y', 'bbox.max_z']
+# Tipos de medida dos psets convertidos para o SI pela escala do arquivo (os demais são gravados como estão).
+LENGTH_MEASURES = {'IfcLengthMeasure', 'IfcPositiveLengthMeasure', 'IfcNonNegativeLengthMeasure'}
+AREA_MEASURES = {'IfcAreaMeasure'}
+VOLUME_MEASURES = {'IfcVolumeMeasure'}
+
+# Escalas das unidades de comprimento, área e volume do arquivo para m, m² e m³.
+def unit_scales(ifc_file):
+    import ifcopenshell.util.unit  # Importado aqui: só a extração de propriedades precisa dele.
+    return {unit: ifcopenshell.util.unit.calculate_unit_scale(ifc_file, unit) for unit in ('LENGTHUNIT', 'AREAUNIT', 'VOLUMEUNIT')}
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+# Valores numéricos de uma definição de propriedades, com o nome 'Conjunto.Propriedade'.
+def numeric_properties(definition, scales):
+    values = {}
+    if definition.is_a('IfcPropertySet'):
+        for prop in definition.HasProperties or []:
+            nominal = getattr(prop, 'NominalValue', None) if prop.is_a('IfcPropertySingleValue') else None
+            if nominal is not None and is_number(nominal.wrappedValue):
+                measure = nominal.is_a()
+                scale = (scales['LENGTHUNIT'] if measure in LENGTH_MEASURES else scales['AREAUNIT'] if measure in AREA_MEASURES
+                         else scales['VOLUMEUNIT'] if measure in VOLUME_MEASURES else 1.0)
+                values[f"{definition.Name}.{prop.Name}"] = float(nominal.wrappedValue) * scale
+    elif definition.is_a('IfcElementQuantity'):
+        for quantity in definition.Quantities or []:
+            if quantity.is_a('IfcPhysicalSimpleQuantity') and is_number(quantity[3]):
+                scale = (scales['LENGTHUNIT'] if quantity.is_a('IfcQuantityLength') else scales['AREAUNIT'] if quantity.is_a('IfcQuantityArea')
+                         else scales['VOLUMEUNIT'] if quantity.is_a('IfcQuantityVolume') else 1.0)
+                values[f"{definition.Name}.{quantity.Name}"] = float(quantity[3]) * scale
+    return values
+
+# Espessura total das camadas de material (IfcMaterialLayerSetUsage/IfcMaterialLayerSet), ou None.
+def layer_thickness(mat_select, scales):
+    if mat_select is not None and mat_select.is_a('IfcMaterialLayerSetUsage'):
+        mat_select = mat_select.ForLayerSet
+    if mat_select is None or not mat_select.is_a('IfcMaterialLayerSet'):
+        return None
+    return sum(layer.LayerThickness or 0.0 for layer in mat_select.MaterialLayers) * scales['LENGTHUNIT']
+
+# Caixas envolventes (em metros, coordenadas globais) de todos os elementos com geometria.
+def iter_bounding_boxes(ifc_file):
+    import ifcopenshell.geom  # Importado aqui: o processamento da geometria é opcional e pesado.
+    settings = ifcopenshell.geom.settings()
+    settings.set(settings.USE_WORLD_COORDS, True)
+    iterator = ifcopenshell.geom.iterator(settings, ifc_file)
+    if not iterator.initialize():
+        return
+    while True:
+        shape = iterator.get()
+        verts = np.asarray(shape.geometry.verts, dtype=float).reshape(-1, 3)
+        if len(verts):
+            yield shape.guid, dict(zip(BBOX_COLUMNS, [*verts.min(axis=0), *verts.max(axis=0)]))
+        if not iterator.next():
+            break
+
+def iter_element_properties(ifc_file, bbox=False):
+    """Gera (GlobalId, classe, {coluna: valor}) para cada elemento com ao menos um valor numérico."""
+    scales = unit_scales(ifc_file)
+    rows = {}  # GlobalId -> (classe, valores)
+    def values_of(obj):
+        return rows.setdefault(obj.GlobalId, (obj.is_a(), {}))[1]
+    for rel in ifc_file.by_type('IfcRelDefinesByProperties'):
+        definitions = rel.RelatingPropertyDefinition
+        # No IFC4, a definição pode ser um conjunto de psets (IfcPropertySetDefinitionSet).
+        for definition in definitions if isinstance(definitions, tuple) else [definitions]:
+            values = numeric_properties(definition, scales)
+            if values:
+                for obj in rel.RelatedObjects:
+                    values_of(obj).update(values)
+    for rel in ifc_file.by_type('IfcRelAssociatesMaterial'):
+        thickness = layer_thickness(rel.RelatingMaterial, scales)
+        if thickness is not None:
+            for obj in rel.RelatedObjects:
+                if obj.is_a('IfcObject'):
+                    values_of(obj)[LAYER_THICKNESS_COLUMN] = thickness
+    if bbox:
+        try:
+            for global_id, box in iter_bounding_boxes(ifc_file):
+                values_of(ifc_file.by_guid(global_id)).update(box)
+        except Exception as e:
+            print(f"-> ALERTA: Não foi possível calcular as caixas envolventes. Erro: {e}")
+    for global_id, (class_name, values) in rows.items():
+        yield global_id, class_name, values
+
+# Classes ancestrais de cada classe no esquema do arquivo (ex: 'IfcWallStandardCase' -> 'IfcWall',
+# 'IfcBuiltElement', ...), para que o filtro por uma classe inclua as subclasses.
+def class_supertypes(ifc_file, class_names):
+    schema = ifcopenshell.ifcopenshell_wrapper.schema_by_name(ifc_file.schema)
+    supertypes = {}
+    for name in class_names:
+        ancestors, declaration = [], schema.declaration_by_name(name).supertype()
+        while declaration is not None:
+            ancestors.append(declaration.name()); declaration = declaration.supertype()
+        supertypes[name] = ancestors
+    return supertypes
+
+def run_property_extraction(ifc_paths, output_dir=COLUMNS_DIR, bbox=False):
+    """Extrai as propriedades numéricas de todos os arquivos e grava as colunas lidas pela aplicação."""
+    start = time.perf_counter()
+    rows, supertypes = [], {}
+    for ifc_path in ifc_paths:
+        try:
+            ifc_file = open_ifc(ifc_path)
+            file_rows = list(iter_element_properties(ifc_file, bbox))
+            supertypes.update(class_supertypes(ifc_file, {row[1] for row in file_rows} - supertypes.keys()))
+            rows.extend(file_rows)
+        except Exception as e:
+            print(f"ERRO: Falha ao extrair as propriedades de '{ifc_path}'. {e}")
+            return False
+    manifest = write_columns(rows, output_dir, supertypes)
+    print(f"-> Propriedades numéricas salvas em '{output_dir}': {manifest['rows']} elementos, "
+          f"{len(manifest['columns'])} colunas ({time.perf_counter() - start:.2f}s).")
+    return True
+
 # --- FUNÇÃO DE TREINAMENTO DO NLU ---
+NLU_MODEL_PATH = "./nlu_model"  # Pasta onde o modelo treinado será salvo.
+NLU_EPOCHS = 15  # Passadas sobre os dados de treino.
+# Dados de treinamento: pares de (frase de exemplo, dicionário de intenções). Fazem parte da chave
+# do cache de construção: alterá-los faz o modelo ser treinado de novo.
+TRAIN_DATA = [
+    ("oi", {"cats": {"saudacao": 1.0, "despedida": 0.0, "perguntar_propriedade": 0.0, "grafo_completo": 0.0}}),
+    ("olá", {"cats": {"saudacao": 1.0, "despedida": 0.0, "perguntar_propriedade": 0.0, "grafo_completo": 0.0}}),
+    ("tchau", {"cats": {"saudacao": 0.0, "despedida": 1.0, "perguntar_propriedade": 0.0, "grafo_completo": 0.0}}),
+    ("qual o material do 'floor'?", {"cats": {"saudacao": 0.0, "despedida": 0.0, "perguntar_propriedade": 1.0, "grafo_completo": 0.0}}),
+    ("onde está o 'floor'?", {"cats": {"saudacao": 0.0, "despedida": 0.0, "perguntar_propriedade": 1.0, "grafo_completo": 0.0}}),
+    ("qual o tipo do 'floor'?", {"cats": {"saudacao": 0.0, "despedida": 0.0, "perguntar_propriedade": 1.0, "grafo_completo": 0.0}}),
+    ("mostre o grafo inteiro", {"cats": {"saudacao": 0.0, "despedida": 0.0, "perguntar_propriedade": 0.0, "grafo_completo": 1.0}}),
+    ("gere a ontologia completa", {"cats": {"saudacao": 0.0, "despedida": 0.0, "perguntar_propriedade": 0.0, "grafo_completo": 1.0}}),
+]
+
 # Responsável por treinar um modelo simples de spaCy para classificar a intenção do usuário.
 def run_nlu_training():
     """
     Cria e treina um modelo de classificação de texto (NLU) com base
     em exemplos de frases e suas intenções correspondentes.
     """
-    NLU_MODEL_PATH = "./nlu_model"  # Pasta onde o modelo treinado será salvo.
-    # Dados de treinamento: pares de (frase de exemplo, dicionário de intenções).
-    TRAIN_DATA = [
-        ("oi", {"cats": {"saudacao": 1.0, "despedida": 0.0, "perguntar_propriedade": 0.0, "grafo_completo": 0.0}}),
-        ("olá", {"cats": {"saudacao": 1.0, "despedida": 0.0, "perguntar_propriedade": 0.0, "grafo_completo": 0.0}}),
-        ("tchau", {"cats": {"saudacao": 0.0, "despedida": 1.0, "perguntar_propriedade": 0.0, "grafo_completo": 0.0}}),
-        ("qual o material do 'floor'?", {"cats": {"saudacao": 0.0, "despedida": 0.0, "perguntar_propriedade": 1.0, "grafo_completo": 0.0}}),
-        ("onde está o 'floor'?", {"cats": {"saudacao": 0.0, "despedida": 0.0, "perguntar_propriedade": 1.0, "grafo_completo": 0.0}}),
-        ("qual o tipo do 'floor'?", {"cats": {"saudacao": 0.0, "despedida": 0.0, "perguntar_propriedade": 1.0, "grafo_completo": 0.0}}),
-        ("mostre o grafo inteiro", {"cats": {"saudacao": 0.0, "despedida": 0.0, "perguntar_propriedade": 0.0, "grafo_completo": 1.0}}),
-        ("gere a ontologia completa", {"cats": {"saudacao": 0.0, "despedida": 0.0, "perguntar_propriedade": 0.0, "grafo_completo": 1.0}}),
-    ]
     nlp_train = spacy.blank("pt")  # Cria um modelo de linguagem vazio para o português.
     textcat = nlp_train.add_pipe("textcat")  # Adiciona um componente de classificação de texto (textcat).
     # Adiciona as possíveis categorias (labels) de intenção ao classificador.
     textcat.add_label("saudacao"); textcat.add_label("despedida"); textcat.add_label("perguntar_propriedade"); textcat.add_label("grafo_completo")
     nlp_train.initialize()  # Inicializa o treinamento.
+    examples = list(TRAIN_DATA)  # Cópia embaralhada a cada iteração (os dados originais entram na chave do cache).
     # Itera várias vezes sobre os dados de treino para que o modelo aprenda.
-    for i in range(15):
-        random.shuffle(TRAIN_DATA)  # Embaralha os dados a cada iteração para evitar viés.
+    for i in range(NLU_EPOCHS):
+        random.shuffle(examples)  # Embaralha os dados a cada iteração para evitar viés.
         losses = {}
         # Atualiza o modelo com cada exemplo de treino.
-        for text, annotations in TRAIN_DATA:
+        for text, annotations in examples:
             doc = nlp_train.make_doc(text)
             example = Example.from_dict(doc, annotations)
             nlp_train.update([example], losses=losses)
@@ -119,21 +520,47 @@ def run_nlu_training():
     print(f"-> Modelo de NLU treinado e salvo em '{NLU_MODEL_PATH}'.")
 
 # --- FUNÇÃO DE UPLOAD PARA O FUSEKI ---
+# Endpoint do protocolo Graph Store (GSP), que permite a manipulação de grafos via HTTP.
+FUSEKI_GSP_ENDPOINT = os.environ.get("FUSEKI_GSP_ENDPOINT", "http://localhost:3030/BIM_Knowledge_Base/data")
+
+# Parâmetros do GSP que selecionam o grafo padrão ou um grafo nomeado.
+def gsp_graph_params(graph_uri=None):
+    return {'graph': graph_uri} if graph_uri else {'default': ''}
+
+# Apaga o grafo padrão (ou um grafo nomeado) do Fuseki antes de uma nova carga.
+def clear_fuseki_graph(session=requests, graph_uri=None):
+    print(f"-> Limpando o grafo {f'<{graph_uri}>' if graph_uri else 'padrão'} no Fuseki...")
+    try:
+        # Envia uma requisição HTTP DELETE para apagar o grafo.
+        response = session.delete(FUSEKI_GSP_ENDPOINT, params=gsp_graph_params(graph_uri))
+        # Um grafo nomeado que ainda não existe retorna 404, o que para nós equivale a "já limpo".
+        if not (graph_uri and response.status_code == 404):
+            response.raise_for_status()
+        print("   Grafo limpo com sucesso.")
+        return True
+    except requests.exceptions.RequestException as e:
+        print(f"ERRO: Não foi possível conectar ao Fuseki para limpar o grafo. Verifique se ele está rodando. Erro: {e}")
+        return False
+
+# Envia um bloco de N-Triples para o grafo padrão. Usada como 'sink' da conversão em streaming.
+def upload_ntriples_chunk(data):
+    try:
+        requests.post(
+            FUSEKI_GSP_ENDPOINT, params={'default': ''}, data=data,
+            headers={'Content-Type': 'application/n-triples; charset=utf-8'}
+        ).raise_for_status()
+        return True
+    except requests.exceptions.RequestException as e:
+        print(f"ERRO: Falha na comunicação durante o upload para o Fuseki. Erro: {e}")
+        return False
+
 # Responsável por limpar e carregar o novo grafo no servidor de triplestore.
 def upload_to_fuseki(graph):
     """
     Conecta-se ao endpoint do Apache Jena Fuseki, apaga os dados antigos
     e envia o novo grafo RDF gerado.
     """
-    # Endpoint do protocolo Graph Store (GSP), que permite a manipulação de grafos via HTTP.
-    FUSEKI_GSP_ENDPOINT = "http://localhost:3030/BIM_Knowledge_Base/data"
-    print("-> Limpando o grafo no Fuseki...")
-    try:
-        # Envia uma requisição HTTP DELETE para apagar o grafo padrão.
-        requests.delete(FUSEKI_GSP_ENDPOINT, params={'default': ''}).raise_for_status()
-        print("   Grafo limpo com sucesso.")
-    except requests.exceptions.RequestException as e:
-        print(f"ERRO: Não foi possível conectar ao Fuseki para limpar o grafo. Verifique se ele está rodando. Erro: {e}")
+    if not clear_fuseki_graph():
         return False
     
     print(f"-> Carregando {len(graph)} triplos no Fuseki...")
@@ -149,16 +576,492 @@ def upload_to_fuseki(graph):
         print(f"ERRO: Falha na comunicação durante o upload para o Fuseki. Erro: {e}")
         return False
 
+# --- SINCRONIZAÇÃO INCREMENTAL COM O FUSEKI ---
+# Em vez de apagar e recarregar tudo, compara o novo grafo com o da última ingestão (guardado
+# localmente) e envia ao Fuseki apenas os triplos adicionados/removidos via SPARQL Update.
+FUSEKI_UPDATE_ENDPOINT = os.environ.get("FUSEKI_UPDATE_ENDPOINT", "http://localhost:3030/BIM_Knowledge_Base/update")
+INGEST_STATE_DIR = os.path.join(DATA_DIR, 'ingest_state')  # Pasta com o estado da última ingestão.
+INGEST_TRIPLES_FILE = os.path.join(INGEST_STATE_DIR, 'triplos.nt')  # Triplos enviados na última ingestão.
+INGEST_FINGERPRINTS_FILE = os.path.join(INGEST_STATE_DIR, 'fingerprints.json')  # Hash de cada entidade.
+DELTA_BATCH_SIZE = 10000  # Máximo de triplos por requisição de SPARQL Update.
+
+# Converte o grafo em uma lista ordenada de linhas N-Triples (uma linha por triplo).
+def graph_to_ntriples_lines(graph):
+    data = graph.serialize(format='nt', encoding='utf-8').decode('utf-8')
+    return sorted(set(line for line in data.splitlines() if line.strip()))
+
+# Chave da entidade dona de um triplo: o nome local do sujeito (o GlobalId, no caso de elementos IFC).
+def entity_key(line):
+    subject = line.split(' ', 1)[0]
+    return subject.strip('<>').rsplit('#', 1)[-1]
+
+# Agrupa os triplos por entidade e calcula um hash (fingerprint) do conteúdo de cada uma.
+def fingerprint_entities(lines):
+    groups = {}
+    for line in lines:
+        groups.setdefault(entity_key(line), []).append(line)
+    return {key: hashlib.sha1('\n'.join(sorted(group)).encode('utf-8')).hexdigest() for key, group in groups.items()}
+
+# Calcula os triplos adicionados e removidos em relação à última ingestão.
+# Retorna None quando não há estado anterior (primeira ingestão).
+def compute_ingest_delta(new_lines, new_fingerprints):
+    if not (os.path.exists(INGEST_FINGERPRINTS_FILE) and os.path.exists(INGEST_TRIPLES_FILE)):
+        return None
+    with open(INGEST_FINGERPRINTS_FILE, encoding='utf-8') as f:
+        old_fingerprints = json.load(f)
+    # Só as entidades cujo hash mudou (ou que surgiram/sumiram) precisam ser comparadas triplo a triplo.
+    changed = {key for key in old_fingerprints.keys() | new_fingerprints.keys()
+               if old_fingerprints.get(key) != new_fingerprints.get(key)}
+    if not changed:
+        return [], []
+    with open(INGEST_TRIPLES_FILE, encoding='utf-8') as f:
+        old_lines = {line.rstrip('\n') for line in f if line.strip() and entity_key(line) in changed}
+    new_changed = {line for line in new_lines if entity_key(line) in changed}
+    return sorted(new_changed - old_lines), sorted(old_lines - new_changed)
+
+# Grava o estado da ingestão atual, usado como base na próxima sincronização.
+def save_ingest_state(lines, fingerprints):
+    os.makedirs(INGEST_STATE_DIR, exist_ok=True)
+    with open(INGEST_TRIPLES_FILE, 'w', encoding='utf-8') as f:
+        f.writelines(line + '\n' for line in lines)
+    with open(INGEST_FINGERPRINTS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(fingerprints, f)
+
+# Incrementa a versão do conjunto de dados. Quando a carga foi incremental, grava também os
+# triplos adicionados/removidos para que a aplicação possa se atualizar sem recarregar tudo.
+def bump_dataset_version(added=None, removed=None):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    version = 0
+    if os.path.exists(DATASET_VERSION_FILE):
+        with open(DATASET_VERSION_FILE, encoding='utf-8') as f:
+            version = json.load(f).get('version', 0)
+    info = {'version': version + 1, 'timestamp': time.time(), 'incremental': added is not None}
+    if added is not None:
+        info['added'] = added; info['removed'] = removed
+    with open(DATASET_VERSION_FILE, 'w', encoding='utf-8') as f:
+        json.dump(info, f)
+    return info['version']
+
+# Envia um delta ao Fuseki. Cada requisição contém remoções e inserções de um mesmo lote,
+# e é aplicada pelo Fuseki em uma única transação.
+def apply_delta_to_fuseki(added, removed):
+    try:
+        for start in range(0, max(len(added), len(removed)), DELTA_BATCH_SIZE):
+            removed_batch = removed[start:start + DELTA_BATCH_SIZE]
+            added_batch = added[start:start + DELTA_BATCH_SIZE]
+            update = ""
+            if removed_batch: update += "DELETE DATA {\n" + "\n".join(removed_batch) + "\n};\n"
+            if added_batch: update += "INSERT DATA {\n" + "\n".join(added_batch) + "\n}"
+            requests.post(
+                FUSEKI_UPDATE_ENDPOINT, data=update.encode('utf-8'),
+                headers={'Content-Type': 'application/sparql-update; charset=utf-8'}
+            ).raise_for_status()
+        return True
+    except requests.exceptions.RequestException as e:
+        print(f"ERRO: Falha ao aplicar o delta no Fuseki. Erro: {e}")
+        return False
+
+# Apaga o estado da ingestão quando o Fuseki recebeu uma carga que não foi registrada nele
+# (ex: streaming); a próxima sincronização incremental volta a fazer a carga completa.
+def clear_ingest_state():
+    for path in (INGEST_TRIPLES_FILE, INGEST_FINGERPRINTS_FILE):
+        if os.path.exists(path):
+            os.remove(path)
+
+# Registra uma carga completa: salva o estado da ingestão (apenas se o grafo foi de fato enviado
+# ao Fuseki, já que ele é a base do delta da próxima carga incremental), incrementa a versão dos
+# dados e grava o resumo estatístico do grafo novo.
+def record_full_ingest(graph, lines=None, fingerprints=None, uploaded=True):
+    if uploaded:
+        lines = lines if lines is not None else graph_to_ntriples_lines(graph)
+        save_ingest_state(lines, fingerprints if fingerprints is not None else fingerprint_entities(lines))
+    record_summary(compute_summary(graph, bump_dataset_version()))
+
+# Grava o resumo estatístico (contagens por classe, predicados, materiais e contêineres)
+# lido pela aplicação, com a versão dos dados a que ele corresponde.
+def record_summary(summary):
+    save_summary(summary)
+    print(f"-> Resumo do modelo salvo ({len(summary['types'])} classes, {len(summary['predicates'])} predicados).")
+    return summary
+
+# Atualiza o resumo de uma carga incremental: só o que o delta tocou é recalculado.
+# Sem um resumo anterior da mesma base, o resumo é calculado do zero.
+def record_incremental_summary(graph, added, removed, version):
+    previous = load_summary()
+    if previous is None or previous.get('version') != version - 1:
+        record_summary(compute_summary(graph, version))
+    else:
+        record_summary(apply_summary_delta(previous, graph, added, removed, version))
+
+# Grava o snapshot do backend local a partir do N-Triples gerado no streaming. Um snapshot '.nt'
+# é só uma cópia do arquivo (a memória continua limitada); no formato binário, o grafo é lido
+# inteiro uma vez, como o próprio backend local fará ao carregá-lo.
+def save_stream_snapshot(nt_path, snapshot_path):
+    try:
+        if snapshot_path.endswith('.nt'):
+            os.makedirs(os.path.dirname(snapshot_path) or '.', exist_ok=True)
+            shutil.copyfile(nt_path, snapshot_path)
+        else:
+            save_snapshot(load_snapshot(nt_path), snapshot_path)
+    except Exception as e:
+        print(f"ERRO: Não foi possível gravar o snapshot '{snapshot_path}'. {e}")
+        return False
+    print(f"-> Snapshot do grafo salvo em '{snapshot_path}'.")
+    return True
+
+# Registra uma carga em streaming. O snapshot é gravado antes da nova versão dos dados: a
+# aplicação nunca recarrega o snapshot anterior sob a versão nova. Retorna o número de triplos,
+# ou None se o snapshot não pôde ser gravado (a versão não muda).
+def record_stream_ingest(cache, summary, output_path, snapshot_path, snapshot_key):
+    if snapshot_key:
+        if not save_stream_snapshot(output_path, snapshot_path):
+            return None
+        cache.mark("snapshot", snapshot_key)
+    return record_summary(summary.finish(bump_dataset_version()))["triples"]
+
+def sync_to_fuseki(graph):
+    """
+    Sincroniza o Fuseki com o novo grafo de forma incremental: apenas a diferença em relação
+    à última ingestão é enviada, e o endpoint nunca fica vazio durante a atualização.
+    Na primeira execução (sem estado salvo) faz a carga completa.
+    """
+    start = time.perf_counter()
+    lines = graph_to_ntriples_lines(graph)
+    fingerprints = fingerprint_entities(lines)
+    delta = compute_ingest_delta(lines, fingerprints)
+    if delta is None:
+        print("-> Nenhuma ingestão anterior encontrada. Fazendo a carga completa...")
+        if not upload_to_fuseki(graph):
+            return False
+        record_full_ingest(graph, lines, fingerprints)
+        return True
+
+    added, removed = delta
+    print(f"-> Delta em relação à última ingestão: +{len(added)} / -{len(removed)} triplos.")
+    if (added or removed) and not apply_delta_to_fuseki(added, removed):
+        return False
+    save_ingest_state(lines, fingerprints)
+    if added or removed:
+        record_incremental_summary(graph, added, removed, bump_dataset_version(added, removed))
+    print(f"   Sincronização incremental concluída em {time.perf_counter() - start:.2f}s.")
+    return True
+
+# --- CARGA EM MASSA (BULK) PARA O FUSEKI ---
+# Envia o grafo em blocos de N-Triples de tamanho fixo, reaproveitando conexões HTTP, com
+# compressão gzip opcional e novas tentativas por bloco. Opcionalmente carrega tudo em um grafo
+# nomeado de preparo (staging) e só então o move para o grafo padrão, de forma atômica.
+DEFAULT_CHUNK_SIZE = 50000  # Triplos por bloco enviado.
+DEFAULT_RETRIES = 3  # Novas tentativas por bloco antes de desistir da carga.
+
+# Cria uma sessão HTTP com um pool de conexões mantidas abertas (keep-alive).
+def make_fuseki_session(pool_size=4):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter); session.mount('https://', adapter)
+    return session
+
+# Divide o grafo em blocos de N-Triples sem serializar o documento inteiro de uma vez.
+def iter_graph_chunks(graph, chunk_size=DEFAULT_CHUNK_SIZE):
+    chunk = Graph()
+    for triple in graph:
+        chunk.add(triple)
+        if len(chunk) >= chunk_size:
+            yield chunk.serialize(format='nt', encoding='utf-8')
+            chunk = Graph()
+    if len(chunk):
+        yield chunk.serialize(format='nt', encoding='utf-8')
+
+# Cria a função que envia cada bloco (o 'sink' da carga), com novas tentativas e relatório de vazão.
+def make_bulk_sink(session, graph_uri=None, use_gzip=False, retries=DEFAULT_RETRIES):
+    headers = {'Content-Type': 'application/n-triples; charset=utf-8'}
+    if use_gzip: headers['Content-Encoding'] = 'gzip'
+    stats = {'chunks': 0, 'triples': 0, 'start': time.perf_counter()}
+
+    def sink(data):
+        triples = data.count(b'\n')
+        body = gzip.compress(data) if use_gzip else data
+        for attempt in range(retries + 1):
+            chunk_start = time.perf_counter()
+            try:
+                session.post(FUSEKI_GSP_ENDPOINT, params=gsp_graph_params(graph_uri), data=body, headers=headers).raise_for_status()
+                break
+            except requests.exceptions.RequestException as e:
+                if attempt == retries:
+                    print(f"ERRO: Bloco {stats['chunks'] + 1} falhou após {retries + 1} tentativas. Erro: {e}")
+                    return False
+                wait = 0.5 * 2 ** attempt
+                print(f"   Falha no bloco {stats['chunks'] + 1} (tentativa {attempt + 1}). Repetindo em {wait:.1f}s...")
+                time.sleep(wait)
+        elapsed = time.perf_counter() - chunk_start
+        stats['chunks'] += 1; stats['triples'] += triples
+        print(f"   Bloco {stats['chunks']}: {triples} triplos, {len(body) / 1024:.0f} KB em {elapsed:.2f}s "
+              f"({triples / max(elapsed, 1e-9):.0f} triplos/s; total {stats['triples']})")
+        return True
+
+    sink.stats = stats
+    return sink
+
+# Prepara uma carga em massa: abre a sessão e limpa o grafo de destino (o de preparo, se houver).
+# Retorna (sessão, sink) ou None se o Fuseki não puder ser limpo.
+def start_bulk_load(use_gzip=False, staging_graph=None, retries=DEFAULT_RETRIES):
+    session = make_fuseki_session()
+    if not clear_fuseki_graph(session, staging_graph):
+        session.close()
+        return None
+    return session, make_bulk_sink(session, staging_graph, use_gzip, retries)
+
+# Conclui a carga em massa. Com grafo de preparo, o MOVE substitui o grafo padrão em uma única
+# transação, então as consultas nunca veem a base vazia ou pela metade.
+def finish_bulk_load(session, sink, staging_graph=None):
+    try:
+        if staging_graph:
+            print(f"-> Movendo <{staging_graph}> para o grafo padrão...")
+            session.post(
+                FUSEKI_UPDATE_ENDPOINT, data=f"MOVE <{staging_graph}> TO DEFAULT".encode('utf-8'),
+                headers={'Content-Type': 'application/sparql-update; charset=utf-8'}
+            ).raise_for_status()
+        elapsed = time.perf_counter() - sink.stats['start']
+        print(f"   Carga em massa concluída: {sink.stats['triples']} triplos em {sink.stats['chunks']} bloco(s), "
+              f"{elapsed:.2f}s ({sink.stats['triples'] / max(elapsed, 1e-9):.0f} triplos/s).")
+        return True
+    except requests.exceptions.RequestException as e:
+        print(f"ERRO: Falha ao ativar o grafo de preparo no Fuseki. Erro: {e}")
+        return False
+    finally:
+        session.close()
+
+def bulk_upload_to_fuseki(graph, chunk_size=DEFAULT_CHUNK_SIZE, use_gzip=False, staging_graph=None, retries=DEFAULT_RETRIES):
+    """
+    Carrega o grafo no Fuseki em blocos de N-Triples por uma sessão HTTP reaproveitada,
+    com gzip opcional, novas tentativas por bloco e troca atômica via grafo de preparo.
+    """
+    started = start_bulk_load(use_gzip, staging_graph, retries)
+    if not started:
+        return False
+    session, sink = started
+    print(f"-> Carregando {len(graph)} triplos no Fuseki em blocos de {chunk_size}...")
+    if not all(sink(chunk) for chunk in iter_graph_chunks(graph, chunk_size)):
+        session.close()
+        return False
+    return finish_bulk_load(session, sink, staging_graph)
+
+# --- CACHE DE CONSTRUÇÃO ---
+# Chaves das etapas (ver build_cache.py). A versão do conversor é o hash deste script junto com
+# as versões do ifcopenshell e do rdflib: qualquer mudança na conversão invalida os grafos guardados.
+FUSEKI_QUERY_ENDPOINT = os.environ.get("FUSEKI_ENDPOINT", "http://localhost:3030/BIM_Knowledge_Base/query")
+
+def converter_version():
+    return digest(file_sha256(os.path.abspath(__file__)), ifcopenshell.version, rdflib.__version__)
+
+def graph_cache_key(cache, ifc_paths):
+    return digest("grafo", converter_version(), [cache.file_hash(path) for path in ifc_paths])
+
+# A carga depende do grafo e do destino (o Fuseki configurado ou apenas os arquivos locais).
+def load_cache_key(graph_key, skip_upload):
+    return digest("carga", graph_key, "local" if skip_upload else FUSEKI_GSP_ENDPOINT)
+
+def properties_cache_key(graph_key, bbox):
+    return digest("propriedades", graph_key, bbox)
+
+def nlu_cache_key():
+    return digest("nlu", TRAIN_DATA, NLU_EPOCHS, spacy.__version__)
+
+# Quantidade de triplos no grafo padrão do Fuseki, ou None se ele não responder.
+def fuseki_triple_count():
+    try:
+        response = requests.post(FUSEKI_QUERY_ENDPOINT, data={"query": "SELECT (COUNT(*) AS ?n) WHERE { ?s ?p ?o }"},
+                                 headers={"Accept": "application/sparql-results+json"}, timeout=60)
+        response.raise_for_status()
+        return int(response.json()["results"]["bindings"][0]["n"]["value"])
+    except (requests.exceptions.RequestException, ValueError, KeyError, IndexError):
+        return None
+
+# A carga pode ser pulada quando o mesmo grafo já foi carregado no mesmo destino e continua lá
+# (o Fuseki pode ter sido recriado vazio, ex: um contêiner novo sem volume persistente). A
+# contagem comparada é a que o próprio Fuseki informou logo após a última carga.
+def load_is_fresh(cache, load_key, skip_upload):
+    if not cache.is_fresh("carga", load_key, DATASET_VERSION_FILE):
+        return False
+    return skip_upload or fuseki_triple_count() == cache.info("carga").get("triples")
+
+# Grafo convertido: do cache, se o IFC e o conversor não mudaram, ou da conversão (que é guardada no cache).
+def convert_with_cache(cache, graph_key, ifc_paths, workers, stage):
+    graph = cache.load_graph(graph_key)
+    if graph is not None:
+        stage["reused"] = True
+        print(f"-> Grafo convertido reaproveitado do cache ({len(graph)} triplos).")
+        return graph
+    # O grafo em memória é montado em um único processo: mesclar grafos parciais vindos de
+    # outros processos custa mais do que a própria conversão (a conversão paralela é a do '--stream').
+    if workers > 1:
+        print("-> ALERTA: '--workers' só é usado com '--stream'. Convertendo em um único processo.")
+    graph = Graph()
+    for path in ifc_paths:
+        if run_ifc_conversion(path, graph) is None:
+            return None
+    if graph:
+        cache.store_graph(graph_key, graph)
+    return graph
+
+# --- OPÇÕES DE LINHA DE COMANDO ---
+def parse_args():
+    parser = argparse.ArgumentParser(description="Converte o modelo IFC, carrega no Fuseki e treina o NLU.")
+    parser.add_argument('--ifc', nargs='+', default=[IFC_FILE_PATH],
+                        help="Arquivo(s) IFC, ou pastas com arquivos IFC, a serem convertidos.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Número de processos usados na conversão em streaming (por arquivo e por classe de relação).")
+    parser.add_argument('--stream', action='store_true',
+                        help="Converte em blocos de N-Triples, com memória limitada pelo tamanho do bloco.")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Triplos por bloco no modo streaming.")
+    parser.add_argument('--output', default=os.path.join(DATA_DIR, 'modelo_convertido.nt'),
+                        help="Arquivo N-Triples gravado no modo streaming (use '' para não gravar).")
+    parser.add_argument('--bulk', action='store_true',
+                        help="Carrega no Fuseki em blocos de N-Triples, com conexões reaproveitadas e novas tentativas.")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Triplos por bloco na carga em massa.")
+    parser.add_argument('--gzip', action='store_true', help="Comprime com gzip os blocos da carga em massa.")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help="Novas tentativas por bloco na carga em massa.")
+    parser.add_argument('--staging-graph', default=None,
+                        help="Grafo nomeado de preparo; ao final da carga em massa ele substitui o grafo padrão atomicamente.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Envia ao Fuseki apenas a diferença em relação à última ingestão.")
+    parser.add_argument('--snapshot', default=SNAPSHOT_PATH,
+                        help="Snapshot do grafo (.pickle binário ou .nt) carregado pelo backend local do app.py (use '' para não gravar). "
+                             "No modo streaming, ele é gravado a partir do arquivo --output.")
+    parser.add_argument('--skip-upload', action='store_true',
+                        help="Não envia nada ao Fuseki (para uso apenas com o backend local).")
+    parser.add_argument('--bbox', action='store_true',
+                        help="Calcula também as caixas envolventes da geometria (mais lento) nas colunas de propriedades.")
+    parser.add_argument('--skip-properties', action='store_true',
+                        help="Não extrai as propriedades numéricas (psets, quantidades) para o armazenamento colunar.")
+    parser.add_argument('--force', action='store_true',
+                        help="Executa todas as etapas, mesmo as que o cache de construção pularia.")
+    args = parser.parse_args()
+    if args.incremental and args.stream:
+        parser.error("--incremental não pode ser combinado com --stream.")
+    if args.incremental and args.bulk:
+        parser.error("--incremental não pode ser combinado com --bulk.")
+    if args.stream and args.snapshot and not args.output:
+        parser.error("No modo --stream, o snapshot é gravado a partir do arquivo --output; informe-o ou use --snapshot ''.")
+    return args
+
 # --- BLOCO DE EXECUÇÃO PRINCIPAL ---
 # Este bloco só é executado quando o script é chamado diretamente (ex: 'python setup.py').
 if __name__ == "__main__":
+    args = parse_args()
+    ifc_paths = expand_ifc_paths(args.ifc)
     print("Iniciando configuração completa...")
-    # 1. Converte o arquivo IFC para um grafo RDF.
-    rdf_graph = run_ifc_conversion()
-    # 2. Se a conversão e o upload para o Fuseki forem bem-sucedidos...
-    if rdf_graph and upload_to_fuseki(rdf_graph):
-        # 3. ...então treina o modelo de NLU.
-        run_nlu_training()
+    cache = BuildCache(force=args.force)
+    with cache.timed("hash das entradas"):
+        graph_key = graph_cache_key(cache, ifc_paths)
+    load_key = load_cache_key(graph_key, args.skip_upload)
+    snapshot_key = digest("snapshot", graph_key, os.path.abspath(args.snapshot)) if args.snapshot else None
+    load_fresh = load_is_fresh(cache, load_key, args.skip_upload)
+    # Artefatos em disco que a execução atual deve deixar prontos: o snapshot e, no streaming, o arquivo N-Triples.
+    outputs_fresh = snapshot_key is None or cache.is_fresh("snapshot", snapshot_key, args.snapshot)
+    if args.stream:
+        outputs_fresh = outputs_fresh and (not args.output or os.path.exists(args.output))
+    triples = None  # Triplos carregados, registrados no cache quando a carga é feita.
+    if load_fresh and outputs_fresh:
+        # 1-2. O mesmo grafo já foi convertido e carregado: não há nada a refazer.
+        print("-> O modelo IFC e o conversor não mudaram desde a última carga. Conversão e carga puladas (use --force para refazer).")
+        cache.timings.append(("conversão e carga", 0.0, True))
+        loaded = True
+    elif args.stream and args.skip_upload:
+        # 1. Converte em blocos gravados apenas em disco.
+        with cache.timed("conversão (streaming)"):
+            summary = SummaryBuilder()
+            loaded = stream_ifc_files(ifc_paths, args.output or None, args.batch_size, summary=summary, workers=args.workers)
+            if loaded:
+                triples = record_stream_ingest(cache, summary, args.output, args.snapshot, snapshot_key)
+                loaded = triples is not None
+    elif args.stream and args.bulk:
+        # 1-2. Converte em blocos e envia cada bloco pelo carregador em massa.
+        with cache.timed("conversão e carga (streaming)"):
+            started = start_bulk_load(args.gzip, args.staging_graph, args.retries)
+            summary = SummaryBuilder()
+            loaded = bool(started) and stream_ifc_files(ifc_paths, args.output or None, args.batch_size, sink=started[1], summary=summary, workers=args.workers)
+            if started and loaded:
+                loaded = finish_bulk_load(*started, args.staging_graph)
+            elif started:
+                started[0].close()
+            if loaded:
+                clear_ingest_state()
+                triples = record_stream_ingest(cache, summary, args.output, args.snapshot, snapshot_key)
+                loaded = triples is not None
+    elif args.stream:
+        # 1-2. Converte em blocos, enviando cada bloco direto para o Fuseki à medida que é gerado.
+        with cache.timed("conversão e carga (streaming)"):
+            summary = SummaryBuilder()
+            loaded = clear_fuseki_graph() and stream_ifc_files(ifc_paths, args.output or None, args.batch_size, sink=upload_ntriples_chunk, summary=summary, workers=args.workers)
+            if loaded:
+                clear_ingest_state()
+                triples = record_stream_ingest(cache, summary, args.output, args.snapshot, snapshot_key)
+                loaded = triples is not None
+    else:
+        # 1. Converte o(s) arquivo(s) IFC para um grafo RDF (ou reaproveita o grafo do cache).
+        with cache.timed("conversão") as stage:
+            rdf_graph = convert_with_cache(cache, graph_key, ifc_paths, args.workers, stage)
+        # Grava o snapshot usado pelo backend local da aplicação (BIM_STORE_BACKEND=local).
+        if rdf_graph and snapshot_key:
+            with cache.timed("snapshot") as stage:
+                if cache.is_fresh("snapshot", snapshot_key, args.snapshot):
+                    stage["reused"] = True
+                else:
+                    save_snapshot(rdf_graph, args.snapshot)
+                    cache.mark("snapshot", snapshot_key)
+                    print(f"-> Snapshot do grafo salvo em '{args.snapshot}'.")
+        # 2. Se a conversão e o upload (completo ou incremental) para o Fuseki forem bem-sucedidos...
+        with cache.timed("carga") as stage:
+            if not rdf_graph:
+                loaded = False
+            elif load_fresh:
+                print("-> O mesmo grafo já está carregado. Carga pulada (use --force para refazer).")
+                stage["reused"] = loaded = True
+            elif args.skip_upload:
+                # Nada foi enviado ao Fuseki: o estado da última ingestão continua sendo o do servidor.
+                record_full_ingest(rdf_graph, uploaded=False)
+                loaded = True
+            elif args.incremental:
+                loaded = sync_to_fuseki(rdf_graph)
+            elif (bulk_upload_to_fuseki(rdf_graph, args.chunk_size, args.gzip, args.staging_graph, args.retries)
+                  if args.bulk else upload_to_fuseki(rdf_graph)):
+                # Guarda o estado desta carga para que a próxima possa ser incremental.
+                record_full_ingest(rdf_graph)
+                loaded = True
+            else:
+                loaded = False
+            if loaded and not stage["reused"]:
+                triples = len(rdf_graph)
+    if loaded and triples is not None and not args.skip_upload:
+        # Registra a contagem do próprio Fuseki, a mesma que 'load_is_fresh' consulta na próxima
+        # execução (a contagem local pode diferir, ex: triplos já existentes no servidor).
+        triples = fuseki_triple_count()
+    if loaded and triples is not None:
+        cache.mark("carga", load_key, triples=triples)
+    if loaded and not args.skip_properties:
+        # 3. Extrai as propriedades numéricas para o armazenamento colunar.
+        properties_key = properties_cache_key(graph_key, args.bbox)
+        with cache.timed("propriedades numéricas") as stage:
+            if cache.is_fresh("propriedades", properties_key, os.path.join(COLUMNS_DIR, COLUMNS_MANIFEST)):
+                print("-> Propriedades numéricas inalteradas. Extração pulada.")
+                stage["reused"] = True
+            else:
+                loaded = run_property_extraction(ifc_paths, bbox=args.bbox)
+                if loaded: cache.mark("propriedades", properties_key)
+    if loaded:
+        # 4. ...então treina o modelo de NLU (se os dados de treino mudaram).
+        nlu_key = nlu_cache_key()
+        with cache.timed("treinamento do NLU") as stage:
+            if cache.is_fresh("nlu", nlu_key, NLU_MODEL_PATH):
+                print(f"-> Dados de treino inalterados. Modelo de NLU em '{NLU_MODEL_PATH}' reaproveitado.")
+                stage["reused"] = True
+            else:
+                run_nlu_training()
+                cache.mark("nlu", nlu_key)
         print("\nConfiguração concluída. Agora você pode executar 'python app.py' para iniciar o servidor.")
     else:
         print("\nConfiguração falhou.")
+    cache.report()
@@ -0,0 +1,109 @@
+# Backends de armazenamento do grafo de conhecimento.
+# A aplicação conversa com o grafo apenas pelo método 'select', que recebe uma consulta SPARQL
+# e devolve a lista de resultados no mesmo formato JSON do protocolo SPARQL
+# ([{"variavel": {"type": ..., "value": ...}}, ...]), independente de onde o grafo está.
+import os  # Para ler as variáveis de ambiente e verificar caminhos.
+import pickle  # Para gravar/ler o snapshot binário do grafo.
+import json  # Para ler o arquivo de versão do conjunto de dados.
+import threading  # O analisador SPARQL do rdflib não pode ser usado por várias threads ao mesmo tempo.
+from rdflib import Graph, URIRef, BNode  # Para manter o grafo em memória no backend local.
+from SPARQLWrapper import SPARQLWrapper, JSON  # Para se conectar e fazer consultas ao servidor SPARQL (Fuseki).
+
+# --- Configurações ---
+# Backend usado pela aplicação: 'fuseki' (servidor remoto) ou 'local' (grafo em memória no próprio processo).
+STORE_BACKEND = os.environ.get("BIM_STORE_BACKEND", "fuseki")
+# Pasta onde o setup.py grava os artefatos gerados (snapshot, versão, estados de ingestão).
+DATA_DIR = os.environ.get("BIM_DATA_DIR", "./data")
+# Snapshot do grafo gerado pelo setup.py e carregado pelo backend local (.pickle ou .nt).
+SNAPSHOT_PATH = os.environ.get("BIM_SNAPSHOT_PATH", os.path.join(DATA_DIR, "snapshot.pickle"))
+# Arquivo com a versão atual do conjunto de dados, incrementada pelo setup.py a cada carga.
+DATASET_VERSION_FILE = os.path.join(DATA_DIR, 'versao.json')
+
+# --- Versão do Conjunto de Dados ---
+# Lê as informações da última carga feita pelo setup.py ({"version": 0} se nunca houve carga).
+# Cargas incrementais trazem também as listas de triplos 'added' e 'removed' (N-Triples).
+def read_dataset_version():
+    try:
+        with open(DATASET_VERSION_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {"version": 0}
+
+# --- Snapshots ---
+# Grava o grafo em disco. O formato é escolhido pela extensão: '.nt' gera N-Triples (legível e
+# aceito por qualquer triplestore); qualquer outra gera um snapshot binário (pickle), mais rápido de carregar.
+def save_snapshot(graph, path=SNAPSHOT_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if path.endswith('.nt'):
+        graph.serialize(destination=path, format='nt', encoding='utf-8')
+    else:
+        with open(path, 'wb') as f:
+            pickle.dump(list(graph), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+# Lê um snapshot gravado por 'save_snapshot' e devolve um grafo rdflib.
+def load_snapshot(path=SNAPSHOT_PATH):
+    g = Graph()
+    if path.endswith('.nt'):
+        g.parse(path, format='nt')
+    else:
+        with open(path, 'rb') as f:
+            g.addN((s, p, o, g) for s, p, o in pickle.load(f))
+    return g
+
+# --- Backends ---
+# Backend remoto: envia as consultas ao Apache Jena Fuseki via HTTP.
+class FusekiStore:
+    name = "fuseki"
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+
+    def select(self, query):
+        sparql = SPARQLWrapper(self.endpoint)
+        sparql.setReturnFormat(JSON)
+        sparql.setQuery(query)
+        return sparql.query().convert()["results"]["bindings"]
+
+# Backend local: mantém o grafo em memória (o store do rdflib é indexado por sujeito, predicado
+# e objeto) e executa as consultas no próprio processo, sem nenhuma ida e volta pela rede.
+class LocalStore:
+    name = "local"
+
+    def __init__(self, snapshot_path=SNAPSHOT_PATH, graph=None):
+        self.snapshot_path = snapshot_path
+        self.graph = graph if graph is not None else load_snapshot(snapshot_path)
+        self.lock = threading.Lock()
+
+    # Recarrega o grafo a partir do snapshot (ex: depois de uma nova execução do setup.py).
+    def reload(self):
+        self.graph = load_snapshot(self.snapshot_path)
+
+    def select(self, query):
+        # As consultas são serializadas: o analisador SPARQL do rdflib não é seguro entre threads
+        # (o Flask e o modo assíncrono atendem requisições em várias threads).
+        with self.lock:
+            result = self.graph.query(query)
+            rows = list(result)
+        bindings = []
+        for row in rows:
+            binding = {}
+            for var in result.vars:
+                term = row[var]
+                if term is None:
+                    continue
+                if isinstance(term, URIRef):
+                    binding[str(var)] = {"type": "uri", "value": str(term)}
+                elif isinstance(term, BNode):
+                    binding[str(var)] = {"type": "bnode", "value": str(term)}
+                else:
+                    binding[str(var)] = {"type": "literal", "value": str(term)}
+            bindings.append(binding)
+        return bindings
+
+# Cria o backend configurado em BIM_STORE_BACKEND.
+def create_store(fuseki_endpoint):
+    if STORE_BACKEND == "local":
+        return LocalStore(SNAPSHOT_PATH)
+    if STORE_BACKEND != "fuseki":
+        raise ValueError(f"Backend de armazenamento desconhecido: '{STORE_BACKEND}'. Use 'fuseki' ou 'local'.")
+    return FusekiStore(fuseki_endpoint)
@@ -0,0 +1,218 @@
+# Resumo estatístico do modelo, calculado na ingestão (setup.py) e servido da memória pela aplicação.
+# Contém a contagem de instâncias de cada classe com alguns exemplos, o histograma dos predicados
+# e a distribuição dos elementos por material e por elemento espacial (pavimentos, espaços, etc.).
+# O resumo é gravado em um arquivo JSON junto com a versão dos dados; nas cargas incrementais,
+# só as classes, materiais e contêineres afetados pelo delta são recalculados.
+import os  # Para ler as variáveis de ambiente e verificar o arquivo do resumo.
+import json  # Para gravar/ler o resumo.
+import threading  # Para que duas requisições não releiam o arquivo ao mesmo tempo.
+from rdflib import Graph, URIRef  # Para ler os triplos dos deltas.
+from rdflib.namespace import RDF, RDFS  # Predicados 'type' e 'label'.
+
+# --- Configurações ---
+DATA_DIR = os.environ.get("BIM_DATA_DIR", "./data")
+# Arquivo do resumo gravado pelo setup.py e lido pela aplicação.
+SUMMARY_PATH = os.environ.get("BIM_SUMMARY_PATH", os.path.join(DATA_DIR, "resumo.json"))
+# Exemplos guardados por classe (os primeiros labels em ordem alfabética).
+SUMMARY_TOP_K = int(os.environ.get("BIM_SUMMARY_TOP_K", "10"))
+
+BASE_URI = "http://exemplo.org/bim#"
+HAS_MATERIAL = URIRef(BASE_URI + 'hasMaterial')
+IS_CONTAINED_IN = URIRef(BASE_URI + 'isContainedIn')
+
+# Nome local de uma IRI (ex: 'hasMaterial' em 'http://exemplo.org/bim#hasMaterial').
+def local_name(iri):
+    return str(iri).rsplit('#', 1)[-1].rsplit('/', 1)[-1]
+
+class SummaryBuilder:
+    """
+    Acumula as estatísticas a partir dos triplos, em qualquer ordem (ex: os blocos da conversão
+    em streaming). 'finish' devolve o resumo no formato gravado em disco.
+    """
+
+    def __init__(self, top_k=SUMMARY_TOP_K):
+        self.top_k = top_k
+        # Os labels e as instâncias ficam em conjuntos: um triplo recebido mais de uma vez
+        # (ex: o mesmo elemento em dois arquivos convertidos em streaming) conta uma vez só.
+        self.labels = {}  # nó -> labels
+        self.members = {}  # classe -> instâncias
+        self.predicates = {}  # predicado -> quantidade de triplos (exceto label e type)
+        self.materials = {}  # material -> quantidade de elementos
+        self.containers = {}  # elemento espacial -> quantidade de elementos contidos
+
+    def add(self, s, p, o):
+        if p == RDFS.label:
+            self.labels.setdefault(s, set()).add(str(o))
+            return
+        if p == RDF.type:
+            self.members.setdefault(o, set()).add(s)
+            return
+        self.predicates[str(p)] = self.predicates.get(str(p), 0) + 1
+        if p == HAS_MATERIAL:
+            self.materials[o] = self.materials.get(o, 0) + 1
+        elif p == IS_CONTAINED_IN:
+            self.containers[o] = self.containers.get(o, 0) + 1
+
+    def update(self, triples):
+        for s, p, o in triples:
+            self.add(s, p, o)
+        return self
+
+    # Acrescenta as estatísticas acumuladas por outro SummaryBuilder (ex: as de uma fatia
+    # convertida em outro processo).
+    def merge(self, other):
+        for node, labels in other.labels.items():
+            self.labels.setdefault(node, set()).update(labels)
+        for type_node, members in other.members.items():
+            self.members.setdefault(type_node, set()).update(members)
+        for mine, theirs in ((self.predicates, other.predicates), (self.materials, other.materials), (self.containers, other.containers)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+        return self
+
+    # Label de um nó no resumo (o primeiro em ordem alfabética) ou o nome local da IRI.
+    def label(self, node):
+        labels = self.labels.get(node)
+        return min(labels) if labels else local_name(node)
+
+    def finish(self, version=None):
+        class_of = {}
+        for type_node, members in self.members.items():
+            for member in members:
+                if member in self.containers:
+                    class_of.setdefault(member, self.label(type_node))
+        predicates = dict(self.predicates)
+        predicates[str(RDFS.label)] = sum(len(labels) for labels in self.labels.values())
+        predicates[str(RDF.type)] = sum(len(members) for members in self.members.values())
+        return {
+            "version": version,
+            "triples": sum(predicates.values()),
+            "types": {str(t): {"label": self.label(t), "count": len(members),
+                               "examples": sorted({self.label(m) for m in members if m in self.labels})[:self.top_k]}
+                      for t, members in self.members.items()},
+            "predicates": {p: count for p, count in predicates.items() if count},
+            "materials": {str(m): {"label": self.label(m), "count": count} for m, count in self.materials.items()},
+            "containers": {str(c): {"label": self.label(c), "type": class_of.get(c), "count": count}
+                           for c, count in self.containers.items()},
+        }
+
+# Calcula o resumo completo de um grafo rdflib.
+def compute_summary(graph, version=None, top_k=SUMMARY_TOP_K):
+    return SummaryBuilder(top_k).update(graph).finish(version)
+
+# --- Atualização Incremental ---
+# Label de um nó no grafo (o primeiro em ordem alfabética) ou o nome local da IRI.
+def graph_label(graph, node):
+    labels = sorted(str(label) for label in graph.objects(node, RDFS.label))
+    return labels[0] if labels else local_name(node)
+
+def apply_summary_delta(summary, graph, added, removed, version, top_k=SUMMARY_TOP_K):
+    """
+    Atualiza o resumo com os triplos (linhas N-Triples) adicionados e removidos por uma carga
+    incremental. 'graph' é o grafo novo completo: as classes, os materiais e os contêineres
+    tocados pelo delta são recontados nele; o restante do resumo é reaproveitado.
+    """
+    touched_types, touched_materials, touched_containers, relabeled = set(), set(), set(), set()
+    for lines, sign in ((removed, -1), (added, 1)):
+        if not lines:
+            continue
+        for s, p, o in Graph().parse(data="\n".join(lines), format='nt'):
+            key = str(p)
+            summary["predicates"][key] = summary["predicates"].get(key, 0) + sign
+            if summary["predicates"][key] <= 0:
+                del summary["predicates"][key]
+            if p == RDF.type:
+                touched_types.add(o)
+                if str(s) in summary["containers"]:
+                    touched_containers.add(s)
+            elif p == HAS_MATERIAL:
+                touched_materials.add(o)
+            elif p == IS_CONTAINED_IN:
+                touched_containers.add(o)
+            elif p == RDFS.label:
+                relabeled.add(s)
+    # Um label novo muda os exemplos das classes do nó e, se for ele próprio uma classe,
+    # um material ou um contêiner, o nome com que aparece no resumo.
+    for node in relabeled:
+        touched_types.update(graph.objects(node, RDF.type))
+        for section, touched in (("types", touched_types), ("materials", touched_materials), ("containers", touched_containers)):
+            if str(node) in summary[section]:
+                touched.add(node)
+    for type_node in touched_types:
+        members = set(graph.subjects(RDF.type, type_node))
+        if not members:
+            summary["types"].pop(str(type_node), None)
+            continue
+        examples = sorted({graph_label(graph, m) for m in members if (m, RDFS.label, None) in graph})
+        summary["types"][str(type_node)] = {"label": graph_label(graph, type_node), "count": len(members), "examples": examples[:top_k]}
+    for section, predicate, touched in (("materials", HAS_MATERIAL, touched_materials), ("containers", IS_CONTAINED_IN, touched_containers)):
+        for node in touched:
+            count = sum(1 for _ in graph.subjects(predicate, node))
+            if not count:
+                summary[section].pop(str(node), None)
+                continue
+            entry = {"label": graph_label(graph, node), "count": count}
+            if section == "containers":
+                types = sorted(graph_label(graph, t) for t in graph.objects(node, RDF.type))
+                entry["type"] = types[0] if types else None
+            summary[section][str(node)] = entry
+    summary["triples"] = len(graph)
+    summary["version"] = version
+    return summary
+
+# --- Persistência ---
+def save_summary(summary, path=SUMMARY_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False)
+
+# Lê o resumo gravado ou devolve None se ele não existir ou estiver corrompido.
+def load_summary(path=SUMMARY_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+# Resposta da rota '/summary': listas ordenadas da maior para a menor contagem.
+def by_count(key):
+    return lambda item: (-item["count"], item[key] or "")
+
+def summary_payload(summary):
+    return {
+        "version": summary["version"],
+        "triples": summary["triples"],
+        "types": sorted(({"type": t["label"], "count": t["count"], "examples": t["examples"]}
+                         for t in summary["types"].values()), key=by_count("type")),
+        "predicates": sorted(({"predicate": local_name(p), "iri": p, "count": count}
+                              for p, count in summary["predicates"].items()), key=by_count("predicate")),
+        "materials": sorted(({"material": m["label"], "count": m["count"]} for m in summary["materials"].values()), key=by_count("material")),
+        "containers": sorted(({"container": c["label"], "type": c["type"], "count": c["count"]}
+                              for c in summary["containers"].values()), key=by_count("container")),
+    }
+
+class SummaryCache:
+    """
+    Mantém na memória o resumo da versão atual dos dados. O arquivo só é relido quando muda;
+    um resumo de outra versão (ex: a carga não gerou o resumo) é ignorado.
+    """
+
+    def __init__(self, path=SUMMARY_PATH):
+        self.path = path
+        self.payload = None
+        self.mtime = None
+        self.lock = threading.Lock()
+
+    def get(self, version):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return None
+        if mtime != self.mtime:
+            with self.lock:
+                if mtime != self.mtime:
+                    summary = load_summary(self.path)
+                    self.payload = summary_payload(summary) if summary else None
+                    self.mtime = mtime
+        payload = self.payload
+        return payload if payload is not None and payload["version"] == version else None
@@ -0,0 +1,68 @@
+# Configuração comum dos testes (execute 'python -m pytest -q' dentro da pasta 'codigo').
+# A aplicação lê as variáveis de ambiente na importação, então a pasta de dados temporária,
+# o backend local e o snapshot de um modelo pequeno são preparados antes de qualquer teste
+# importar o app.py. Nenhum teste precisa do Fuseki.
+import os  # Para configurar as variáveis de ambiente.
+import sys  # Para importar os módulos da pasta 'codigo'.
+import json  # Para gravar o arquivo de versão dos dados.
+import shutil  # Para apagar a pasta de dados ao final.
+import tempfile  # Pasta de dados isolada da pasta './data' real.
+import pytest
+from rdflib import Graph, Literal, Namespace  # Para montar o modelo de teste.
+from rdflib.namespace import RDF, RDFS  # Vocabulários RDF e RDFS padrão.
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = tempfile.mkdtemp(prefix="bim-testes-")
+
+os.environ["BIM_DATA_DIR"] = DATA_DIR
+os.environ["BIM_STORE_BACKEND"] = "local"
+os.environ["BIM_SNAPSHOT_PATH"] = os.path.join(DATA_DIR, "snapshot.pickle")
+os.environ["BIM_SUMMARY_PATH"] = os.path.join(DATA_DIR, "resumo.json")
+os.environ["BIM_BUILD_CACHE_DIR"] = os.path.join(DATA_DIR, "cache")
+# Cada requisição confere a versão dos dados (sem o intervalo entre verificações).
+os.environ["BIM_INDEX_REFRESH_INTERVAL"] = "0"
+sys.path.insert(0, CODE_DIR)
+
+from store import save_snapshot  # noqa: E402 (depois das variáveis de ambiente)
+
+inst = Namespace("http://exemplo.org/bim#")
+
+# Modelo pequeno com a mesma forma dos triplos gerados pelo setup.py: um projeto que agrega um
+# edifício com dois pavimentos, e paredes contidas nos pavimentos, com material e tipo.
+# 'materials' escolhe o material de cada parede (as pares de concreto e as ímpares de tijolo, por padrão).
+def build_model_graph(walls=6, names=None, materials=None):
+    g = Graph()
+    for uri, name in ((inst.Projeto, "Projeto"), (inst.Casa, "Casa"), (inst.Terreo, "Térreo"), (inst.Superior, "Superior"),
+                      (inst.Concreto, "Concreto"), (inst.Tijolo, "Tijolo"), (inst.TipoParede, "Parede Padrão")):
+        g.add((uri, RDFS.label, Literal(name)))
+    for uri, class_name in ((inst.Projeto, "IfcProject"), (inst.Casa, "IfcBuilding"), (inst.Terreo, "IfcBuildingStorey"),
+                            (inst.Superior, "IfcBuildingStorey"), (inst.TipoParede, "IfcWallType")):
+        g.add((uri, RDF.type, inst[class_name]))
+        g.add((inst[class_name], RDFS.label, Literal(class_name)))
+    g.add((inst.Projeto, inst.aggregates, inst.Casa))
+    g.add((inst.Casa, inst.aggregates, inst.Terreo))
+    g.add((inst.Casa, inst.aggregates, inst.Superior))
+    g.add((inst.IfcWall, RDFS.label, Literal("IfcWall")))
+    for i in range(walls):
+        wall = inst[f"Parede{i}"]
+        g.add((wall, RDFS.label, Literal((names or {}).get(i, f"Parede {i}"))))
+        g.add((wall, RDF.type, inst.IfcWall))
+        g.add((wall, inst.isContainedIn, inst.Terreo if i < 4 else inst.Superior))
+        g.add((wall, inst.hasMaterial, (materials or {}).get(i, inst.Concreto if i % 2 == 0 else inst.Tijolo)))
+        g.add((wall, inst.isOfType, inst.TipoParede))
+    return g
+
+# Snapshot e versão dos dados lidos pelo app.py na importação.
+save_snapshot(build_model_graph(), os.environ["BIM_SNAPSHOT_PATH"])
+with open(os.path.join(DATA_DIR, "versao.json"), "w", encoding="utf-8") as f:
+    json.dump({"version": 1}, f)
+
+# Os testes montam variações do modelo (ex: o antes e o depois de uma carga incremental).
+@pytest.fixture
+def build_graph():
+    return build_model_graph
+
+@pytest.fixture(scope="session", autouse=True)
+def data_dir():
+    yield DATA_DIR
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
@@ -0,0 +1,67 @@
+# Cache de respostas: uma nova versão dos dados (versao.json gravado pelo setup.py) esvazia o
+# cache e as respostas seguintes são montadas e guardadas com a versão nova na chave.
+import time
+import pytest
+import app as bim_app
+import setup
+from cache import ResponseCache
+
+QUERY = {"format": "compact", "limit": 3}
+
+@pytest.fixture
+def client():
+    return bim_app.app.test_client()
+
+def cached_versions():
+    return {key[2] for key in bim_app.response_cache.entries}
+
+def test_response_is_served_from_cache(client):
+    first = client.get("/full-graph-data", query_string=QUERY)
+    hits = bim_app.response_cache.snapshot()["hits"]
+    second = client.get("/full-graph-data", query_string=QUERY)
+    assert second.get_data() == first.get_data()
+    assert bim_app.response_cache.snapshot()["hits"] == hits + 1
+
+def test_version_bump_invalidates_cache(client):
+    client.get("/full-graph-data", query_string=QUERY)
+    before = bim_app.response_cache.snapshot()
+    old_version = bim_app.dataset_version
+    assert before["entries"] >= 1 and cached_versions() == {old_version}
+
+    new_version = setup.bump_dataset_version()
+    response = client.get("/full-graph-data", query_string=QUERY)
+
+    after = bim_app.response_cache.snapshot()
+    assert new_version == old_version + 1 == bim_app.dataset_version
+    assert after["invalidations"] == before["invalidations"] + 1
+    assert after["entries"] == 1 and cached_versions() == {new_version}
+    assert response.get_json()["version"] == new_version
+    # Um cursor da página anterior ao novo carregamento passa a ser recusado.
+    stale = client.get("/full-graph-data", query_string=dict(QUERY, cursor=f"{old_version}.0.0.0"))
+    assert stale.status_code == 400
+
+def test_same_version_keeps_cache(client):
+    client.get("/full-graph-data", query_string=QUERY)
+    invalidations = bim_app.response_cache.snapshot()["invalidations"]
+    bim_app.sync_with_dataset()
+    assert bim_app.response_cache.snapshot()["invalidations"] == invalidations
+    assert bim_app.response_cache.snapshot()["entries"] >= 1
+
+def test_invalidate_route_empties_cache(client):
+    client.get("/full-graph-data", query_string=QUERY)
+    assert client.post("/cache/invalidate").status_code == 200
+    assert bim_app.response_cache.snapshot()["entries"] == 0
+
+def test_response_cache_limits():
+    cache = ResponseCache(max_bytes=10, ttl=60)
+    cache.put("a", b"12345"); cache.put("b", b"12345")
+    cache.get("a")
+    cache.put("c", b"123")  # Passa do limite: sai a entrada menos usada ('b').
+    assert cache.get("b") is None and cache.get("a") == b"12345" and cache.get("c") == b"123"
+    cache.put("grande", b"x" * 11)
+    assert cache.get("grande") is None
+    expired = ResponseCache(max_bytes=10, ttl=0)
+    expired.put("a", b"1"); time.sleep(0.001)
+    assert expired.get("a") is None and expired.snapshot()["expirations"] == 1
+    cache.invalidate()
+    assert cache.snapshot()["entries"] == 0 and cache.bytes == 0 and cache.snapshot()["invalidations"] == 1
@@ -0,0 +1,29 @@
+# Armazenamento colunar: filtro por classe com as subclasses e retenção das gerações gravadas.
+import os
+import columnar
+
+ROWS = [("a", "IfcWall", {"Espessura": 0.2}), ("b", "IfcWallStandardCase", {"Espessura": 0.3}),
+        ("c", "IfcSlab", {"Espessura": 0.25})]
+SUPERTYPES = {"IfcWall": ["IfcBuiltElement"], "IfcWallStandardCase": ["IfcWall", "IfcBuiltElement"],
+              "IfcSlab": ["IfcBuiltElement"]}
+
+def global_ids(store, rows):
+    return sorted(str(store.ids[i]) for i in rows)
+
+def test_class_filter_includes_subclasses(tmp_path):
+    columnar.write_columns(ROWS, str(tmp_path), SUPERTYPES)
+    store = columnar.ColumnarStore(str(tmp_path))
+    assert global_ids(store, store.filter([], ["IfcWall"])) == ["a", "b"]
+    assert global_ids(store, store.filter([], ["IfcWallStandardCase"])) == ["b"]
+    assert global_ids(store, store.filter([], ["IfcBuiltElement"])) == ["a", "b", "c"]
+    assert global_ids(store, store.filter([(["Espessura"], ">", 0.22)], ["IfcWall"])) == ["b"]
+
+def test_class_filter_without_supertypes_is_exact(tmp_path):
+    columnar.write_columns(ROWS, str(tmp_path))
+    store = columnar.ColumnarStore(str(tmp_path))
+    assert global_ids(store, store.filter([], ["IfcWall"])) == ["a"]
+
+def test_previous_generation_is_kept_until_the_next_write(tmp_path):
+    generations = [columnar.write_columns(ROWS, str(tmp_path))["generation"] for _ in range(3)]
+    assert sorted(name for name in os.listdir(tmp_path) if name.startswith("g")) == sorted(generations[1:])
+    assert columnar.current_generation(str(tmp_path)) == generations[-1]
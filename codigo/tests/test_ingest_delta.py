@@ -0,0 +1,73 @@
+# Carga incremental: o delta calculado pelos fingerprints, aplicado ao índice e ao resumo,
+# deve dar o mesmo resultado que reconstruir tudo a partir do grafo novo.
+import pytest
+import setup
+from rdflib import Namespace
+from graph_index import GraphIndex
+from store import LocalStore
+from summary import compute_summary, apply_summary_delta
+
+inst = Namespace("http://exemplo.org/bim#")
+
+@pytest.fixture(autouse=True)
+def ingest_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(setup, "INGEST_STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(setup, "INGEST_TRIPLES_FILE", str(tmp_path / "triplos.nt"))
+    monkeypatch.setattr(setup, "INGEST_FINGERPRINTS_FILE", str(tmp_path / "fingerprints.json"))
+
+@pytest.fixture
+def graphs(build_graph):
+    # Parede 0 trocada para tijolo, parede 1 renomeada, parede 5 removida e parede 6 nova.
+    new = build_graph(walls=7, names={1: "Parede Norte"}, materials={0: inst.Tijolo})
+    new.remove((inst.Parede5, None, None))
+    return build_graph(walls=6), new
+
+# Conteúdo do índice independente dos ids inteiros (que dependem da ordem de inserção).
+def index_contents(index):
+    labels = {index.iris[node]: sorted(names) for node, names in index.labels.items() if names}
+    edges = {(name, index.iris[s], index.iris[o]) for name, adjacency in index.forward.items()
+             for s, objects in adjacency.items() for o in objects}
+    return labels, edges
+
+def ingest(graph):
+    lines = setup.graph_to_ntriples_lines(graph)
+    return lines, setup.fingerprint_entities(lines)
+
+def test_first_ingest_has_no_delta(graphs):
+    assert setup.compute_ingest_delta(*ingest(graphs[0])) is None
+
+def test_unchanged_model_has_empty_delta(graphs):
+    setup.save_ingest_state(*ingest(graphs[0]))
+    assert setup.compute_ingest_delta(*ingest(graphs[0])) == ([], [])
+
+def test_delta_contains_only_changed_triples(graphs):
+    old_lines, new_lines = setup.graph_to_ntriples_lines(graphs[0]), setup.graph_to_ntriples_lines(graphs[1])
+    setup.save_ingest_state(*ingest(graphs[0]))
+    added, removed = setup.compute_ingest_delta(*ingest(graphs[1]))
+    assert added == sorted(set(new_lines) - set(old_lines))
+    assert removed == sorted(set(old_lines) - set(new_lines))
+    assert {setup.entity_key(line) for line in added + removed} == {"Parede0", "Parede1", "Parede5", "Parede6"}
+
+def test_clear_ingest_state_forces_full_load(graphs):
+    setup.save_ingest_state(*ingest(graphs[0]))
+    setup.clear_ingest_state()
+    assert setup.compute_ingest_delta(*ingest(graphs[1])) is None
+
+def test_index_delta_matches_rebuild(graphs):
+    old, new = graphs
+    setup.save_ingest_state(*ingest(old))
+    added, removed = setup.compute_ingest_delta(*ingest(new))
+    index = GraphIndex.build(LocalStore(graph=old), version=1)
+    index.apply_delta(added, removed, version=2)
+    assert index.version == 2
+    assert index_contents(index) == index_contents(GraphIndex.build(LocalStore(graph=new), version=2))
+    assert "Parede 1" not in index.label_ids and "Parede 5" not in index.label_ids
+    assert index.lookup("Parede 0", "hasMaterial") == (["Tijolo"], [])
+    assert index.lookup("Parede Norte", "isContainedIn") == (["Térreo"], [])
+
+def test_summary_delta_matches_recount(graphs):
+    old, new = graphs
+    setup.save_ingest_state(*ingest(old))
+    added, removed = setup.compute_ingest_delta(*ingest(new))
+    summary = apply_summary_delta(compute_summary(old, 1), new, added, removed, 2)
+    assert summary == compute_summary(new, 2)
@@ -0,0 +1,22 @@
+# Layout no servidor: o grafo completo usa as posições do layout global; uma vizinhança recebe
+# um layout próprio, calculado só com os seus nós.
+import app as bim_app
+from layout import apply_local_layout
+
+def test_neighbourhood_gets_its_own_layout():
+    client = bim_app.app.test_client()
+    payload = client.get("/graph-data", query_string={"object_name": "Térreo", "layout": "1"}).get_json()
+    assert payload["nodes"] and all("x" in node and "y" in node for node in payload["nodes"])
+    # Sem depender do layout global, a resposta já entra no cache na primeira requisição.
+    hits = bim_app.response_cache.snapshot()["hits"]
+    assert client.get("/graph-data", query_string={"object_name": "Térreo", "layout": "1"}).get_json() == payload
+    assert bim_app.response_cache.snapshot()["hits"] == hits + 1
+
+def test_local_layout_is_centred_and_deterministic():
+    payload = {"nodes": [{"id": f"n{i}"} for i in range(5)],
+               "edges": [{"from": "n0", "to": f"n{i}"} for i in range(1, 5)]}
+    first = apply_local_layout({"nodes": [dict(n) for n in payload["nodes"]], "edges": payload["edges"]})
+    second = apply_local_layout({"nodes": [dict(n) for n in payload["nodes"]], "edges": payload["edges"]})
+    assert first == second
+    assert abs(sum(n["x"] for n in first["nodes"])) < 1 and abs(sum(n["y"] for n in first["nodes"])) < 1
+    assert len({(n["x"], n["y"]) for n in first["nodes"]}) == 5
@@ -0,0 +1,16 @@
+# '/metrics': todas as amostras precisam ser numéricas, senão o Prometheus rejeita a coleta inteira.
+import app as bim_app
+from tracing import render_gauge
+
+def test_metrics_samples_are_numeric():
+    response = bim_app.app.test_client().get("/metrics")
+    assert response.status_code == 200
+    samples = [line for line in response.get_data(as_text=True).splitlines() if line and not line.startswith("#")]
+    assert any(line.startswith("bim_nlu_model_loaded ") for line in samples)
+    for line in samples:
+        float(line.rsplit(" ", 1)[1])
+
+def test_render_gauge_casts_booleans():
+    assert render_gauge("bim_x", "x", True)[-1] == "bim_x 1"
+    assert render_gauge("bim_x", "x", False)[-1] == "bim_x 0"
+    assert render_gauge("bim_x", "x", 2.5)[-1] == "bim_x 2.5"
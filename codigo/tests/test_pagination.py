@@ -0,0 +1,83 @@
+# Paginação por cursor de '/full-graph-data': seguir 'next_cursor' até o fim entrega cada
+# aresta do índice exatamente uma vez, na ordem de 'sorted_edges', em todos os formatos.
+import json
+import pytest
+import app as bim_app
+from graph_index import PREDICATE_ORDER
+
+@pytest.fixture
+def client():
+    return bim_app.app.test_client()
+
+@pytest.fixture
+def index():
+    return bim_app.get_graph_index()
+
+# Percorre todas as páginas e devolve a lista de páginas (JSON já interpretado).
+def walk_pages(client, **params):
+    pages, cursor = [], None
+    while True:
+        query = dict(params, cursor=cursor) if cursor else params
+        response = client.get("/full-graph-data", query_string=query)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        pages.append(response.get_json())
+        cursor = pages[-1]["next_cursor"]
+        if cursor is None:
+            return pages
+
+def test_compact_pages_cover_every_edge_once(client, index):
+    pages = walk_pages(client, format="compact", limit=4)
+    edges = [(p, s, o) for page in pages for s, p, o in page["edges"]]
+    assert edges == index.sorted_edges()
+    assert len(pages) == -(-len(edges) // 4)
+    assert all(len(page["edges"]) == 4 for page in pages[:-1])
+    # Todo nó de uma página vem com o seu label.
+    for page in pages:
+        assert {str(n) for s, _, o in page["edges"] for n in (s, o)} == set(page["labels"])
+
+def test_json_pages_match_compact_pages(client, index):
+    pages = walk_pages(client, format="json", limit=5)
+    edges = [(e["label"], e["from"], e["to"]) for page in pages for e in page["edges"]]
+    assert edges == [(PREDICATE_ORDER[p], index.iris[s], index.iris[o]) for p, s, o in index.sorted_edges()]
+    for page in pages:
+        assert {n["id"] for n in page["nodes"]} == {e[k] for e in page["edges"] for k in ("from", "to")}
+
+def test_ndjson_stream_resumes_from_cursor(client, index):
+    edges, cursor = [], None
+    while True:
+        query = {"format": "ndjson", "limit": 7, **({"cursor": cursor} if cursor else {})}
+        lines = [json.loads(line) for line in client.get("/full-graph-data", query_string=query).get_data(as_text=True).splitlines()]
+        assert lines[0]["predicates"] == PREDICATE_ORDER
+        edges += [tuple(line["edge"]) for line in lines if "edge" in line]
+        cursor = lines[-1].get("next_cursor")
+        if cursor is None:
+            break
+    assert [(p, s, o) for s, p, o in edges] == index.sorted_edges()
+
+def test_last_full_page_has_no_cursor(client, index):
+    pages = walk_pages(client, format="compact", limit=len(index.sorted_edges()))
+    assert len(pages) == 1
+
+def test_filters_are_kept_across_pages(client, index):
+    pages = walk_pages(client, format="compact", limit=2, predicate="hasMaterial", container="Térreo")
+    edges = [(p, s, o) for page in pages for s, p, o in page["edges"]]
+    walls = index.nodes_in_container("Térreo")
+    material = PREDICATE_ORDER.index("hasMaterial")
+    assert edges == [e for e in index.sorted_edges() if e[0] == material and e[1] in walls]
+    assert len(edges) == 4
+
+@pytest.mark.parametrize("cursor", ["abc", "1.2.3", "1.2.3.4.5", "x.1.2.3"])
+def test_invalid_cursor_is_rejected(client, cursor):
+    response = client.get("/full-graph-data", query_string={"format": "compact", "cursor": cursor})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Cursor inválido."
+
+def test_cursor_from_previous_version_is_rejected(client, index):
+    p, s, o = index.sorted_edges()[0]
+    response = client.get("/full-graph-data", query_string={"format": "compact", "cursor": f"{index.version - 1}.{p}.{s}.{o}"})
+    assert response.status_code == 400
+    assert "versão anterior" in response.get_json()["error"]
+
+def test_cursor_round_trip(index):
+    for edge in index.sorted_edges():
+        assert bim_app.decode_graph_cursor(index, bim_app.encode_graph_cursor(index, edge)) == edge
@@ -0,0 +1,45 @@
+# Conversão em streaming e paralela: cada triplo sai uma única vez, mesmo com blocos pequenos,
+# e os labels compartilhados (classes, tipos e materiais) não se repetem entre arquivos.
+import os
+import pytest
+import setup
+
+IFC_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Building-Architecture.ifc")
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+@pytest.fixture(scope="module")
+def converted():
+    return set(setup.graph_to_ntriples_lines(setup.run_ifc_conversion(IFC_PATH)))
+
+# Linhas 'rdfs:label' das classes e dos materiais (os nós que são objeto de rdf:type ou hasMaterial).
+# Os tipos (isOfType) são entidades do próprio arquivo, com GlobalId, e saem com os elementos.
+def shared_label_lines(lines):
+    shared = {line.split(" ")[2] for line in lines
+              if line.split(" ")[1].endswith(("#type>", "#hasMaterial>"))}
+    return [line for line in lines if line.split(" ")[0] in shared and line.split(" ")[1].endswith("#label>")]
+
+def test_streaming_emits_each_triple_once(tmp_path, converted):
+    output = str(tmp_path / "modelo.nt")
+    count = setup.run_streaming_conversion(IFC_PATH, output, batch_size=7)
+    lines = read_lines(output)
+    assert len(lines) == len(set(lines)) == count
+    assert set(lines) == converted
+
+def test_streaming_does_not_repeat_labels_across_files(tmp_path):
+    output = str(tmp_path / "modelos.nt")
+    assert setup.stream_ifc_files([IFC_PATH, IFC_PATH], output, batch_size=7)
+    shared = shared_label_lines(read_lines(output))
+    assert shared and len(shared) == len(set(shared))
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parallel_conversion_matches_serial(tmp_path, converted, workers):
+    output = str(tmp_path / "paralelo.nt")
+    count = setup.run_parallel_conversion([IFC_PATH, IFC_PATH], workers, output, batch_size=7)
+    lines = read_lines(output)
+    assert count == len(lines)
+    assert set(lines) == converted
+    shared = shared_label_lines(lines)
+    assert len(shared) == len(set(shared))
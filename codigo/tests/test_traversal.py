@@ -0,0 +1,74 @@
+# Gramática dos caminhos de '/traverse' e o percurso no índice em memória.
+import pytest
+import app as bim_app
+import traversal
+from graph_index import GraphIndex
+from store import LocalStore
+
+@pytest.fixture
+def index(build_graph):
+    return GraphIndex.build(LocalStore(graph=build_graph()), version=1)
+
+def ids_of(index, *labels):
+    return {node for label in labels for node in index.label_ids[label]}
+
+@pytest.mark.parametrize("spec, expected", [
+    ("hasMaterial", [("hasMaterial", False, None)]),
+    ("isContainedIn^", [("isContainedIn", True, None)]),
+    ("aggregates*", [("aggregates", False, "*")]),
+    ("aggregates^+", [("aggregates", True, "+")]),
+    ("aggregates*/isContainedIn^/hasMaterial", [("aggregates", False, "*"), ("isContainedIn", True, None), ("hasMaterial", False, None)]),
+    (" type / isOfType ", [("type", False, None), ("isOfType", False, None)]),
+])
+def test_parse_path(spec, expected):
+    steps = traversal.parse_path(spec)
+    assert [(s["predicate"], s["inverse"], s["repeat"]) for s in steps] == expected
+
+@pytest.mark.parametrize("spec", [
+    None, "", "/", "hasMaterial/", "foo", "rdfs:label", "hasMaterial^^", "hasMaterial*^",
+    "aggregates**", "aggregates*+", "has Material",
+])
+def test_parse_path_rejects_invalid_steps(spec):
+    with pytest.raises(ValueError, match="Passo inválido"):
+        traversal.parse_path(spec)
+
+def test_step_name_round_trip():
+    spec = "aggregates^*/isContainedIn^/hasMaterial+/type"
+    assert "/".join(traversal.step_name(step) for step in traversal.parse_path(spec)) == spec
+
+def test_traverse_inverse_then_forward(index):
+    steps = traversal.parse_path("isContainedIn^/hasMaterial")
+    frontier, edges, arrivals, hops = traversal.traverse(index, ids_of(index, "Térreo"), steps, traversal.TraversalBudget())
+    assert frontier == ids_of(index, "Concreto", "Tijolo")
+    # Paredes 0 a 3 ficam no térreo: duas de concreto e duas de tijolo.
+    assert {index.labels_of(n)[0]: c for n, c in arrivals.items()} == {"Concreto": 2, "Tijolo": 2}
+    # As arestas ficam no sentido em que existem no grafo, mesmo no passo inverso.
+    assert all(p == "isContainedIn" for s, p, o in edges if o in ids_of(index, "Térreo"))
+    assert [hop["step"] for hop in hops] == ["isContainedIn^", "hasMaterial"]
+
+def test_traverse_repetition(index):
+    start = ids_of(index, "Projeto")
+    budget = traversal.TraversalBudget()
+    star, _, _, _ = traversal.traverse(index, start, traversal.parse_path("aggregates*"), budget)
+    assert star == ids_of(index, "Projeto", "Casa", "Térreo", "Superior")
+    plus, _, _, _ = traversal.traverse(index, start, traversal.parse_path("aggregates+"), traversal.TraversalBudget())
+    assert plus == ids_of(index, "Casa", "Térreo", "Superior")
+    assert budget.truncated == []
+
+def test_traverse_budget_limits(index):
+    budget = traversal.TraversalBudget(max_depth=1)
+    frontier, _, _, _ = traversal.traverse(index, ids_of(index, "Projeto"), traversal.parse_path("aggregates+"), budget)
+    assert frontier == ids_of(index, "Casa")
+    assert budget.truncated == ["max_depth"]
+    budget = traversal.TraversalBudget(max_fanout=1)
+    frontier, _, _, _ = traversal.traverse(index, ids_of(index, "Térreo"), traversal.parse_path("isContainedIn^"), budget)
+    assert len(frontier) == 1 and budget.truncated == ["max_fanout"]
+
+def test_traverse_route_validates_the_path():
+    client = bim_app.app.test_client()
+    assert client.get("/traverse", query_string={"path": "hasMaterial"}).status_code == 400
+    response = client.get("/traverse", query_string={"start": "Térreo", "path": "hasMaterial^^"})
+    assert response.status_code == 400 and "Passo inválido" in response.get_json()["error"]
+    response = client.get("/traverse", query_string={"start": "Térreo", "path": "isContainedIn^/hasMaterial"})
+    assert response.status_code == 200
+    assert {r["label"]: r["count"] for r in response.get_json()["results"]} == {"Concreto": 2, "Tijolo": 2}
@@ -0,0 +1,235 @@
+# Instrumentação da aplicação: tempos por etapa de cada requisição, registro das consultas SPARQL
+# e métricas no formato de texto do Prometheus (rota '/metrics').
+# Com BIM_TRACING=1, cada requisição acumula os tempos das suas etapas (spans: intenção, extração,
+# consultas, montagem do JSON...), devolvidos no cabeçalho 'Server-Timing' e registrados no log
+# (nível DEBUG), e os histogramas por rota e por etapa são alimentados. Desligado (padrão), um
+# span é só uma verificação de flag. O log de consultas lentas vale nos dois casos.
+import os  # Para ler as variáveis de ambiente.
+import re  # Para compactar o texto das consultas no log.
+import time  # Para medir as durações.
+import logging  # Log estruturado em vez de 'print'.
+import threading  # Os histogramas são atualizados por várias threads.
+import contextlib  # Span nulo quando a instrumentação está desligada.
+from contextvars import ContextVar  # Requisição atual (vale para threads e para o asyncio).
+
+# --- Configurações ---
+# Liga os spans por requisição e os histogramas por rota/etapa.
+TRACING_ENABLED = os.environ.get("BIM_TRACING", "0") == "1"
+# Consultas SPARQL mais lentas que isso (em milissegundos) vão para o log; 0 desliga.
+SLOW_QUERY_MS = float(os.environ.get("BIM_SLOW_QUERY_MS", "1000"))
+# Limites dos intervalos dos histogramas, em segundos.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Caracteres da consulta mostrados no log de consultas lentas.
+QUERY_LOG_CHARS = 2000
+
+logger = logging.getLogger("bim")
+
+NULL_SPAN = contextlib.nullcontext()
+current_trace = ContextVar("bim_trace", default=None)
+
+# Texto da consulta em uma única linha (sem a indentação das f-strings do app.py).
+def compact_query(query):
+    text = re.sub(r"\s+", " ", query).strip()
+    return text if len(text) <= QUERY_LOG_CHARS else text[:QUERY_LOG_CHARS] + "..."
+
+class Histogram:
+    """Histograma cumulativo do Prometheus, com uma série por combinação de rótulos."""
+
+    def __init__(self, name, help_text, label_names, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}  # valores dos rótulos -> [contagens por intervalo, soma, total]
+        self.lock = threading.Lock()
+
+    def observe(self, labels, seconds):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            items = sorted((labels, [list(s[0]), s[1], s[2]]) for labels, s in self.series.items())
+        for labels, (counts, total, count) in items:
+            base = ",".join(f'{n}="{escape_label(v)}"' for n, v in zip(self.label_names, labels))
+            prefix = base + "," if base else ""
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{base}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+class Counter:
+    """Contador do Prometheus, com uma série por combinação de rótulos."""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            items = sorted(self.series.items())
+        for labels, value in items:
+            base = ",".join(f'{n}="{escape_label(v)}"' for n, v in zip(self.label_names, labels))
+            lines.append(f"{self.name}{{{base}}} {value}")
+        return lines
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Um gauge (valor instantâneo, ex: bytes ocupados pelo cache) no formato de texto.
+# O valor é sempre numérico: booleanos viram 0/1 (um 'True' invalidaria a coleta inteira).
+def render_gauge(name, help_text, value):
+    value = int(value) if isinstance(value, bool) else value if isinstance(value, (int, float)) else float(value)
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+
+class Span:
+    """Mede uma etapa; a duração vai para o histograma da etapa e para a requisição atual."""
+    __slots__ = ("tracer", "name", "attrs", "start")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, time.perf_counter() - self.start, self.attrs, error=exc_type is not None)
+        return False
+
+class Tracer:
+    def __init__(self, enabled=TRACING_ENABLED, slow_query_ms=SLOW_QUERY_MS):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.requests = Histogram("bim_request_duration_seconds", "Duração das requisições por rota.", ("route", "method", "status"))
+        self.stages = Histogram("bim_stage_duration_seconds", "Duração das etapas das requisições.", ("stage",))
+        self.queries = Histogram("bim_sparql_query_duration_seconds", "Duração das consultas SPARQL.", ("backend",))
+        self.rows = Counter("bim_sparql_rows_total", "Linhas devolvidas pelas consultas SPARQL.", ("backend",))
+        self.errors = Counter("bim_sparql_errors_total", "Consultas SPARQL que falharam.", ("backend",))
+        self.slow = Counter("bim_sparql_slow_queries_total", "Consultas SPARQL acima do limite do log de consultas lentas.", ("backend",))
+
+    # Etapa da requisição atual: 'with tracer.span("intencao"): ...'.
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def record(self, name, seconds, attrs=None, error=False):
+        self.stages.observe((name,), seconds)
+        trace = current_trace.get()
+        if trace is not None:
+            trace["spans"].append((name, seconds, dict(attrs or {}, error=True) if error else attrs))
+
+    # --- Requisições ---
+    def start_request(self):
+        if not self.enabled:
+            return None
+        trace = {"spans": [], "start": time.perf_counter()}
+        trace["token"] = current_trace.set(trace)
+        return trace
+
+    def finish_request(self, trace, route, method, status):
+        if trace is None:
+            return
+        seconds = time.perf_counter() - trace["start"]
+        try:
+            current_trace.reset(trace["token"])
+        except ValueError:
+            pass  # Encerrada em outro contexto (ex: resposta em streaming).
+        self.requests.observe((route, method, str(status)), seconds)
+        if logger.isEnabledFor(logging.DEBUG):
+            stages = " ".join(f"{name}={s * 1000:.1f}ms" + ("".join(f" {k}={v}" for k, v in attrs.items()) if attrs else "")
+                              for name, s, attrs in trace["spans"])
+            logger.debug("%s %s %s %.1fms | %s", method, route, status, seconds * 1000, stages)
+
+    # Valor do cabeçalho 'Server-Timing' com as etapas medidas até agora (mostrado no DevTools do navegador).
+    @staticmethod
+    def server_timing(trace):
+        totals = {}
+        for name, seconds, _ in trace["spans"]:
+            totals[name] = totals.get(name, 0.0) + seconds
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in totals.items()]
+        parts.append(f"total;dur={(time.perf_counter() - trace['start']) * 1000:.2f}")
+        return ", ".join(parts)
+
+    # --- Consultas SPARQL ---
+    @property
+    def instrument_queries(self):
+        return self.enabled or self.slow_query_ms > 0
+
+    def observe_query(self, backend, query, seconds, rows, error=None):
+        ms = seconds * 1000
+        if self.enabled:
+            self.queries.observe((backend,), seconds)
+            self.record("sparql", seconds, {"rows": rows} if error is None else {"error": True})
+            if error is None:
+                self.rows.inc((backend,), rows)
+            else:
+                self.errors.inc((backend,))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("SPARQL (%s) %.1fms, %s linhas: %s", backend, ms, rows, compact_query(query))
+        if error is not None:
+            logger.error("Consulta SPARQL falhou (%s) após %.1fms: %s | %s", backend, ms, error, compact_query(query))
+        elif self.slow_query_ms > 0 and ms >= self.slow_query_ms:
+            self.slow.inc((backend,))
+            logger.warning("Consulta SPARQL lenta (%s): %.1fms, %s linhas: %s", backend, ms, rows, compact_query(query))
+
+    def render_metrics(self, extra=()):
+        lines = []
+        for metric in (self.requests, self.stages, self.queries, self.rows, self.errors, self.slow):
+            lines.extend(metric.render())
+        for item in extra:
+            lines.extend(item)
+        return "\n".join(lines) + "\n"
+
+tracer = Tracer()
+
+class TracedStore:
+    """Backend com as consultas medidas (duração, linhas e texto no log); o resto é delegado."""
+
+    def __init__(self, store, tracer=tracer):
+        self.store = store
+        self.tracer = tracer
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def select(self, query):
+        start = time.perf_counter()
+        try:
+            rows = self.store.select(query)
+        except Exception as e:
+            self.tracer.observe_query(self.store.name, query, time.perf_counter() - start, 0, error=e)
+            raise
+        self.tracer.observe_query(self.store.name, query, time.perf_counter() - start, len(rows))
+        return rows
+
+# Envolve o backend só quando há algo a medir (instrumentação ligada ou log de consultas lentas).
+def instrument_store(store, tracer=tracer):
+    if store is None or not tracer.instrument_queries:
+        return store
+    return TracedStore(store, tracer)
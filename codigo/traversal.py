@@ -0,0 +1,152 @@
+# Percurso de vários passos no grafo a partir de um objeto.
+# O caminho é uma sequência de predicados separados por '/', cada um com modificadores opcionais:
+#   'hasMaterial'       um passo no sentido da relação (elemento -> material);
+#   'isContainedIn^'    um passo no sentido inverso (pavimento -> elementos contidos nele);
+#   'aggregates*'       zero ou mais passos repetidos ('+' para um ou mais), até a profundidade máxima.
+# Ex: 'aggregates*/isContainedIn^/hasMaterial' responde "quais materiais são usados no pavimento X".
+# O percurso usa as listas de adjacência do índice em memória (uma busca em largura por passo),
+# com limites de profundidade, de vizinhos por nó e de nós visitados.
+import re  # Para interpretar os passos do caminho.
+import time  # Para medir o tempo de cada passo.
+from graph_index import INDEXED_PREDICATES, BASE_URI  # Predicados disponíveis no índice.
+
+# Limites padrão (e máximos aceitos nos parâmetros da rota).
+DEFAULT_MAX_DEPTH = 5
+MAX_DEPTH_LIMIT = 50
+DEFAULT_MAX_NODES = 5000
+MAX_NODES_LIMIT = 100000
+DEFAULT_MAX_FANOUT = 1000
+
+STEP_RE = re.compile(r"^(\w+)(\^?)([*+]?)$")
+
+# Interpreta o caminho em uma lista de passos (predicado, inverso, repetição).
+# Lança ValueError com a mensagem para o usuário se o caminho for inválido.
+def parse_path(spec):
+    steps = []
+    for part in (spec or '').split('/'):
+        match = STEP_RE.match(part.strip())
+        if not match or match.group(1) not in INDEXED_PREDICATES:
+            raise ValueError(f"Passo inválido: '{part}'. Use um de {', '.join(INDEXED_PREDICATES)}, "
+                             "seguido opcionalmente de '^' (sentido inverso) e de '*' ou '+' (repetição).")
+        steps.append({"predicate": match.group(1), "inverse": bool(match.group(2)), "repeat": match.group(3) or None})
+    return steps
+
+def step_name(step):
+    return step["predicate"] + ("^" if step["inverse"] else "") + (step["repeat"] or "")
+
+class TraversalBudget:
+    """Limites do percurso e a marcação de quando algum deles cortou o resultado."""
+
+    def __init__(self, max_depth=DEFAULT_MAX_DEPTH, max_nodes=DEFAULT_MAX_NODES, max_fanout=DEFAULT_MAX_FANOUT):
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.max_fanout = max_fanout
+        self.visited = set()  # Todos os nós alcançados (contam para 'max_nodes').
+        self.truncated = []  # Motivos dos cortes, para informar o usuário.
+
+    def admit(self, node):
+        if node in self.visited:
+            return True
+        if len(self.visited) >= self.max_nodes:
+            if "max_nodes" not in self.truncated: self.truncated.append("max_nodes")
+            return False
+        self.visited.add(node)
+        return True
+
+# Um passo simples: os vizinhos de cada nó da fronteira. As arestas são guardadas no sentido
+# em que existem no grafo (sujeito, predicado, objeto), qualquer que seja o sentido do percurso;
+# 'arrivals' conta quantas arestas chegaram a cada nó alcançado.
+def expand(index, frontier, step, budget, edges, arrivals):
+    adjacency = (index.reverse if step["inverse"] else index.forward)[step["predicate"]]
+    reached = set()
+    for node in frontier:
+        neighbours = adjacency.get(node, ())
+        if len(neighbours) > budget.max_fanout:
+            neighbours = sorted(neighbours)[:budget.max_fanout]
+            if "max_fanout" not in budget.truncated: budget.truncated.append("max_fanout")
+        for neighbour in neighbours:
+            if not budget.admit(neighbour):
+                break
+            reached.add(neighbour)
+            arrivals[neighbour] = arrivals.get(neighbour, 0) + 1
+            edges.add((neighbour, step["predicate"], node) if step["inverse"] else (node, step["predicate"], neighbour))
+    return reached
+
+def traverse(index, start_nodes, steps, budget):
+    """
+    Executa o caminho a partir dos nós iniciais. Devolve (nós finais, arestas percorridas,
+    chegadas aos nós finais no último passo, estatísticas por passo), com as arestas como
+    tuplas (sujeito, predicado, objeto) de ids.
+    """
+    frontier = set(start_nodes)
+    for node in frontier:
+        budget.admit(node)
+    edges, hops, arrivals = set(), [], {}
+    with index.lock:
+        for step in steps:
+            started = time.perf_counter()
+            edges_before = len(edges)
+            arrivals = {}
+            if step["repeat"] is None:
+                frontier = expand(index, frontier, step, budget, edges, arrivals)
+                depth = 1
+            else:
+                # Repetição: busca em largura por níveis, até a profundidade máxima ou até não haver nós novos.
+                reached = set(frontier) if step["repeat"] == '*' else set()
+                level, seen, depth = frontier, set(frontier), 0
+                while level and depth < budget.max_depth:
+                    level = expand(index, level, step, budget, edges, arrivals) - seen
+                    seen |= level; reached |= level
+                    depth += 1
+                if level and depth == budget.max_depth and "max_depth" not in budget.truncated:
+                    budget.truncated.append("max_depth")
+                frontier = reached
+            hops.append({"step": step_name(step), "depth": depth, "nodes": len(frontier),
+                         "edges": len(edges) - edges_before, "ms": round((time.perf_counter() - started) * 1000, 3)})
+    return frontier, edges, arrivals, hops
+
+# Monta a resposta: o subgrafo no formato do vis.js, os nós finais agrupados pelo label (com
+# quantas arestas do último passo chegam a eles, ex: quantos elementos usam cada material) e
+# a contagem dos nós finais por tipo (rdf:type).
+def traversal_payload(index, start_nodes, frontier, edges, arrivals, hops, budget):
+    with index.lock:
+        results, types = {}, {}
+        for node in frontier:
+            label = index.labels_of(node)[0]
+            entry = results.setdefault(label, {"label": label, "nodes": 0, "count": 0})
+            entry["nodes"] += 1
+            entry["count"] += arrivals.get(node, 0)
+            for type_node in index.forward['type'].get(node, ()):
+                type_label = index.labels_of(type_node)[0]
+                types[type_label] = types.get(type_label, 0) + 1
+        nodes = set(start_nodes) | frontier | {s for s, _, _ in edges} | {o for _, _, o in edges}
+        return {
+            "results": sorted(results.values(), key=lambda r: (-r["count"], r["label"])),
+            "types": dict(sorted(types.items(), key=lambda t: (-t[1], t[0]))),
+            "nodes": [{"id": index.iris[node], "label": index.labels_of(node)[0],
+                       **({"color": "#a3e635", "size": 25} if node in start_nodes else
+                          {"color": "#fca5a5"} if node in frontier else {})} for node in sorted(nodes)],
+            "edges": [{"from": index.iris[s], "to": index.iris[o], "label": p} for s, p, o in sorted(edges)],
+            "hops": hops,
+            "truncated": budget.truncated,
+        }
+
+# --- Consulta SPARQL Equivalente ---
+# Usada quando o índice em memória não está disponível: o caminho vira um caminho de
+# propriedades do SPARQL 1.1, em uma única consulta. Não há limite de profundidade nem
+# subgrafo, apenas os nós finais com as contagens (limitados a 'limit').
+def build_traversal_query(start_literal, steps, limit):
+    def sparql_step(step):
+        predicate = "rdf:type" if step["predicate"] == "type" else f"inst:{step['predicate']}"
+        return ("^" if step["inverse"] else "") + predicate + (step["repeat"] or "")
+    path = "/".join(f"({sparql_step(step)})" for step in steps)
+    return f"""
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        PREFIX inst: <{BASE_URI}>
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        SELECT ?label (COUNT(*) AS ?count) WHERE {{
+            ?start rdfs:label {start_literal} .
+            ?start {path} ?end .
+            ?end rdfs:label ?label .
+        }} GROUP BY ?label ORDER BY DESC(?count) ?label LIMIT {int(limit)}
+    """